@@ -92,5 +92,100 @@ def dev(
     )
 
 
+@app.command()
+def migrate_vectors(
+    target: Optional[str] = None,
+    source: Optional[str] = None,
+    reembed: bool = False,
+    collection: Optional[list[str]] = None,
+    page_size: Optional[int] = None,
+    workers: Optional[int] = None,
+    checkpoint: Path = Path.cwd() / ".vector_migration.json",
+):
+    """
+    Copy the vector collections from SOURCE to TARGET (both default to
+    VECTOR_DB), re-embedding them with the configured embedding model with
+    --reembed. An interrupted run resumes from the checkpoint file.
+    """
+    import json
+
+    from open_webui.config import VECTOR_DB
+    from open_webui.retrieval.vector.migration import (
+        MIGRATION_PAGE_SIZE,
+        MIGRATION_WORKERS,
+        get_client,
+        get_collection_names,
+        migrate_collections,
+    )
+
+    options = {
+        "source": source or VECTOR_DB,
+        "target": target or VECTOR_DB,
+        "reembed": reembed,
+    }
+    saved = json.loads(checkpoint.read_text()) if checkpoint.exists() else {}
+    if saved and saved.get("options") != options:
+        typer.echo(
+            f"{checkpoint} belongs to a migration with {saved.get('options')}, "
+            "remove it to start a new one"
+        )
+        raise typer.Exit(1)
+
+    embedding_function = None
+    embedding_config = None
+    if reembed:
+        import open_webui.main  # loads the configured embedding model
+
+        state = open_webui.main.app.state
+        embedding_function = state.EMBEDDING_FUNCTION
+        embedding_config = json.dumps(
+            {
+                "engine": state.config.RAG_EMBEDDING_ENGINE,
+                "model": state.config.RAG_EMBEDDING_MODEL,
+            }
+        )
+
+    collection_names = (
+        collection or saved.get("collection_names") or get_collection_names()
+    )
+
+    def report(progress: dict, stats: dict):
+        checkpoint.write_text(
+            json.dumps(
+                {
+                    "options": options,
+                    "collection_names": collection_names,
+                    "checkpoint": progress,
+                }
+            )
+        )
+        typer.echo(
+            f"{len(progress['completed'])}/{len(collection_names)} collections, "
+            f"{stats['items']} items, {stats['items_per_second']:.0f} items/s, "
+            f"{stats['errors']} failed"
+        )
+
+    stats = migrate_collections(
+        get_client(options["source"]),
+        get_client(options["target"]),
+        collection_names,
+        embedding_function=embedding_function,
+        embedding_config=embedding_config,
+        page_size=page_size or MIGRATION_PAGE_SIZE,
+        workers=workers or MIGRATION_WORKERS,
+        checkpoint=saved.get("checkpoint"),
+        report=report,
+    )
+
+    typer.echo(
+        f"Migrated {stats['items']} items of {stats['collections']} collections in "
+        f"{stats['seconds']:.1f}s ({stats['items_per_second']:.0f} items/s)"
+    )
+    if stats["errors"]:
+        typer.echo(f"{stats['errors']} collections failed, run again to retry them")
+        raise typer.Exit(1)
+    checkpoint.unlink(missing_ok=True)
+
+
 if __name__ == "__main__":
     app()
@@ -20,6 +20,7 @@ from open_webui.env import (
     FRONTEND_BUILD_DIR,
     OFFLINE_MODE,
     OPEN_WEBUI_DIR,
+    REDIS_URL,
     WEBUI_AUTH,
     WEBUI_FAVICON_URL,
     WEBUI_NAME,
@@ -1500,6 +1501,24 @@ Ensure that the tools are effectively utilized to achieve the highest-quality an
 
 VECTOR_DB = os.environ.get("VECTOR_DB", "chroma")
 
+# Storage precision of new collections: float32 | float16 | int8 | binary
+VECTOR_DB_PRECISION = os.environ.get("VECTOR_DB_PRECISION", "float32").lower()
+if VECTOR_DB_PRECISION not in ["float32", "float16", "int8", "binary"]:
+    raise ValueError(
+        f"Unsupported VECTOR_DB_PRECISION {VECTOR_DB_PRECISION}, "
+        "expected one of float32, float16, int8, binary"
+    )
+# Candidates fetched per requested result and re-scored at full precision
+# when searching quantized vectors
+VECTOR_DB_RESCORE_OVERSAMPLING = float(
+    os.environ.get("VECTOR_DB_RESCORE_OVERSAMPLING", "4")
+)
+# Keep all chunks in one physical collection per embedding model, with file
+# and knowledge membership stored as metadata filters
+VECTOR_DB_SHARED_COLLECTION = (
+    os.environ.get("VECTOR_DB_SHARED_COLLECTION", "False").lower() == "true"
+)
+
 # Chroma
 CHROMA_DATA_PATH = f"{DATA_DIR}/vector_db"
 
@@ -1530,6 +1549,7 @@ if VECTOR_DB == "chroma":
 MILVUS_URI = os.environ.get("MILVUS_URI", f"{DATA_DIR}/vector_db/milvus.db")
 MILVUS_DB = os.environ.get("MILVUS_DB", "default")
 MILVUS_TOKEN = os.environ.get("MILVUS_TOKEN", None)
+MILVUS_ENABLE_BM25 = os.environ.get("MILVUS_ENABLE_BM25", "false").lower() == "true"
 
 # Qdrant
 QDRANT_URI = os.environ.get("QDRANT_URI", None)
@@ -1551,6 +1571,35 @@ if VECTOR_DB == "pgvector" and not PGVECTOR_DB_URL.startswith("postgres"):
 PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH = int(
     os.environ.get("PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH", "1536")
 )
+# Vector index: "hnsw", "ivfflat" or "none"
+PGVECTOR_INDEX_METHOD = os.environ.get("PGVECTOR_INDEX_METHOD", "ivfflat").lower()
+PGVECTOR_HNSW_M = int(os.environ.get("PGVECTOR_HNSW_M", "16"))
+PGVECTOR_HNSW_EF_CONSTRUCTION = int(
+    os.environ.get("PGVECTOR_HNSW_EF_CONSTRUCTION", "64")
+)
+# 0 sizes the lists from the number of rows, resized as they grow
+PGVECTOR_IVFFLAT_LISTS = int(os.environ.get("PGVECTOR_IVFFLAT_LISTS", "100"))
+# Search time settings applied per query, 0 keeps the server defaults
+PGVECTOR_HNSW_EF_SEARCH = int(os.environ.get("PGVECTOR_HNSW_EF_SEARCH", "0"))
+PGVECTOR_IVFFLAT_PROBES = int(os.environ.get("PGVECTOR_IVFFLAT_PROBES", "0"))
+# Build one partial index per collection instead of one over the whole table
+PGVECTOR_INDEX_PER_COLLECTION = (
+    os.environ.get("PGVECTOR_INDEX_PER_COLLECTION", "false").lower() == "true"
+)
+# Connection pool of the pgvector engine, a size of 0 disables pooling
+PGVECTOR_POOL_SIZE = int(os.environ.get("PGVECTOR_POOL_SIZE", "10"))
+PGVECTOR_POOL_MAX_OVERFLOW = int(os.environ.get("PGVECTOR_POOL_MAX_OVERFLOW", "10"))
+PGVECTOR_POOL_TIMEOUT = int(os.environ.get("PGVECTOR_POOL_TIMEOUT", "30"))
+PGVECTOR_POOL_RECYCLE = int(os.environ.get("PGVECTOR_POOL_RECYCLE", "3600"))
+# Additional asyncpg engine for searches awaited on the event loop
+PGVECTOR_ENABLE_ASYNC = (
+    os.environ.get("PGVECTOR_ENABLE_ASYNC", "false").lower() == "true"
+)
+
+# Local (embedded, memory-mapped vectors with SQLite metadata)
+LOCAL_VECTOR_DB_PATH = os.environ.get(
+    "LOCAL_VECTOR_DB_PATH", f"{DATA_DIR}/vector_db/local"
+)
 
 ####################################
 # Information Retrieval (RAG)
@@ -1636,12 +1685,38 @@ ENABLE_RAG_HYBRID_SEARCH = PersistentConfig(
     os.environ.get("ENABLE_RAG_HYBRID_SEARCH", "").lower() == "true",
 )
 
+# Rank constant of the reciprocal rank fusion merging lexical and vector results
+RAG_HYBRID_RRF_K = int(os.environ.get("RAG_HYBRID_RRF_K", "60"))
+
+# Seconds a local BM25 index is reused for backends without lexical search
+RAG_HYBRID_BM25_INDEX_TTL = int(os.environ.get("RAG_HYBRID_BM25_INDEX_TTL", "300"))
+
+# "redis" shares the write counters of collections between workers, so that
+# their BM25 indexes are rebuilt after the writes of any of them
+RAG_HYBRID_BM25_INDEX_MANAGER = os.environ.get("RAG_HYBRID_BM25_INDEX_MANAGER", "")
+
+RAG_HYBRID_BM25_INDEX_REDIS_URL = os.environ.get(
+    "RAG_HYBRID_BM25_INDEX_REDIS_URL", REDIS_URL
+)
+
 RAG_FULL_CONTEXT = PersistentConfig(
     "RAG_FULL_CONTEXT",
     "rag.full_context",
     os.getenv("RAG_FULL_CONTEXT", "False").lower() == "true",
 )
 
+# Tokens of retrieved context added to a chat, 0 leaves it unbounded unless
+# the model sets num_ctx
+RAG_CONTEXT_MAX_TOKENS = int(os.environ.get("RAG_CONTEXT_MAX_TOKENS", "0"))
+
+# Share of the context window (num_ctx) of a model given to retrieved context
+RAG_CONTEXT_WINDOW_SHARE = float(os.environ.get("RAG_CONTEXT_WINDOW_SHARE", "0.5"))
+
+# Word shingle overlap above which two chunks are the same context
+RAG_CONTEXT_DEDUPLICATION_THRESHOLD = float(
+    os.environ.get("RAG_CONTEXT_DEDUPLICATION_THRESHOLD", "0.9")
+)
+
 RAG_FILE_MAX_COUNT = PersistentConfig(
     "RAG_FILE_MAX_COUNT",
     "rag.file.max_count",
@@ -1705,6 +1780,13 @@ RAG_EMBEDDING_BATCH_SIZE = PersistentConfig(
     ),
 )
 
+# Number of chunks embedded and inserted per batch when saving documents
+RAG_INGESTION_BATCH_SIZE = int(os.environ.get("RAG_INGESTION_BATCH_SIZE", "256"))
+
+# Number of chunk embeddings kept in memory keyed by (embedding model, chunk hash),
+# so unchanged content is not embedded again, 0 disables
+RAG_EMBEDDING_CACHE_SIZE = int(os.environ.get("RAG_EMBEDDING_CACHE_SIZE", "0"))
+
 RAG_RERANKING_MODEL = PersistentConfig(
     "RAG_RERANKING_MODEL",
     "rag.reranking_model",
@@ -1713,6 +1795,14 @@ RAG_RERANKING_MODEL = PersistentConfig(
 if RAG_RERANKING_MODEL.value != "":
     log.info(f"Reranking model set: {RAG_RERANKING_MODEL.value}")
 
+# Number of (query, document) pairs scored per reranker call, 0 scores all at once
+RAG_RERANKING_BATCH_SIZE = int(os.environ.get("RAG_RERANKING_BATCH_SIZE", "0"))
+
+# Number of reranker scores kept in memory keyed by (query, chunk hash), 0 disables
+RAG_RERANKING_SCORE_CACHE_SIZE = int(
+    os.environ.get("RAG_RERANKING_SCORE_CACHE_SIZE", "0")
+)
+
 RAG_RERANKING_MODEL_AUTO_UPDATE = (
     not OFFLINE_MODE
     and os.environ.get("RAG_RERANKING_MODEL_AUTO_UPDATE", "True").lower() == "true"
@@ -1824,6 +1914,12 @@ YOUTUBE_LOADER_PROXY_URL = PersistentConfig(
     os.getenv("YOUTUBE_LOADER_PROXY_URL", ""),
 )
 
+# Seconds fetched YouTube transcripts are reused, 0 disables
+YOUTUBE_LOADER_CACHE_TTL = int(os.getenv("YOUTUBE_LOADER_CACHE_TTL", "86400"))
+
+# Number of transcripts kept in the cache
+YOUTUBE_LOADER_CACHE_SIZE = int(os.getenv("YOUTUBE_LOADER_CACHE_SIZE", "1000"))
+
 
 ENABLE_RAG_WEB_SEARCH = PersistentConfig(
     "ENABLE_RAG_WEB_SEARCH",
@@ -1990,12 +2086,60 @@ RAG_WEB_SEARCH_CONCURRENT_REQUESTS = PersistentConfig(
     int(os.getenv("RAG_WEB_SEARCH_CONCURRENT_REQUESTS", "10")),
 )
 
+# Generated search queries of a chat turn sent to the search engine at once
+RAG_WEB_SEARCH_CONCURRENT_QUERIES = int(
+    os.getenv("RAG_WEB_SEARCH_CONCURRENT_QUERIES", "4")
+)
+
+# Seconds identical searches reuse the results of the search engine and the
+# collection built from them, 0 disables
+RAG_WEB_SEARCH_CACHE_TTL = int(os.getenv("RAG_WEB_SEARCH_CACHE_TTL", "0"))
+
+# Number of searches and collections kept in the cache
+RAG_WEB_SEARCH_CACHE_SIZE = int(os.getenv("RAG_WEB_SEARCH_CACHE_SIZE", "1000"))
+
+# Embed the pages of a web search as they are loaded and answer once enough
+# of them are indexed, the remaining pages are indexed in the background
+ENABLE_RAG_WEB_SEARCH_INCREMENTAL_INGESTION = (
+    os.getenv("ENABLE_RAG_WEB_SEARCH_INCREMENTAL_INGESTION", "False").lower() == "true"
+)
+
+# Indexed chunks or pages that are enough context to answer, 0 disables either
+RAG_WEB_SEARCH_MIN_CHUNKS = int(os.getenv("RAG_WEB_SEARCH_MIN_CHUNKS", "20"))
+RAG_WEB_SEARCH_MIN_PAGES = int(os.getenv("RAG_WEB_SEARCH_MIN_PAGES", "3"))
+
+# Seconds after which the chat continues with the pages indexed so far, 0
+# waits for the thresholds
+RAG_WEB_SEARCH_INGESTION_DEADLINE = float(
+    os.getenv("RAG_WEB_SEARCH_INGESTION_DEADLINE", "10")
+)
+
 RAG_WEB_LOADER_ENGINE = PersistentConfig(
     "RAG_WEB_LOADER_ENGINE",
     "rag.web.loader.engine",
     os.environ.get("RAG_WEB_LOADER_ENGINE", "safe_web"),
 )
 
+# Text extraction of pages fetched by the safe_web loader: "fast" (streaming
+# parser, boilerplate removed) or "bs4" (BeautifulSoup, whole page)
+RAG_WEB_LOADER_EXTRACTOR = os.environ.get("RAG_WEB_LOADER_EXTRACTOR", "fast").lower()
+
+# Requests the safe_web loader sends to one host at once, its request rate per
+# host is RAG_WEB_SEARCH_CONCURRENT_REQUESTS per second
+RAG_WEB_LOADER_CONCURRENT_REQUESTS_PER_HOST = int(
+    os.environ.get("RAG_WEB_LOADER_CONCURRENT_REQUESTS_PER_HOST", "2")
+)
+
+# Seconds the safe_web loader spends fetching the pages of a search, pages
+# still loading are dropped, 0 waits for all of them
+RAG_WEB_LOADER_TIMEOUT = int(os.environ.get("RAG_WEB_LOADER_TIMEOUT", "20"))
+
+# Characters of page text after which the safe_web loader stops fetching the
+# remaining pages, 0 fetches all of them
+RAG_WEB_LOADER_MAX_CONTENT_LENGTH = int(
+    os.environ.get("RAG_WEB_LOADER_MAX_CONTENT_LENGTH", "0")
+)
+
 RAG_WEB_SEARCH_TRUST_ENV = PersistentConfig(
     "RAG_WEB_SEARCH_TRUST_ENV",
     "rag.web.search.trust_env",
@@ -2008,6 +2152,27 @@ PLAYWRIGHT_WS_URI = PersistentConfig(
     os.environ.get("PLAYWRIGHT_WS_URI", None),
 )
 
+# Browser contexts kept warm for the playwright loader, each one renders a
+# page at a time and is replaced after PLAYWRIGHT_POOL_PAGES_PER_CONTEXT pages
+PLAYWRIGHT_POOL_SIZE = int(os.environ.get("PLAYWRIGHT_POOL_SIZE", "4"))
+PLAYWRIGHT_POOL_PAGES_PER_CONTEXT = int(
+    os.environ.get("PLAYWRIGHT_POOL_PAGES_PER_CONTEXT", "50")
+)
+# Seconds a page waits for a free browser context before failing, 0 waits
+# as long as it takes
+PLAYWRIGHT_POOL_ACQUIRE_TIMEOUT = int(
+    os.environ.get("PLAYWRIGHT_POOL_ACQUIRE_TIMEOUT", "60")
+)
+
+# Resource types the playwright loader does not download, empty loads all
+PLAYWRIGHT_BLOCKED_RESOURCES = [
+    resource_type.strip()
+    for resource_type in os.environ.get(
+        "PLAYWRIGHT_BLOCKED_RESOURCES", "image,font,media"
+    ).split(",")
+    if resource_type.strip()
+]
+
 FIRECRAWL_API_KEY = PersistentConfig(
     "FIRECRAWL_API_KEY",
     "firecrawl.api_key",
@@ -2020,6 +2185,34 @@ FIRECRAWL_API_BASE_URL = PersistentConfig(
     os.environ.get("FIRECRAWL_API_BASE_URL", "https://api.firecrawl.dev"),
 )
 
+# Fetched web pages are cached with their extracted text and revalidated with
+# ETag/Last-Modified once stale
+ENABLE_RAG_WEB_FETCH_CACHE = (
+    os.environ.get("ENABLE_RAG_WEB_FETCH_CACHE", "False").lower() == "true"
+)
+
+# "" (files in RAG_WEB_FETCH_CACHE_DIR) or "redis"
+RAG_WEB_FETCH_CACHE_MANAGER = os.environ.get("RAG_WEB_FETCH_CACHE_MANAGER", "")
+
+RAG_WEB_FETCH_CACHE_DIR = os.environ.get("RAG_WEB_FETCH_CACHE_DIR", f"{CACHE_DIR}/web")
+
+RAG_WEB_FETCH_CACHE_REDIS_URL = os.environ.get(
+    "RAG_WEB_FETCH_CACHE_REDIS_URL", REDIS_URL
+)
+
+# Seconds a cached page is used without asking the site whether it changed
+RAG_WEB_FETCH_CACHE_TTL = int(os.environ.get("RAG_WEB_FETCH_CACHE_TTL", "3600"))
+
+# Seconds a cached page is kept for revalidation after it was last fetched
+RAG_WEB_FETCH_CACHE_MAX_AGE = int(
+    os.environ.get("RAG_WEB_FETCH_CACHE_MAX_AGE", "604800")
+)
+
+# Megabytes of cached pages, the least recently used are evicted first
+RAG_WEB_FETCH_CACHE_MAX_SIZE = int(
+    os.environ.get("RAG_WEB_FETCH_CACHE_MAX_SIZE", "512")
+)
+
 ####################################
 # Images
 ####################################
@@ -333,6 +333,71 @@ ENABLE_REALTIME_CHAT_SAVE = (
 
 REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
 
+####################################
+# INGESTION QUEUE
+####################################
+
+# When enabled, file uploads and knowledge batch additions are processed by
+# background workers and the request returns immediately with a job id.
+ENABLE_INGESTION_QUEUE = (
+    os.environ.get("ENABLE_INGESTION_QUEUE", "False").lower() == "true"
+)
+
+# "" (in-process) or "redis"
+INGESTION_QUEUE_MANAGER = os.environ.get("INGESTION_QUEUE_MANAGER", "")
+
+INGESTION_QUEUE_REDIS_URL = os.environ.get("INGESTION_QUEUE_REDIS_URL", REDIS_URL)
+
+try:
+    INGESTION_QUEUE_WORKERS = int(os.environ.get("INGESTION_QUEUE_WORKERS", "2"))
+except ValueError:
+    INGESTION_QUEUE_WORKERS = 2
+
+# Jobs left in "processing" for longer than this (seconds) are considered
+# abandoned by a dead worker and are re-queued on startup. Running jobs send
+# a heartbeat every quarter of it.
+try:
+    INGESTION_QUEUE_STALE_TIMEOUT = int(
+        os.environ.get("INGESTION_QUEUE_STALE_TIMEOUT", "600")
+    )
+except ValueError:
+    INGESTION_QUEUE_STALE_TIMEOUT = 600
+
+####################################
+# CONTENT EXTRACTION
+####################################
+
+# Number of worker processes used for local document extraction (PyPDF,
+# Unstructured, docx2txt, ...). 0 (default) runs extraction in the calling thread.
+try:
+    CONTENT_EXTRACTION_WORKERS = int(os.environ.get("CONTENT_EXTRACTION_WORKERS", "0"))
+except ValueError:
+    CONTENT_EXTRACTION_WORKERS = 0
+
+# Per extraction task timeout in seconds, from when a worker starts the task
+try:
+    CONTENT_EXTRACTION_TIMEOUT = int(
+        os.environ.get("CONTENT_EXTRACTION_TIMEOUT", "300")
+    )
+except ValueError:
+    CONTENT_EXTRACTION_TIMEOUT = 300
+
+# Address space limit per extraction worker in MB, 0 disables the limit
+try:
+    CONTENT_EXTRACTION_MEMORY_LIMIT = int(
+        os.environ.get("CONTENT_EXTRACTION_MEMORY_LIMIT", "0")
+    )
+except ValueError:
+    CONTENT_EXTRACTION_MEMORY_LIMIT = 0
+
+# Large PDFs are split into page ranges of this size and extracted in parallel
+try:
+    CONTENT_EXTRACTION_PDF_PAGES_PER_TASK = int(
+        os.environ.get("CONTENT_EXTRACTION_PDF_PAGES_PER_TASK", "25")
+    )
+except ValueError:
+    CONTENT_EXTRACTION_PDF_PAGES_PER_TASK = 25
+
 ####################################
 # WEBUI_AUTH (Required for security)
 ####################################
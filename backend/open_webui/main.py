@@ -87,6 +87,11 @@ from open_webui.routers.retrieval import (
     get_ef,
     get_rf,
 )
+from open_webui.retrieval.ingestion import INGESTION_QUEUE
+from open_webui.retrieval.loaders.main import close_extraction_pools
+from open_webui.retrieval.web.main import close_session as close_web_search_session
+from open_webui.retrieval.web.crawler import close_crawler_sessions
+from open_webui.retrieval.web.browser import close_browser_pool, get_browser_pool
 
 from open_webui.internal.db import Session
 
@@ -335,6 +340,7 @@ from open_webui.env import (
     BYPASS_MODEL_ACCESS_CONTROL,
     RESET_CONFIG_ON_START,
     OFFLINE_MODE,
+    ENABLE_INGESTION_QUEUE,
 )
 
 
@@ -416,9 +422,27 @@ async def lifespan(app: FastAPI):
     if app.state.config.LICENSE_KEY:
         get_license_data(app, app.state.config.LICENSE_KEY)
 
+    if ENABLE_INGESTION_QUEUE:
+        await INGESTION_QUEUE.start(app)
+
+    if app.state.config.RAG_WEB_LOADER_ENGINE == "playwright":
+        # Warm the browser contexts before the first web search
+        try:
+            await get_browser_pool(app.state.config.PLAYWRIGHT_WS_URI)
+        except Exception as e:
+            log.warning(f"Error starting the browser context pool: {e}")
+
     asyncio.create_task(periodic_usage_pool_cleanup())
     yield
 
+    if ENABLE_INGESTION_QUEUE:
+        await INGESTION_QUEUE.stop()
+
+    await close_web_search_session()
+    await close_crawler_sessions()
+    await close_browser_pool()
+    await asyncio.to_thread(close_extraction_pools)
+
 
 app = FastAPI(
     title="Open WebUI API",
@@ -0,0 +1,38 @@
+"""Add ingestion job table
+
+Revision ID: 9f0c9cd09105
+Revises: 3781e22d8b01
+Create Date: 2025-03-10 12:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "9f0c9cd09105"
+down_revision = "3781e22d8b01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "ingestion_job",
+        sa.Column(
+            "id", sa.Text(), nullable=False, primary_key=True, unique=True
+        ),  # Unique job ID
+        sa.Column("user_id", sa.Text(), nullable=False),  # User who queued the job
+        sa.Column("type", sa.Text(), nullable=False),  # file | knowledge_batch
+        sa.Column("status", sa.Text(), nullable=False),  # pending | processing | ...
+        sa.Column("progress", sa.Integer(), nullable=True),  # 0-100
+        sa.Column("data", sa.JSON(), nullable=True),  # Job payload and checkpoints
+        sa.Column("error", sa.Text(), nullable=True),  # Last error, if any
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+    )
+    op.create_index("ingestion_job_status_idx", "ingestion_job", ["status"])
+
+
+def downgrade():
+    op.drop_index("ingestion_job_status_idx", table_name="ingestion_job")
+    op.drop_table("ingestion_job")
@@ -0,0 +1,177 @@
+import logging
+import time
+import uuid
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Integer, Text, JSON
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# Ingestion Job DB Schema
+####################
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_job"
+
+    id = Column(Text, primary_key=True)
+    user_id = Column(Text)
+
+    # "file" | "knowledge_batch" | "vector_migration"
+    type = Column(Text)
+    # "pending" | "processing" | "completed" | "failed"
+    status = Column(Text)
+    progress = Column(Integer, default=0)
+
+    data = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+
+class IngestionJobModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    user_id: str
+
+    type: str
+    status: str
+    progress: int = 0
+
+    data: Optional[dict] = None
+    error: Optional[str] = None
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
+####################
+# Forms
+####################
+
+
+class IngestionJobForm(BaseModel):
+    type: str
+    data: dict = {}
+
+
+class IngestionJobsTable:
+    def insert_new_job(
+        self, user_id: str, form_data: IngestionJobForm
+    ) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            job = IngestionJobModel(
+                **{
+                    **form_data.model_dump(),
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "status": "pending",
+                    "progress": 0,
+                    "created_at": int(time.time()),
+                    "updated_at": int(time.time()),
+                }
+            )
+
+            try:
+                result = IngestionJob(**job.model_dump())
+                db.add(result)
+                db.commit()
+                db.refresh(result)
+                if result:
+                    return IngestionJobModel.model_validate(result)
+                else:
+                    return None
+            except Exception as e:
+                log.exception(f"Error inserting a new ingestion job: {e}")
+                return None
+
+    def get_job_by_id(self, id: str) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            try:
+                job = db.get(IngestionJob, id)
+                return IngestionJobModel.model_validate(job)
+            except Exception:
+                return None
+
+    def get_jobs_by_status(self, statuses: list[str]) -> list[IngestionJobModel]:
+        with get_db() as db:
+            return [
+                IngestionJobModel.model_validate(job)
+                for job in db.query(IngestionJob)
+                .filter(IngestionJob.status.in_(statuses))
+                .order_by(IngestionJob.created_at.asc())
+                .all()
+            ]
+
+    def get_active_job_by_file_id(self, file_id: str) -> Optional[IngestionJobModel]:
+        # Pending or processing file job of a file, the active jobs are few
+        for job in self.get_jobs_by_status(["pending", "processing"]):
+            if job.type == "file" and (job.data or {}).get("file_id") == file_id:
+                return job
+        return None
+
+    def claim_job_by_id(self, id: str) -> Optional[IngestionJobModel]:
+        # Atomically move a pending job to processing so that a job enqueued
+        # twice (e.g. after a restart) is only ever picked up by one worker.
+        with get_db() as db:
+            try:
+                claimed = (
+                    db.query(IngestionJob)
+                    .filter_by(id=id, status="pending")
+                    .update(
+                        {"status": "processing", "updated_at": int(time.time())},
+                        synchronize_session=False,
+                    )
+                )
+                db.commit()
+
+                if not claimed:
+                    return None
+                return IngestionJobModel.model_validate(db.get(IngestionJob, id))
+            except Exception:
+                return None
+
+    def update_job_by_id(
+        self,
+        id: str,
+        status: Optional[str] = None,
+        progress: Optional[int] = None,
+        data: Optional[dict] = None,
+        error: Optional[str] = None,
+    ) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            try:
+                job = db.query(IngestionJob).filter_by(id=id).first()
+                if status is not None:
+                    job.status = status
+                if progress is not None:
+                    job.progress = progress
+                if data is not None:
+                    job.data = {**(job.data if job.data else {}), **data}
+                if error is not None:
+                    job.error = error
+                job.updated_at = int(time.time())
+                db.commit()
+                return IngestionJobModel.model_validate(job)
+            except Exception:
+                return None
+
+    def delete_job_by_id(self, id: str) -> bool:
+        with get_db() as db:
+            try:
+                db.query(IngestionJob).filter_by(id=id).delete()
+                db.commit()
+
+                return True
+            except Exception:
+                return False
+
+
+IngestionJobs = IngestionJobsTable()
@@ -0,0 +1,159 @@
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from open_webui.config import (
+    RAG_CONTEXT_DEDUPLICATION_THRESHOLD,
+    RAG_CONTEXT_MAX_TOKENS,
+    RAG_CONTEXT_WINDOW_SHARE,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Words per shingle compared to find near-identical chunks
+SHINGLE_SIZE = 5
+
+# Characters per token assumed when no tokenizer can be loaded
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=8)
+def get_encoding(encoding_name: str):
+    import tiktoken
+
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        log.warning(f"Error loading the {encoding_name} tokenizer, estimating: {e}")
+        return None
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str, encoding_name: str) -> int:
+    # The same chunks come back on every turn of a chat
+    encoding = get_encoding(encoding_name)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def get_context_token_budget(form_data: dict, model: dict) -> int:
+    """
+    Tokens of retrieved context for a chat with `model`, RAG_CONTEXT_MAX_TOKENS
+    lowered to its share of the context window of the model if it sets one.
+    0 means unbounded.
+    """
+    num_ctx = (form_data.get("options") or {}).get("num_ctx") or (
+        model.get("info", {}).get("params", {}) or {}
+    ).get("num_ctx")
+
+    budget = RAG_CONTEXT_MAX_TOKENS
+    if num_ctx:
+        window_budget = int(int(num_ctx) * RAG_CONTEXT_WINDOW_SHARE)
+        budget = min(budget, window_budget) if budget else window_budget
+    return budget
+
+
+@dataclass
+class ContextChunk:
+    source_idx: int
+    text: str
+    score: Optional[float]
+
+
+def _get_shingles(text: str) -> set[int]:
+    words = re.sub(r"[^\w\s]", "", text.lower()).split()
+    if len(words) <= SHINGLE_SIZE:
+        return {hash(" ".join(words))}
+    return {
+        hash(" ".join(words[i : i + SHINGLE_SIZE]))
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def get_context_chunks(sources: list[dict]) -> list[ContextChunk]:
+    """
+    The documents of all sources, the unscored ones (attached files, full
+    documents) first and then the retrieved ones. Both keep the order of the
+    sources, which are sorted by merge_and_sort_query_results for the metric
+    of the vector database (a distance or a similarity), so scores are not
+    compared here.
+    """
+    chunks = []
+    for source_idx, source in enumerate(sources):
+        distances = source.get("distances") or []
+        for doc_idx, text in enumerate(source.get("document") or []):
+            score = distances[doc_idx] if doc_idx < len(distances) else None
+            chunks.append(ContextChunk(source_idx, text, score))
+
+    # Stable, the chunks keep their retrieval order
+    return sorted(chunks, key=lambda chunk: chunk.score is not None)
+
+
+def assemble_context(
+    sources: list[dict],
+    max_tokens: int = 0,
+    encoding_name: str = "cl100k_base",
+    deduplication_threshold: float = RAG_CONTEXT_DEDUPLICATION_THRESHOLD,
+) -> tuple[str, dict]:
+    """
+    Build the context string of a chat from the documents of `sources`, in
+    the order of get_context_chunks, skipping chunks whose word shingles
+    overlap a chunk already added by `deduplication_threshold` or more, until
+    `max_tokens` (0 for no limit). Returns the context and its usage.
+    """
+    parts = []
+    used_tokens = 0
+    usage = {"chunks": 0, "duplicates": 0, "truncated": 0}
+
+    # Shingles of the added chunks, indexed to only compare chunks that share some
+    shingle_index: dict[int, list[int]] = {}
+    shingle_counts = []
+
+    for chunk in get_context_chunks(sources):
+        if not chunk.text or not chunk.text.strip():
+            continue
+
+        shingles = _get_shingles(chunk.text)
+        overlaps = Counter(
+            idx for shingle in shingles for idx in shingle_index.get(shingle, ())
+        )
+        if any(
+            overlap / (len(shingles) + shingle_counts[idx] - overlap)
+            >= deduplication_threshold
+            for idx, overlap in overlaps.items()
+        ):
+            usage["duplicates"] += 1
+            continue
+
+        part = (
+            f"<source><source_id>{chunk.source_idx}</source_id>"
+            f"<source_context>{chunk.text}</source_context></source>"
+        )
+        tokens = count_tokens(part, encoding_name)
+        if max_tokens and used_tokens + tokens > max_tokens:
+            # A smaller chunk further down may still fit
+            usage["truncated"] += 1
+            continue
+
+        parts.append(part)
+        used_tokens += tokens
+        usage["chunks"] += 1
+        for shingle in shingles:
+            shingle_index.setdefault(shingle, []).append(len(shingle_counts))
+        shingle_counts.append(len(shingles))
+
+    usage["tokens"] = used_tokens
+    usage["max_tokens"] = max_tokens
+    if usage["duplicates"] or usage["truncated"]:
+        log.info(
+            f"Context of {used_tokens} tokens, {usage['duplicates']} duplicate and "
+            f"{usage['truncated']} chunks over {max_tokens} tokens skipped"
+        )
+    return "\n".join(parts), usage
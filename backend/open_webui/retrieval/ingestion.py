@@ -0,0 +1,396 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Callable, Optional
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+
+from open_webui.models.files import Files
+from open_webui.models.jobs import (
+    IngestionJobForm,
+    IngestionJobModel,
+    IngestionJobs,
+)
+from open_webui.models.knowledge import Knowledges
+from open_webui.models.users import Users
+from open_webui.retrieval.vector.migration import (
+    MIGRATION_PAGE_SIZE,
+    MIGRATION_WORKERS,
+    get_client,
+    get_collection_names,
+    migrate_collections,
+)
+from open_webui.routers.audio import transcribe
+from open_webui.routers.retrieval import (
+    BatchProcessFilesForm,
+    ProcessFileForm,
+    process_file,
+    process_files_batch,
+)
+from open_webui.socket.main import sio, USER_POOL
+from open_webui.socket.utils import RedisLock
+from open_webui.storage.provider import Storage
+
+from open_webui.config import VECTOR_DB
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    INGESTION_QUEUE_MANAGER,
+    INGESTION_QUEUE_REDIS_URL,
+    INGESTION_QUEUE_WORKERS,
+    INGESTION_QUEUE_STALE_TIMEOUT,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+AUDIO_CONTENT_TYPES = [
+    "audio/mpeg",
+    "audio/wav",
+    "audio/ogg",
+    "audio/x-m4a",
+]
+
+
+def get_job_request(app) -> Request:
+    # The processing handlers only read `request.app.state`, so a bare HTTP
+    # scope carrying the app is enough to run them outside of a request.
+    return Request({"type": "http", "app": app, "headers": [], "query_string": b""})
+
+
+def get_error_message(e: Exception) -> str:
+    return str(e.detail) if hasattr(e, "detail") else str(e)
+
+
+####################
+# Job handlers
+####################
+
+
+def run_file_job(
+    request: Request, job: IngestionJobModel, user, report: Callable
+) -> None:
+    file = Files.get_file_by_id(job.data.get("file_id"))
+    if not file:
+        raise ValueError(f"File {job.data.get('file_id')} not found")
+
+    if file.meta.get("content_type") in AUDIO_CONTENT_TYPES:
+        file_path = Storage.get_file(file.path)
+        result = transcribe(request, file_path)
+        report(50)
+
+        process_file(
+            request,
+            ProcessFileForm(file_id=file.id, content=result.get("text", "")),
+            user=user,
+        )
+    else:
+        process_file(request, ProcessFileForm(file_id=file.id), user=user)
+
+
+def run_knowledge_batch_job(
+    request: Request, job: IngestionJobModel, user, report: Callable
+) -> None:
+    knowledge_id = job.data.get("knowledge_id")
+    file_ids = job.data.get("file_ids", [])
+
+    # Files finished before a restart are checkpointed on the job and skipped.
+    completed_file_ids = list(job.data.get("completed_file_ids", []))
+    errors = dict(job.data.get("errors", {}))
+
+    for idx, file_id in enumerate(file_ids):
+        if file_id in completed_file_ids or file_id in errors:
+            continue
+
+        file = Files.get_file_by_id(file_id)
+        if not file:
+            errors[file_id] = f"File {file_id} not found"
+        else:
+            result = process_files_batch(
+                request=request,
+                form_data=BatchProcessFilesForm(
+                    files=[file], collection_name=knowledge_id
+                ),
+                user=user,
+            )
+
+            if any(r.status == "completed" for r in result.results):
+                knowledge = Knowledges.get_knowledge_by_id(id=knowledge_id)
+                if knowledge:
+                    data = knowledge.data or {}
+                    existing_file_ids = data.get("file_ids", [])
+                    if file_id not in existing_file_ids:
+                        existing_file_ids.append(file_id)
+                    data["file_ids"] = existing_file_ids
+                    Knowledges.update_knowledge_data_by_id(id=knowledge_id, data=data)
+
+                completed_file_ids.append(file_id)
+            else:
+                errors[file_id] = "; ".join(
+                    [str(err.error) for err in result.errors]
+                ) or ("Error processing file")
+
+        report(
+            int((idx + 1) * 100 / len(file_ids)),
+            {"completed_file_ids": completed_file_ids, "errors": errors},
+        )
+
+    if errors and not completed_file_ids:
+        raise Exception("All files failed to process")
+
+
+def run_vector_migration_job(
+    request: Request, job: IngestionJobModel, user, report: Callable
+) -> None:
+    source = get_client(job.data.get("source", VECTOR_DB))
+    target = get_client(job.data.get("target", VECTOR_DB))
+
+    # The collection list is fixed on the first run so progress stays stable
+    collection_names = job.data.get("collection_names")
+    if collection_names is None:
+        collection_names = get_collection_names()
+        report(0, {"collection_names": collection_names})
+
+    embedding_function = None
+    embedding_config = None
+    if job.data.get("reembed"):
+        embedding_function = lambda texts: request.app.state.EMBEDDING_FUNCTION(
+            texts, user=user
+        )
+        embedding_config = json.dumps(
+            {
+                "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
+                "model": request.app.state.config.RAG_EMBEDDING_MODEL,
+            }
+        )
+
+    def report_migration(checkpoint: dict, stats: dict):
+        report(
+            int(len(checkpoint["completed"]) * 100 / max(len(collection_names), 1)),
+            {"checkpoint": checkpoint, "stats": stats},
+        )
+
+    stats = migrate_collections(
+        source,
+        target,
+        collection_names,
+        embedding_function=embedding_function,
+        embedding_config=embedding_config,
+        page_size=job.data.get("page_size", MIGRATION_PAGE_SIZE),
+        workers=job.data.get("workers", MIGRATION_WORKERS),
+        checkpoint=job.data.get("checkpoint"),
+        report=report_migration,
+    )
+    if stats["errors"]:
+        raise Exception(f"{stats['errors']} collections failed to migrate")
+
+
+JOB_HANDLERS = {
+    "file": run_file_job,
+    "knowledge_batch": run_knowledge_batch_job,
+    "vector_migration": run_vector_migration_job,
+}
+
+
+####################
+# Queue
+####################
+
+
+class IngestionQueue:
+    def __init__(
+        self,
+        manager: str = "",
+        redis_url: Optional[str] = None,
+        workers: int = 2,
+    ):
+        self.manager = manager
+        self.redis_url = redis_url
+        self.workers = max(1, workers)
+        self.redis_key = "open-webui:ingestion_queue"
+
+        self.app = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks: list[asyncio.Task] = []
+
+        if self.manager == "redis":
+            import redis
+
+            self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+
+    async def start(self, app):
+        self.app = app
+        self.loop = asyncio.get_running_loop()
+
+        if self.manager == "redis":
+            import redis.asyncio
+
+            self.async_redis = redis.asyncio.Redis.from_url(
+                self.redis_url, decode_responses=True
+            )
+        else:
+            self.queue = asyncio.Queue()
+
+        await run_in_threadpool(self.recover_jobs)
+
+        self.tasks = [
+            asyncio.create_task(self.worker(idx)) for idx in range(self.workers)
+        ]
+        log.info(
+            f"Ingestion queue started with {self.workers} workers "
+            f"({self.manager or 'local'})"
+        )
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def recover_jobs(self):
+        # Re-queue jobs interrupted by a restart. Several instances may share
+        # the database (and with Redis the queue), so only jobs whose worker
+        # stopped sending heartbeats are reset, and with Redis only one
+        # instance performs the recovery. Pending jobs enqueued twice are
+        # claimed once.
+        lock = None
+        if self.manager == "redis":
+            lock = RedisLock(
+                redis_url=self.redis_url,
+                lock_name="ingestion_recovery_lock",
+                timeout_secs=60,
+            )
+            if not lock.aquire_lock():
+                return
+
+        try:
+            now = int(time.time())
+            for job in IngestionJobs.get_jobs_by_status(["pending", "processing"]):
+                if job.status == "processing":
+                    if now - job.updated_at < INGESTION_QUEUE_STALE_TIMEOUT:
+                        continue
+                    IngestionJobs.update_job_by_id(job.id, status="pending")
+
+                log.info(f"Resuming ingestion job {job.id} ({job.type})")
+                self.enqueue(job.id)
+        finally:
+            if lock:
+                lock.release_lock()
+
+    def enqueue(self, job_id: str):
+        # Safe to call from request threads; jobs submitted before the workers
+        # are running stay "pending" and are picked up by `recover_jobs`.
+        if self.manager == "redis":
+            self.redis.rpush(self.redis_key, job_id)
+        elif self.loop is not None:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, job_id)
+
+    def submit(self, user_id: str, type: str, data: dict) -> IngestionJobModel:
+        job = IngestionJobs.insert_new_job(
+            user_id, IngestionJobForm(type=type, data=data)
+        )
+        if job is None:
+            raise Exception("Error creating ingestion job")
+
+        self.enqueue(job.id)
+        return job
+
+    async def next_job_id(self) -> Optional[str]:
+        if self.manager == "redis":
+            result = await self.async_redis.blpop(self.redis_key, timeout=5)
+            return result[1] if result else None
+        return await self.queue.get()
+
+    async def worker(self, idx: int):
+        while True:
+            try:
+                job_id = await self.next_job_id()
+                if job_id:
+                    await self.run_job(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception(f"Ingestion worker {idx} error: {e}")
+
+    async def run_job(self, job_id: str):
+        job = await run_in_threadpool(IngestionJobs.claim_job_by_id, job_id)
+        if job is None:
+            # Already claimed by another worker, or no longer pending
+            return
+
+        await self.emit(job)
+
+        handler = JOB_HANDLERS.get(job.type)
+        user = await run_in_threadpool(Users.get_user_by_id, job.user_id)
+
+        def report(progress: int, data: Optional[dict] = None):
+            updated = IngestionJobs.update_job_by_id(
+                job.id, progress=progress, data=data
+            )
+            if updated:
+                asyncio.run_coroutine_threadsafe(self.emit(updated), self.loop)
+
+        heartbeat = asyncio.create_task(self.heartbeat(job.id))
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown ingestion job type: {job.type}")
+
+            await run_in_threadpool(
+                handler, get_job_request(self.app), job, user, report
+            )
+            job = await run_in_threadpool(
+                IngestionJobs.update_job_by_id, job.id, status="completed", progress=100
+            )
+        except Exception as e:
+            log.exception(f"Ingestion job {job.id} failed: {e}")
+            job = await run_in_threadpool(
+                IngestionJobs.update_job_by_id,
+                job.id,
+                status="failed",
+                error=get_error_message(e),
+            )
+        finally:
+            heartbeat.cancel()
+
+        if job:
+            await self.emit(job)
+
+    async def heartbeat(self, job_id: str):
+        # Keeps a running job from looking stale to recover_jobs of the other
+        # instances, however long it runs without reporting progress
+        while True:
+            await asyncio.sleep(INGESTION_QUEUE_STALE_TIMEOUT / 4)
+            await run_in_threadpool(IngestionJobs.update_job_by_id, job_id)
+
+    async def emit(self, job: IngestionJobModel):
+        for session_id in USER_POOL.get(job.user_id, []):
+            await sio.emit(
+                "chat-events",
+                {
+                    "chat_id": None,
+                    "message_id": None,
+                    "data": {
+                        "type": "ingestion:status",
+                        "data": {
+                            "job_id": job.id,
+                            "type": job.type,
+                            "status": job.status,
+                            "progress": job.progress,
+                            "error": job.error,
+                            "file_id": (job.data or {}).get("file_id"),
+                            "knowledge_id": (job.data or {}).get("knowledge_id"),
+                        },
+                    },
+                },
+                to=session_id,
+            )
+
+
+INGESTION_QUEUE = IngestionQueue(
+    manager=INGESTION_QUEUE_MANAGER,
+    redis_url=INGESTION_QUEUE_REDIS_URL,
+    workers=INGESTION_QUEUE_WORKERS,
+)
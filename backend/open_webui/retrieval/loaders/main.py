@@ -1,7 +1,14 @@
 import requests
 import logging
 import ftfy
+import os
 import sys
+import tempfile
+import threading
+
+from concurrent.futures import TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, Optional
 
 from langchain_community.document_loaders import (
     AzureAIDocumentIntelligenceLoader,
@@ -20,7 +27,15 @@ from langchain_community.document_loaders import (
     YoutubeLoader,
 )
 from langchain_core.documents import Document
-from open_webui.env import SRC_LOG_LEVELS, GLOBAL_LOG_LEVEL
+from open_webui.retrieval.loaders.pool import ExtractionPool
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    GLOBAL_LOG_LEVEL,
+    CONTENT_EXTRACTION_WORKERS,
+    CONTENT_EXTRACTION_TIMEOUT,
+    CONTENT_EXTRACTION_MEMORY_LIMIT,
+    CONTENT_EXTRACTION_PDF_PAGES_PER_TASK,
+)
 
 logging.basicConfig(stream=sys.stdout, level=GLOBAL_LOG_LEVEL)
 log = logging.getLogger(__name__)
@@ -116,6 +131,78 @@ class TikaLoader:
         else:
             raise Exception(f"Error calling Tika: {r.reason}")
 
+    def lazy_load(self) -> Iterator[Document]:
+        # Tika returns the text of the whole file in one response
+        yield from self.load()
+
+
+####################
+# Extraction process pool
+####################
+
+# Pools by name, files and web pages are extracted by separate workers so
+# that one kind of extraction can not hold up the other
+_pools: dict[str, ExtractionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_extraction_pool(name: str = "files") -> ExtractionPool:
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = ExtractionPool(
+                CONTENT_EXTRACTION_WORKERS,
+                CONTENT_EXTRACTION_TIMEOUT,
+                CONTENT_EXTRACTION_MEMORY_LIMIT,
+            )
+        return _pools[name]
+
+
+def close_extraction_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def extract_documents(
+    engine: str,
+    kwargs: dict,
+    filename: str,
+    file_content_type: str,
+    file_path: str,
+    page_range: Optional[tuple[int, int]] = None,
+) -> list[Document]:
+    # Runs inside an extraction worker process.
+    loader = Loader(engine, **kwargs)
+    if page_range is None:
+        return loader.load_in_process(filename, file_content_type, file_path)
+
+    from pypdf import PdfReader, PdfWriter
+
+    start, end = page_range
+    reader = PdfReader(file_path)
+    writer = PdfWriter()
+    for page in reader.pages[start:end]:
+        writer.add_page(page)
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        writer.write(f)
+        range_path = f.name
+
+    try:
+        docs = loader.load_in_process(filename, file_content_type, range_path)
+    finally:
+        os.remove(range_path)
+
+    for doc in docs:
+        doc.metadata["source"] = file_path
+        if "page" in doc.metadata:
+            doc.metadata["page"] += start
+        if "total_pages" in doc.metadata:
+            doc.metadata["total_pages"] = len(reader.pages)
+    return docs
+
 
 class Loader:
     def __init__(self, engine: str = "", **kwargs):
@@ -125,14 +212,80 @@ class Loader:
     def load(
         self, filename: str, file_content_type: str, file_path: str
     ) -> list[Document]:
+        return list(self.lazy_load(filename, file_content_type, file_path))
+
+    def lazy_load(
+        self, filename: str, file_content_type: str, file_path: str
+    ) -> Iterator[Document]:
         loader = self._get_loader(filename, file_content_type, file_path)
-        docs = loader.load()
 
-        return [
-            Document(
-                page_content=ftfy.fix_text(doc.page_content), metadata=doc.metadata
+        # Remote engines are I/O bound, only local extraction is moved off-thread
+        if CONTENT_EXTRACTION_WORKERS <= 0 or isinstance(
+            loader, (TikaLoader, AzureAIDocumentIntelligenceLoader)
+        ):
+            # Pages are yielded as the loader reads them
+            for doc in loader.lazy_load():
+                yield self._fix_document(doc)
+            return
+
+        page_ranges = [None]
+        if isinstance(loader, PyPDFLoader):
+            page_ranges = self._get_pdf_page_ranges(file_path)
+
+        pool = get_extraction_pool()
+        futures = [
+            pool.submit(
+                extract_documents,
+                self.engine,
+                self.kwargs,
+                filename,
+                file_content_type,
+                file_path,
+                page_range,
             )
-            for doc in docs
+            for page_range in page_ranges
+        ]
+
+        try:
+            # Page ranges are yielded in order as soon as each one is ready
+            for future in futures:
+                yield from future.result()
+        except (TimeoutError, BrokenProcessPool) as e:
+            raise Exception(
+                f"Error extracting content from {filename}: "
+                f"{'timed out' if isinstance(e, TimeoutError) else e}"
+            )
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def load_in_process(
+        self, filename: str, file_content_type: str, file_path: str
+    ) -> list[Document]:
+        loader = self._get_loader(filename, file_content_type, file_path)
+        return [self._fix_document(doc) for doc in loader.lazy_load()]
+
+    def _fix_document(self, doc: Document) -> Document:
+        return Document(
+            page_content=ftfy.fix_text(doc.page_content), metadata=doc.metadata
+        )
+
+    def _get_pdf_page_ranges(self, file_path: str) -> list:
+        try:
+            from pypdf import PdfReader
+
+            total_pages = len(PdfReader(file_path).pages)
+        except Exception as e:
+            log.debug(f"Unable to count PDF pages, extracting as a whole: {e}")
+            return [None]
+
+        pages_per_task = max(1, CONTENT_EXTRACTION_PDF_PAGES_PER_TASK)
+        if total_pages <= pages_per_task:
+            return [None]
+
+        return [
+            (start, min(start + pages_per_task, total_pages))
+            for start in range(0, total_pages, pages_per_task)
         ]
 
     def _get_loader(self, filename: str, file_content_type: str, file_path: str):
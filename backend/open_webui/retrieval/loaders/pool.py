@@ -0,0 +1,219 @@
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.connection import wait
+from typing import Callable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def _init_worker(memory_limit: int):
+    if memory_limit > 0:
+        try:
+            import resource
+
+            limit = memory_limit * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except Exception as e:
+            log.warning(f"Unable to set extraction worker memory limit: {e}")
+
+
+def _run_worker(conn, memory_limit: int):
+    # Runs the tasks sent by the pool one at a time until the pipe is closed
+    _init_worker(memory_limit)
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+
+        fn, args = task
+        # The timeout of the task starts now
+        conn.send(None)
+        try:
+            result = (True, fn(*args))
+        except Exception as e:
+            result = (False, e)
+        try:
+            conn.send(result)
+        except Exception as e:
+            # The exception (or result) of the task could not be pickled
+            conn.send((False, Exception(f"{type(e).__name__}: {e}")))
+
+
+class _Worker:
+    def __init__(self, context, memory_limit: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_run_worker, args=(child_conn, memory_limit), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.future: Optional[Future] = None
+        self.deadline = 0.0
+
+    def stop(self, terminate: bool = False):
+        if terminate:
+            self.process.terminate()
+        else:
+            try:
+                self.conn.send(None)
+            except Exception:
+                self.process.terminate()
+        self.conn.close()
+
+
+class ExtractionPool:
+    """
+    Worker processes running extraction tasks, one task per worker at a time.
+    A task times out `timeout` seconds after a worker starts it, time spent
+    queued behind other tasks does not count. Only the worker of a task that
+    times out or crashes (e.g. over its memory limit) is replaced, the tasks
+    of the other workers keep running.
+    """
+
+    def __init__(self, workers: int, timeout: float, memory_limit: int = 0):
+        self.size = max(1, workers)
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.context = multiprocessing.get_context("spawn")
+
+        self.lock = threading.Lock()
+        self.tasks: deque = deque()
+        self.workers: list[_Worker] = []
+        self.closed = False
+        self.thread: Optional[threading.Thread] = None
+        # Wakes the dispatcher when a task is submitted or the pool closed
+        self.wakeup_reader, self.wakeup_writer = multiprocessing.Pipe(duplex=False)
+
+    def submit(self, fn: Callable, *args) -> Future:
+        future = Future()
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("Extraction pool is closed")
+            self.tasks.append((future, fn, args))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._dispatch, daemon=True)
+                self.thread.start()
+        self._wakeup()
+        return future
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+        self._wakeup()
+        if self.thread is not None:
+            self.thread.join()
+
+    def _wakeup(self):
+        try:
+            self.wakeup_writer.send_bytes(b"")
+        except OSError:
+            pass
+
+    def _start_tasks(self):
+        with self.lock:
+            while self.tasks:
+                worker = next((w for w in self.workers if w.future is None), None)
+                if worker is None:
+                    if len(self.workers) >= self.size:
+                        return
+                    worker = _Worker(self.context, self.memory_limit)
+                    self.workers.append(worker)
+
+                future, fn, args = self.tasks.popleft()
+                # Skips the tasks cancelled while queued
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    worker.conn.send((fn, args))
+                except Exception as e:
+                    future.set_exception(e)
+                    continue
+                worker.future = future
+                # Set once the worker acknowledges the task
+                worker.deadline = float("inf")
+
+    def _replace(self, worker: _Worker, error: Exception):
+        # Only the worker of the failed task is terminated
+        log.warning(f"Replacing extraction worker {worker.process.pid}: {error}")
+        worker.stop(terminate=True)
+        with self.lock:
+            self.workers.remove(worker)
+        if worker.future is not None:
+            worker.future.set_exception(error)
+
+    def _dispatch(self):
+        while True:
+            with self.lock:
+                closed = self.closed
+            if closed:
+                break
+            self._start_tasks()
+
+            busy = [worker for worker in self.workers if worker.future is not None]
+            deadline = min((worker.deadline for worker in busy), default=float("inf"))
+            timeout = None
+            if deadline != float("inf"):
+                timeout = max(0, deadline - time.monotonic())
+            ready = wait(
+                [self.wakeup_reader]
+                + [worker.conn for worker in busy]
+                + [worker.process.sentinel for worker in busy],
+                timeout,
+            )
+
+            if self.wakeup_reader in ready:
+                while self.wakeup_reader.poll():
+                    self.wakeup_reader.recv_bytes()
+
+            now = time.monotonic()
+            for worker in busy:
+                if worker.conn in ready:
+                    try:
+                        message = worker.conn.recv()
+                    except (EOFError, OSError):
+                        self._replace(
+                            worker,
+                            BrokenProcessPool("Extraction worker exited unexpectedly"),
+                        )
+                        continue
+                    if message is None:
+                        worker.deadline = now + self.timeout
+                        continue
+
+                    ok, value = message
+                    future, worker.future = worker.future, None
+                    if ok:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+                elif worker.process.sentinel in ready:
+                    self._replace(
+                        worker,
+                        BrokenProcessPool("Extraction worker exited unexpectedly"),
+                    )
+                elif now >= worker.deadline:
+                    self._replace(
+                        worker,
+                        TimeoutError(f"timed out after {self.timeout}s"),
+                    )
+
+        with self.lock:
+            tasks, self.tasks = list(self.tasks), deque()
+            workers, self.workers = self.workers, []
+        for future, _, _ in tasks:
+            future.cancel()
+        for worker in workers:
+            if worker.future is not None:
+                worker.future.set_exception(RuntimeError("Extraction pool closed"))
+            worker.stop(terminate=worker.future is not None)
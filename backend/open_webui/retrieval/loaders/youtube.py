@@ -1,8 +1,13 @@
 import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 
 from typing import Any, Dict, Generator, List, Optional, Sequence, Union
 from urllib.parse import parse_qs, urlparse
 from langchain_core.documents import Document
+from open_webui.config import YOUTUBE_LOADER_CACHE_SIZE, YOUTUBE_LOADER_CACHE_TTL
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
@@ -49,6 +54,83 @@ def _parse_video_id(url: str) -> Optional[str]:
     return video_id
 
 
+class KeyLocks:
+    """
+    A lock per key, so that work on the same key runs in turn. The lock of a
+    key is dropped once nothing holds or waits for it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Lock of each key and the number of its holders and waiters
+        self.locks: dict[Any, list] = {}
+
+    @contextmanager
+    def hold(self, key):
+        with self.lock:
+            entry = self.locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self.locks[key]
+
+
+class TranscriptCache:
+    """
+    Transcripts of YouTube videos keyed by video ID and requested languages,
+    reused for `ttl` seconds. Concurrent loads of the same transcript wait
+    for the first one instead of fetching it again.
+    """
+
+    def __init__(self, ttl: int, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.key_locks = KeyLocks()
+
+    def get(self, key: tuple) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.time() - entry[0] < self.ttl:
+                self.entries.move_to_end(key)
+                return entry[1]
+            return None
+
+    def set(self, key: tuple, transcript: str):
+        with self.lock:
+            self.entries[key] = (time.time(), transcript)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def get_or_load(self, key: tuple, load) -> Optional[str]:
+        transcript = self.get(key)
+        if transcript is not None:
+            return transcript
+
+        with self.key_locks.hold(key):
+            # Loaded meanwhile by a concurrent request
+            transcript = self.get(key)
+            if transcript is None:
+                transcript = load()
+                if transcript is not None:
+                    self.set(key, transcript)
+            return transcript
+
+
+TRANSCRIPT_CACHE = (
+    TranscriptCache(YOUTUBE_LOADER_CACHE_TTL, YOUTUBE_LOADER_CACHE_SIZE)
+    if YOUTUBE_LOADER_CACHE_TTL > 0
+    else None
+)
+
+
 class YoutubeLoader:
     """Load `YouTube` video transcripts."""
 
@@ -71,6 +153,18 @@ class YoutubeLoader:
 
     def load(self) -> List[Document]:
         """Load YouTube transcripts into `Document` objects."""
+        if TRANSCRIPT_CACHE is not None:
+            transcript = TRANSCRIPT_CACHE.get_or_load(
+                (self.video_id, tuple(self.language)), self._fetch_transcript
+            )
+        else:
+            transcript = self._fetch_transcript()
+
+        if transcript is None:
+            return []
+        return [Document(page_content=transcript, metadata=self._metadata)]
+
+    def _fetch_transcript(self) -> Optional[str]:
         try:
             from youtube_transcript_api import (
                 NoTranscriptFound,
@@ -99,7 +193,7 @@ class YoutubeLoader:
             )
         except Exception as e:
             log.exception("Loading YouTube transcript failed")
-            return []
+            return None
 
         try:
             transcript = transcript_list.find_transcript(self.language)
@@ -108,10 +202,9 @@ class YoutubeLoader:
 
         transcript_pieces: List[Dict[str, Any]] = transcript.fetch()
 
-        transcript = " ".join(
+        return " ".join(
             map(
                 lambda transcript_piece: transcript_piece["text"].strip(" "),
                 transcript_pieces,
             )
         )
-        return [Document(page_content=transcript, metadata=self._metadata)]
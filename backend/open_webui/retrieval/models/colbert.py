@@ -12,6 +12,9 @@ log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
 class ColBERT:
+    # Scores are softmax-normalized over the candidate set, not per pair
+    pairwise_scores = False
+
     def __init__(self, name, **kwargs) -> None:
         log.info("ColBERT: Loading model", name)
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -6,15 +6,30 @@ from typing import Optional, Union
 import asyncio
 import requests
 import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
 
 from huggingface_hub import snapshot_download
-from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
 from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
 
-from open_webui.config import VECTOR_DB
+from open_webui.config import (
+    VECTOR_DB,
+    RAG_HYBRID_RRF_K,
+    RAG_HYBRID_BM25_INDEX_TTL,
+    RAG_EMBEDDING_CACHE_SIZE,
+    RAG_RERANKING_BATCH_SIZE,
+    RAG_RERANKING_SCORE_CACHE_SIZE,
+)
 from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
+from open_webui.retrieval.vector.generations import (
+    COLLECTION_GENERATIONS,
+    CollectionGenerations,
+)
 from open_webui.utils.misc import get_last_user_message, calculate_sha256_string
 
 from open_webui.models.users import UserModel
@@ -36,10 +51,17 @@ from langchain_core.callbacks import CallbackManagerForRetrieverRun
 from langchain_core.retrievers import BaseRetriever
 
 
+# Metadata key used to hand stored vectors from the vector search retriever to
+# the RerankCompressor, removed again before documents are returned.
+EMBEDDING_METADATA_KEY = "__embedding__"
+
+
 class VectorSearchRetriever(BaseRetriever):
     collection_name: Any
     embedding_function: Any
     top_k: int
+    # Only the cosine scoring of RerankCompressor uses the stored vectors
+    include_vectors: bool = False
 
     def _get_relevant_documents(
         self,
@@ -51,23 +73,163 @@ class VectorSearchRetriever(BaseRetriever):
             collection_name=self.collection_name,
             vectors=[self.embedding_function(query)],
             limit=self.top_k,
+            include_vectors=self.include_vectors,
         )
 
         ids = result.ids[0]
         metadatas = result.metadatas[0]
         documents = result.documents[0]
+        embeddings = result.embeddings[0] if result.embeddings else None
 
         results = []
         for idx in range(len(ids)):
+            metadata = metadatas[idx]
+            if embeddings and embeddings[idx] is not None:
+                metadata = {**metadata, EMBEDDING_METADATA_KEY: embeddings[idx]}
+
             results.append(
                 Document(
-                    metadata=metadatas[idx],
+                    metadata=metadata,
                     page_content=documents[idx],
                 )
             )
         return results
 
 
+class BM25IndexCache:
+    """
+    Per-collection BM25 retrievers for vector DBs without lexical search.
+    Entries expire after `ttl` seconds, and are rebuilt once a collection
+    they were built from is written to (by any worker with shared
+    `generations`) or, for knowledge bases of a shared collection, once
+    their files change.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        maxsize: int = 16,
+        generations: Optional[CollectionGenerations] = None,
+    ):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.generations = generations or CollectionGenerations()
+        self.indexes = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_generation(self, collection_name: str) -> Optional[tuple]:
+        get_members = getattr(VECTOR_DB_CLIENT, "get_collection_members", None)
+        members = get_members(collection_name) if get_members else [collection_name]
+        generations = self.generations.get(members)
+        if generations is None:
+            return None
+        return (tuple(members), generations)
+
+    def get(self, collection_name: str) -> Optional[BM25Retriever]:
+        # Read before the content, a write meanwhile invalidates the index
+        generation = self.get_generation(collection_name)
+        with self.lock:
+            entry = self.indexes.get(collection_name)
+            if (
+                entry is not None
+                and generation is not None
+                and entry[1] == generation
+                and time.time() - entry[0] < self.ttl
+            ):
+                self.indexes.move_to_end(collection_name)
+                return entry[2]
+
+        texts = []
+        metadatas = []
+        for page in VECTOR_DB_CLIENT.iter_get(collection_name=collection_name):
+            texts.extend(page.documents[0])
+            metadatas.extend(page.metadatas[0])
+        if not texts:
+            return None
+
+        retriever = BM25Retriever.from_texts(texts=texts, metadatas=metadatas)
+
+        if self.ttl > 0 and generation is not None:
+            with self.lock:
+                self.indexes[collection_name] = (time.time(), generation, retriever)
+                self.indexes.move_to_end(collection_name)
+                while len(self.indexes) > self.maxsize:
+                    self.indexes.popitem(last=False)
+        return retriever
+
+    def invalidate(self, collection_name: Optional[str] = None):
+        # Writes through VECTOR_DB_CLIENT are tracked already, this is for
+        # changes made to a collection some other way
+        self.generations.bump(collection_name)
+        with self.lock:
+            if collection_name is None:
+                self.indexes.clear()
+            else:
+                self.indexes.pop(collection_name, None)
+
+
+BM25_INDEX_CACHE = BM25IndexCache(
+    RAG_HYBRID_BM25_INDEX_TTL, generations=COLLECTION_GENERATIONS
+)
+
+
+class LexicalSearchRetriever(BaseRetriever):
+    collection_name: Any
+    top_k: int
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        # Prefer the vector DB's own full text search so only the top k
+        # candidates are loaded, otherwise fall back to a local BM25 index.
+        result = None
+        if hasattr(VECTOR_DB_CLIENT, "lexical_search"):
+            result = VECTOR_DB_CLIENT.lexical_search(
+                self.collection_name, query, self.top_k
+            )
+
+        if result is not None:
+            return [
+                Document(page_content=document, metadata=metadata)
+                for document, metadata in zip(result.documents[0], result.metadatas[0])
+            ]
+
+        retriever = BM25_INDEX_CACHE.get(self.collection_name)
+        if retriever is None:
+            return []
+
+        documents = retriever.vectorizer.get_top_n(
+            retriever.preprocess_func(query), retriever.docs, n=self.top_k
+        )
+        # Cached documents are shared between queries, hand out copies
+        return [
+            Document(page_content=doc.page_content, metadata=dict(doc.metadata))
+            for doc in documents
+        ]
+
+
+def reciprocal_rank_fusion(
+    results: list[list[Document]], k: int = RAG_HYBRID_RRF_K
+) -> list[Document]:
+    # Score each document by the sum of 1 / (k + rank) over the result lists
+    # it appears in, which needs no tuning across differently scaled scores.
+    scores = {}
+    documents = {}
+    for docs in results:
+        for rank, doc in enumerate(docs):
+            key = hashlib.sha256(doc.page_content.encode()).hexdigest()
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+
+            # Keep the copy carrying a stored vector for the reranker
+            if key not in documents or EMBEDDING_METADATA_KEY in doc.metadata:
+                documents[key] = doc
+
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
 def query_doc(
     collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
 ):
@@ -87,6 +249,25 @@ def query_doc(
         raise e
 
 
+async def aquery_doc(
+    collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
+):
+    try:
+        result = await VECTOR_DB_CLIENT.asearch(
+            collection_name=collection_name,
+            vectors=[query_embedding],
+            limit=k,
+        )
+
+        if result:
+            log.info(f"query_doc:result {result.ids} {result.metadatas}")
+
+        return result
+    except Exception as e:
+        log.exception(f"Error querying doc {collection_name} with limit {k}: {e}")
+        raise e
+
+
 def get_doc(collection_name: str, user: UserModel = None):
     try:
         result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
@@ -109,35 +290,32 @@ def query_doc_with_hybrid_search(
     r: float,
 ) -> dict:
     try:
-        result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
-
-        bm25_retriever = BM25Retriever.from_texts(
-            texts=result.documents[0],
-            metadatas=result.metadatas[0],
+        lexical_search_retriever = LexicalSearchRetriever(
+            collection_name=collection_name,
+            top_k=k,
         )
-        bm25_retriever.k = k
-
         vector_search_retriever = VectorSearchRetriever(
             collection_name=collection_name,
             embedding_function=embedding_function,
             top_k=k,
+            include_vectors=reranking_function is None,
         )
 
-        ensemble_retriever = EnsembleRetriever(
-            retrievers=[bm25_retriever, vector_search_retriever], weights=[0.5, 0.5]
+        documents = reciprocal_rank_fusion(
+            [
+                lexical_search_retriever.invoke(query),
+                vector_search_retriever.invoke(query),
+            ]
         )
+
         compressor = RerankCompressor(
             embedding_function=embedding_function,
             top_n=k,
             reranking_function=reranking_function,
             r_score=r,
         )
+        result = compressor.compress_documents(documents, query)
 
-        compression_retriever = ContextualCompressionRetriever(
-            base_compressor=compressor, base_retriever=ensemble_retriever
-        )
-
-        result = compression_retriever.invoke(query)
         result = {
             "distances": [[d.metadata.get("score") for d in result]],
             "documents": [[d.page_content for d in result]],
@@ -218,9 +396,14 @@ def get_all_items_from_collections(collection_names: list[str]) -> dict:
     for collection_name in collection_names:
         if collection_name:
             try:
-                result = get_doc(collection_name=collection_name)
-                if result is not None:
-                    results.append(result.model_dump())
+                # Pages are merged as they arrive instead of materializing the
+                # whole collection in one backend response
+                results.extend(
+                    page.model_dump()
+                    for page in VECTOR_DB_CLIENT.iter_get(
+                        collection_name=collection_name
+                    )
+                )
             except Exception as e:
                 log.exception(f"Error when querying the collection: {e}")
         else:
@@ -238,6 +421,21 @@ def query_collection(
     results = []
     for query in queries:
         query_embedding = embedding_function(query)
+        if hasattr(VECTOR_DB_CLIENT, "search_collections"):
+            # Collections share one physical collection, a single filtered
+            # search covers all of them
+            try:
+                result = VECTOR_DB_CLIENT.search_collections(
+                    collection_names=[name for name in collection_names if name],
+                    vectors=[query_embedding],
+                    limit=k,
+                )
+                if result is not None:
+                    results.append(result.model_dump())
+            except Exception as e:
+                log.exception(f"Error when querying the collections: {e}")
+            continue
+
         for collection_name in collection_names:
             if collection_name:
                 try:
@@ -261,6 +459,54 @@ def query_collection(
         return merge_and_sort_query_results(results, k=k, reverse=True)
 
 
+async def aquery_collection(
+    collection_names: list[str],
+    queries: list[str],
+    embedding_function,
+    k: int,
+) -> dict:
+    # Queries are embedded in threads, then every query is searched in every
+    # collection concurrently on the event loop
+    collection_names = [name for name in collection_names if name]
+    query_embeddings = await asyncio.gather(
+        *[asyncio.to_thread(embedding_function, query) for query in queries]
+    )
+
+    if hasattr(VECTOR_DB_CLIENT, "asearch_collections"):
+        searches = [
+            VECTOR_DB_CLIENT.asearch_collections(
+                collection_names=collection_names,
+                vectors=[query_embedding],
+                limit=k,
+            )
+            for query_embedding in query_embeddings
+        ]
+    else:
+        searches = [
+            aquery_doc(
+                collection_name=collection_name,
+                k=k,
+                query_embedding=query_embedding,
+            )
+            for query_embedding in query_embeddings
+            for collection_name in collection_names
+        ]
+
+    results = []
+    for result in await asyncio.gather(*searches, return_exceptions=True):
+        if isinstance(result, Exception):
+            log.exception(f"Error when querying the collection: {result}")
+        elif result is not None:
+            results.append(result.model_dump())
+
+    if VECTOR_DB == "chroma":
+        # Chroma uses unconventional cosine similarity, so we don't need to reverse the results
+        # https://docs.trychroma.com/docs/collections/configure#configuring-chroma-collections
+        return merge_and_sort_query_results(results, k=k, reverse=False)
+    else:
+        return merge_and_sort_query_results(results, k=k, reverse=True)
+
+
 def query_collection_with_hybrid_search(
     collection_names: list[str],
     queries: list[str],
@@ -302,6 +548,52 @@ def query_collection_with_hybrid_search(
         return merge_and_sort_query_results(results, k=k, reverse=True)
 
 
+class EmbeddingCache:
+    """Thread-safe LRU of chunk embeddings keyed by (embedding config, chunk hash)."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.embeddings = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key) -> Optional[list[float]]:
+        with self.lock:
+            embedding = self.embeddings.get(key)
+            if embedding is not None:
+                self.embeddings.move_to_end(key)
+            return embedding
+
+    def set(self, key, embedding: list[float]):
+        with self.lock:
+            self.embeddings[key] = embedding
+            self.embeddings.move_to_end(key)
+            while len(self.embeddings) > self.maxsize:
+                self.embeddings.popitem(last=False)
+
+
+EMBEDDING_CACHE = (
+    EmbeddingCache(RAG_EMBEDDING_CACHE_SIZE) if RAG_EMBEDDING_CACHE_SIZE > 0 else None
+)
+
+
+def embed_with_cache(
+    embedding_function, embedding_config: str, texts: list[str], user=None
+) -> list[list[float]]:
+    # Only the chunks missing from the cache are embedded
+    if EMBEDDING_CACHE is None:
+        return embedding_function(texts, user=user)
+
+    keys = [(embedding_config, calculate_sha256_string(text)) for text in texts]
+    embeddings = [EMBEDDING_CACHE.get(key) for key in keys]
+    missing = [idx for idx, embedding in enumerate(embeddings) if embedding is None]
+    if missing:
+        vectors = embedding_function([texts[idx] for idx in missing], user=user)
+        for idx, vector in zip(missing, vectors):
+            embeddings[idx] = vector
+            EMBEDDING_CACHE.set(keys[idx], vector)
+    return embeddings
+
+
 def get_embedding_function(
     embedding_engine,
     embedding_model,
@@ -649,6 +941,53 @@ from langchain_core.callbacks import Callbacks
 from langchain_core.documents import BaseDocumentCompressor, Document
 
 
+class RerankScoreCache:
+    """Thread-safe LRU of reranker scores keyed by (model, query, chunk hash)."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.scores = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key) -> Optional[float]:
+        with self.lock:
+            score = self.scores.get(key)
+            if score is not None:
+                self.scores.move_to_end(key)
+            return score
+
+    def set(self, key, score: float):
+        with self.lock:
+            self.scores[key] = score
+            self.scores.move_to_end(key)
+            while len(self.scores) > self.maxsize:
+                self.scores.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.scores.clear()
+
+
+RERANK_SCORE_CACHE = (
+    RerankScoreCache(RAG_RERANKING_SCORE_CACHE_SIZE)
+    if RAG_RERANKING_SCORE_CACHE_SIZE > 0
+    else None
+)
+
+
+def get_cosine_scores(query_embedding, document_embeddings) -> np.ndarray:
+    query = np.asarray(query_embedding, dtype=np.float32)
+    # Stored vectors may be zero padded (pgvector), trim them to the query size
+    matrix = np.asarray(
+        [embedding[: len(query)] for embedding in document_embeddings],
+        dtype=np.float32,
+    )
+
+    query = query / max(np.linalg.norm(query), 1e-12)
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1), 1e-12)[:, None]
+    return matrix @ query
+
+
 class RerankCompressor(BaseDocumentCompressor):
     embedding_function: Any
     top_n: int
@@ -665,22 +1004,37 @@ class RerankCompressor(BaseDocumentCompressor):
         query: str,
         callbacks: Optional[Callbacks] = None,
     ) -> Sequence[Document]:
+        # Always drop the stored vectors so they never leak into the results
+        document_embeddings = [
+            doc.metadata.pop(EMBEDDING_METADATA_KEY, None) for doc in documents
+        ]
+        if not documents:
+            return []
+
         reranking = self.reranking_function is not None
 
         if reranking:
-            scores = self.reranking_function.predict(
-                [(query, doc.page_content) for doc in documents]
-            )
+            scores = self.get_reranking_scores(query, documents)
         else:
-            from sentence_transformers import util
+            # Only embed the candidates that did not come with a stored vector
+            # (e.g. BM25 results)
+            missing = [
+                idx
+                for idx, embedding in enumerate(document_embeddings)
+                if embedding is None
+            ]
+            if missing:
+                embeddings = self.embedding_function(
+                    [documents[idx].page_content for idx in missing]
+                )
+                for idx, embedding in zip(missing, embeddings):
+                    document_embeddings[idx] = embedding
 
-            query_embedding = self.embedding_function(query)
-            document_embedding = self.embedding_function(
-                [doc.page_content for doc in documents]
+            scores = get_cosine_scores(
+                self.embedding_function(query), document_embeddings
             )
-            scores = util.cos_sim(query_embedding, document_embedding)[0]
 
-        docs_with_scores = list(zip(documents, scores.tolist()))
+        docs_with_scores = list(zip(documents, np.asarray(scores).tolist()))
         if self.r_score:
             docs_with_scores = [
                 (d, s) for d, s in docs_with_scores if s >= self.r_score
@@ -697,3 +1051,42 @@ class RerankCompressor(BaseDocumentCompressor):
             )
             final_results.append(doc)
         return final_results
+
+    def get_reranking_scores(
+        self, query: str, documents: Sequence[Document]
+    ) -> list[float]:
+        # Rerankers that normalize scores across the candidate set (ColBERT)
+        # must see all candidates at once and cannot be cached per pair.
+        pairwise = getattr(self.reranking_function, "pairwise_scores", True)
+        model_name = getattr(self.reranking_function, "model_name", None)
+        cache = RERANK_SCORE_CACHE if pairwise and model_name else None
+
+        scores = [None] * len(documents)
+        keys = [None] * len(documents)
+        if cache is not None:
+            for idx, doc in enumerate(documents):
+                keys[idx] = (
+                    model_name,
+                    query,
+                    hashlib.sha256(doc.page_content.encode()).hexdigest(),
+                )
+                scores[idx] = cache.get(keys[idx])
+
+        pending = [idx for idx, score in enumerate(scores) if score is None]
+        batch_size = (
+            RAG_RERANKING_BATCH_SIZE
+            if pairwise and RAG_RERANKING_BATCH_SIZE > 0
+            else len(pending)
+        )
+
+        for start in range(0, len(pending), max(batch_size, 1)):
+            batch = pending[start : start + batch_size]
+            predicted = self.reranking_function.predict(
+                [(query, documents[idx].page_content) for idx in batch]
+            )
+            for idx, score in zip(batch, np.asarray(predicted).tolist()):
+                scores[idx] = score
+                if cache is not None:
+                    cache.set(keys[idx], score)
+
+        return scores
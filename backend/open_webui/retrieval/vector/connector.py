@@ -1,22 +1,44 @@
-from open_webui.config import VECTOR_DB
+from open_webui.config import VECTOR_DB, VECTOR_DB_SHARED_COLLECTION
+from open_webui.retrieval.vector.generations import (
+    COLLECTION_GENERATIONS,
+    GenerationTrackingClient,
+)
 
-if VECTOR_DB == "milvus":
-    from open_webui.retrieval.vector.dbs.milvus import MilvusClient
 
-    VECTOR_DB_CLIENT = MilvusClient()
-elif VECTOR_DB == "qdrant":
-    from open_webui.retrieval.vector.dbs.qdrant import QdrantClient
+def get_vector_db_client(vector_db: str):
+    client = get_backend_client(vector_db)
+    if VECTOR_DB_SHARED_COLLECTION:
+        from open_webui.retrieval.vector.shared import SharedCollectionClient
 
-    VECTOR_DB_CLIENT = QdrantClient()
-elif VECTOR_DB == "opensearch":
-    from open_webui.retrieval.vector.dbs.opensearch import OpenSearchClient
+        client = SharedCollectionClient(client)
+    return GenerationTrackingClient(client, COLLECTION_GENERATIONS)
 
-    VECTOR_DB_CLIENT = OpenSearchClient()
-elif VECTOR_DB == "pgvector":
-    from open_webui.retrieval.vector.dbs.pgvector import PgvectorClient
 
-    VECTOR_DB_CLIENT = PgvectorClient()
-else:
-    from open_webui.retrieval.vector.dbs.chroma import ChromaClient
+def get_backend_client(vector_db: str):
+    if vector_db == "milvus":
+        from open_webui.retrieval.vector.dbs.milvus import MilvusClient
 
-    VECTOR_DB_CLIENT = ChromaClient()
+        return MilvusClient()
+    elif vector_db == "qdrant":
+        from open_webui.retrieval.vector.dbs.qdrant import QdrantClient
+
+        return QdrantClient()
+    elif vector_db == "opensearch":
+        from open_webui.retrieval.vector.dbs.opensearch import OpenSearchClient
+
+        return OpenSearchClient()
+    elif vector_db == "pgvector":
+        from open_webui.retrieval.vector.dbs.pgvector import PgvectorClient
+
+        return PgvectorClient()
+    elif vector_db == "local":
+        from open_webui.retrieval.vector.dbs.local import LocalVectorClient
+
+        return LocalVectorClient()
+    else:
+        from open_webui.retrieval.vector.dbs.chroma import ChromaClient
+
+        return ChromaClient()
+
+
+VECTOR_DB_CLIENT = get_vector_db_client(VECTOR_DB)
@@ -1,11 +1,17 @@
+import asyncio
 import chromadb
 import logging
 from chromadb import Settings
 from chromadb.utils.batch_utils import create_batches
 
-from typing import Optional
+from typing import Iterator, Optional
 
-from open_webui.retrieval.vector.main import VectorItem, SearchResult, GetResult
+from open_webui.retrieval.vector.main import (
+    ITER_GET_PAGE_SIZE,
+    VectorItem,
+    SearchResult,
+    GetResult,
+)
 from open_webui.config import (
     CHROMA_DATA_PATH,
     CHROMA_HTTP_HOST,
@@ -54,51 +60,147 @@ class ChromaClient:
                 database=CHROMA_DATABASE,
             )
 
+        # Collection handles by name, Chroma resolves the name again on every
+        # get_collection call (a round trip for remote servers)
+        self.collections = {}
+
+    def _get_collection(self, collection_name: str, create: bool = False):
+        collection = self.collections.get(collection_name)
+        if collection is not None:
+            return collection
+
+        if create:
+            collection = self.client.get_or_create_collection(
+                name=collection_name, metadata={"hnsw:space": "cosine"}
+            )
+        else:
+            try:
+                collection = self.client.get_collection(name=collection_name)
+            except Exception:
+                # Chroma raises when the collection does not exist
+                return None
+
+        self.collections[collection_name] = collection
+        return collection
+
+    def _run(self, collection_name: str, operation, create: bool = False):
+        # Runs `operation` on the collection, None when it does not exist. A
+        # cached handle may belong to a collection deleted (or recreated)
+        # elsewhere, it is dropped on any error and the operation retried
+        # once with a fresh one.
+        cached = collection_name in self.collections
+        collection = self._get_collection(collection_name, create=create)
+        if collection is None:
+            return None
+        try:
+            return operation(collection)
+        except Exception:
+            self.collections.pop(collection_name, None)
+            if not cached:
+                raise
+
+        collection = self._get_collection(collection_name, create=create)
+        if collection is None:
+            return None
+        return operation(collection)
+
+    def _get_where(self, filter: dict) -> dict:
+        # Metadata equality filters, a list value matches any of its elements
+        conditions = [
+            {key: {"$in": value} if isinstance(value, list) else value}
+            for key, value in filter.items()
+        ]
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
     def has_collection(self, collection_name: str) -> bool:
-        # Check if the collection exists based on the collection name.
-        collection_names = self.client.list_collections()
-        return collection_name in collection_names
+        # Check if the collection exists based on the collection name. The
+        # name is resolved again, a cached handle may be stale.
+        self.collections.pop(collection_name, None)
+        return self._get_collection(collection_name) is not None
 
     def delete_collection(self, collection_name: str):
         # Delete the collection based on the collection name.
+        self.collections.pop(collection_name, None)
         return self.client.delete_collection(name=collection_name)
 
     def search(
-        self, collection_name: str, vectors: list[list[float | int]], limit: int
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
     ) -> Optional[SearchResult]:
         # Search for the nearest neighbor items based on the vectors and return 'limit' number of results.
+        include = ["metadatas", "documents", "distances"]
+        if include_vectors:
+            include.append("embeddings")
+
         try:
-            collection = self.client.get_collection(name=collection_name)
-            if collection:
-                result = collection.query(
+            result = self._run(
+                collection_name,
+                lambda collection: collection.query(
                     query_embeddings=vectors,
                     n_results=limit,
-                )
-
+                    where=self._get_where(filter) if filter else None,
+                    include=include,
+                ),
+            )
+            if result:
                 return SearchResult(
                     **{
                         "ids": result["ids"],
                         "distances": result["distances"],
                         "documents": result["documents"],
                         "metadatas": result["metadatas"],
+                        "embeddings": (
+                            [
+                                [
+                                    (
+                                        embedding.tolist()
+                                        if hasattr(embedding, "tolist")
+                                        else embedding
+                                    )
+                                    for embedding in embeddings
+                                ]
+                                for embeddings in result["embeddings"]
+                            ]
+                            if include_vectors and result.get("embeddings") is not None
+                            else None
+                        ),
                     }
                 )
             return None
         except Exception as e:
+            log.exception(f"Error searching {collection_name}: {e}")
             return None
 
+    async def asearch(
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
+    ) -> Optional[SearchResult]:
+        # Chroma's client is blocking, searches run in a thread
+        return await asyncio.to_thread(
+            self.search, collection_name, vectors, limit, include_vectors, filter
+        )
+
     def query(
         self, collection_name: str, filter: dict, limit: Optional[int] = None
     ) -> Optional[GetResult]:
         # Query the items from the collection based on the filter.
         try:
-            collection = self.client.get_collection(name=collection_name)
-            if collection:
-                result = collection.get(
-                    where=filter,
+            result = self._run(
+                collection_name,
+                lambda collection: collection.get(
+                    where=self._get_where(filter),
                     limit=limit,
-                )
-
+                ),
+            )
+            if result:
                 return GetResult(
                     **{
                         "ids": [result["ids"]],
@@ -107,56 +209,131 @@ class ChromaClient:
                     }
                 )
             return None
-        except:
+        except Exception as e:
+            log.exception(f"Error querying {collection_name}: {e}")
             return None
 
-    def get(self, collection_name: str) -> Optional[GetResult]:
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        return await asyncio.to_thread(self.query, collection_name, filter, limit)
+
+    def get(
+        self, collection_name: str, include_vectors: bool = False
+    ) -> Optional[GetResult]:
         # Get all the items in the collection.
-        collection = self.client.get_collection(name=collection_name)
-        if collection:
-            result = collection.get()
+        include = ["metadatas", "documents"]
+        if include_vectors:
+            include.append("embeddings")
+
+        result = self._run(
+            collection_name, lambda collection: collection.get(include=include)
+        )
+        if result:
             return GetResult(
                 **{
                     "ids": [result["ids"]],
                     "documents": [result["documents"]],
                     "metadatas": [result["metadatas"]],
+                    "embeddings": (
+                        [
+                            [
+                                (
+                                    embedding.tolist()
+                                    if hasattr(embedding, "tolist")
+                                    else embedding
+                                )
+                                for embedding in result["embeddings"]
+                            ]
+                        ]
+                        if include_vectors and result.get("embeddings") is not None
+                        else None
+                    ),
                 }
             )
         return None
 
+    def iter_get(
+        self,
+        collection_name: str,
+        page_size: int = ITER_GET_PAGE_SIZE,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
+    ) -> Iterator[GetResult]:
+        # Pages of the collection's items, Chroma only pages by offset
+        include = ["metadatas", "documents"]
+        if include_vectors:
+            include.append("embeddings")
+
+        offset = 0
+        while True:
+            result = self._run(
+                collection_name,
+                lambda collection: collection.get(
+                    where=self._get_where(filter) if filter else None,
+                    limit=page_size,
+                    offset=offset,
+                    include=include,
+                ),
+            )
+            if not result or not result["ids"]:
+                break
+
+            yield GetResult(
+                ids=[result["ids"]],
+                documents=[result["documents"]],
+                metadatas=[result["metadatas"]],
+                embeddings=(
+                    [
+                        [
+                            (
+                                embedding.tolist()
+                                if hasattr(embedding, "tolist")
+                                else embedding
+                            )
+                            for embedding in result["embeddings"]
+                        ]
+                    ]
+                    if include_vectors and result.get("embeddings") is not None
+                    else None
+                ),
+            )
+            if len(result["ids"]) < page_size:
+                break
+            offset += page_size
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
-        collection = self.client.get_or_create_collection(
-            name=collection_name, metadata={"hnsw:space": "cosine"}
-        )
-
         ids = [item["id"] for item in items]
         documents = [item["text"] for item in items]
         embeddings = [item["vector"] for item in items]
         metadatas = [item["metadata"] for item in items]
 
-        for batch in create_batches(
-            api=self.client,
-            documents=documents,
-            embeddings=embeddings,
-            ids=ids,
-            metadatas=metadatas,
-        ):
-            collection.add(*batch)
+        def add(collection):
+            for batch in create_batches(
+                api=self.client,
+                documents=documents,
+                embeddings=embeddings,
+                ids=ids,
+                metadatas=metadatas,
+            ):
+                collection.add(*batch)
+
+        self._run(collection_name, add, create=True)
 
     def upsert(self, collection_name: str, items: list[VectorItem]):
         # Update the items in the collection, if the items are not present, insert them. If the collection does not exist, it will be created.
-        collection = self.client.get_or_create_collection(
-            name=collection_name, metadata={"hnsw:space": "cosine"}
-        )
-
         ids = [item["id"] for item in items]
         documents = [item["text"] for item in items]
         embeddings = [item["vector"] for item in items]
         metadatas = [item["metadata"] for item in items]
 
-        collection.upsert(
-            ids=ids, documents=documents, embeddings=embeddings, metadatas=metadatas
+        self._run(
+            collection_name,
+            lambda collection: collection.upsert(
+                ids=ids, documents=documents, embeddings=embeddings, metadatas=metadatas
+            ),
+            create=True,
         )
 
     def delete(
@@ -166,13 +343,15 @@ class ChromaClient:
         filter: Optional[dict] = None,
     ):
         # Delete the items from the collection based on the ids.
-        collection = self.client.get_collection(name=collection_name)
-        if collection:
-            if ids:
-                collection.delete(ids=ids)
-            elif filter:
-                collection.delete(where=filter)
+        if ids:
+            self._run(collection_name, lambda collection: collection.delete(ids=ids))
+        elif filter:
+            self._run(
+                collection_name,
+                lambda collection: collection.delete(where=self._get_where(filter)),
+            )
 
     def reset(self):
         # Resets the database. This will delete all collections and item entries.
+        self.collections = {}
         return self.client.reset()
@@ -0,0 +1,706 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+from typing import Iterator, Optional
+
+import numpy as np
+
+from open_webui.retrieval.vector.main import (
+    ITER_GET_PAGE_SIZE,
+    VectorItem,
+    SearchResult,
+    GetResult,
+)
+from open_webui.config import (
+    LOCAL_VECTOR_DB_PATH,
+    VECTOR_DB_PRECISION,
+    VECTOR_DB_RESCORE_OVERSAMPLING,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Component type of the scanned vector file per storage precision
+DTYPES = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "int8": np.int8,
+    "binary": np.uint8,
+}
+
+# Files kept per collection, binary collections add float16 copies that
+# re-score the candidates found on the packed sign bits
+FILE_SUFFIXES = ("vectors", "rescore")
+
+# The int8 scale of a collection is calibrated on its first batch so that this
+# quantile of the absolute components maps to 127, larger ones are clipped
+INT8_CALIBRATION_QUANTILE = 0.999
+INT8_SCALE = 127.0
+
+# Set bits of every byte value, for hamming distances between packed vectors
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+# Rows scored per matrix product, bounds the float32 working set of a search
+SEARCH_BLOCK_SIZE = 65536
+
+# SQLite limits the number of bound parameters per statement
+SQLITE_MAX_VARIABLES = 500
+
+
+def get_layout(precision: str, dimension: int) -> dict[str, tuple]:
+    # Component type and width of each file of a collection
+    if precision == "binary":
+        return {
+            "vectors": (np.uint8, (dimension + 7) // 8),
+            "rescore": (np.float16, dimension),
+        }
+    return {"vectors": (DTYPES[precision], dimension)}
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+class LocalCollection:
+    """Read view of a collection's vectors, rebuilt whenever its version changes."""
+
+    def __init__(
+        self,
+        prefix: str,
+        dimension: int,
+        precision: str,
+        scale: float,
+        rows: int,
+        version: int,
+    ):
+        self.dimension = dimension
+        self.precision = precision
+        self.scale = scale
+        self.rows = rows
+        self.version = version
+
+        self.files = {
+            suffix: (
+                np.memmap(
+                    f"{prefix}.{suffix}", dtype=dtype, mode="r", shape=(rows, width)
+                )
+                if rows > 0
+                else np.zeros((0, width), dtype=dtype)
+            )
+            for suffix, (dtype, width) in get_layout(precision, dimension).items()
+        }
+        # Rows of deleted or replaced items stay in the file until compaction
+        self.live = np.zeros(rows, dtype=bool)
+
+    def decode(self, index) -> np.ndarray:
+        # Vectors at the given rows as float32, for scoring and for results
+        if self.precision == "binary":
+            return self.files["rescore"][index].astype(np.float32)
+
+        vectors = self.files["vectors"][index].astype(np.float32)
+        if self.precision == "int8":
+            vectors /= self.scale
+        return vectors
+
+    def score(self, queries: np.ndarray, start: int, end: int) -> np.ndarray:
+        # Similarity of the queries to a block of rows, higher is closer
+        if self.precision == "binary":
+            bits = np.packbits(queries > 0, axis=1)
+            block = self.files["vectors"][start:end]
+            distances = POPCOUNT[bits[:, None, :] ^ block[None, :, :]].sum(
+                axis=2, dtype=np.float32
+            )
+            return -distances
+        return queries @ self.decode(slice(start, end)).T
+
+
+class LocalVectorClient:
+    """
+    Embedded vector store for single node deployments without a vector DB
+    service. Vectors are kept per collection in a memory-mapped file, text and
+    metadata in SQLite, and searches are exact (brute force) cosine top-k.
+    Binary collections are scanned by hamming distance and re-scored.
+    """
+
+    def __init__(
+        self, path: str = LOCAL_VECTOR_DB_PATH, precision: str = VECTOR_DB_PRECISION
+    ):
+        if precision not in DTYPES:
+            raise ValueError(
+                f"Unsupported vector precision {precision}, "
+                f"expected one of {', '.join(DTYPES)}"
+            )
+
+        self.path = path
+        self.precision = precision
+        os.makedirs(self.path, exist_ok=True)
+
+        self.lock = threading.RLock()
+        self.collections: dict[str, LocalCollection] = {}
+
+        self.conn = sqlite3.connect(
+            os.path.join(self.path, "index.sqlite3"), check_same_thread=False
+        )
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS collection ("
+                "name TEXT PRIMARY KEY, dimension INTEGER NOT NULL, "
+                "dtype TEXT NOT NULL, scale REAL NOT NULL, "
+                "rows INTEGER NOT NULL, version INTEGER NOT NULL)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunk ("
+                "collection_name TEXT NOT NULL, id TEXT NOT NULL, "
+                "row INTEGER NOT NULL, text TEXT, metadata TEXT, "
+                "PRIMARY KEY (collection_name, id))"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_chunk_row "
+                "ON chunk (collection_name, row)"
+            )
+
+    ####################
+    # Storage helpers
+    ####################
+
+    def _file_prefix(self, collection_name: str) -> str:
+        name = hashlib.sha256(collection_name.encode()).hexdigest()
+        return os.path.join(self.path, name)
+
+    def _get_info(self, collection_name: str) -> Optional[tuple]:
+        return self.conn.execute(
+            "SELECT dimension, dtype, scale, rows, version FROM collection "
+            "WHERE name = ?",
+            (collection_name,),
+        ).fetchone()
+
+    def _load(self, collection_name: str) -> Optional[LocalCollection]:
+        with self.lock:
+            info = self._get_info(collection_name)
+            if info is None:
+                self.collections.pop(collection_name, None)
+                return None
+
+            dimension, precision, scale, rows, version = info
+            collection = self.collections.get(collection_name)
+            if collection is not None and collection.version == version:
+                return collection
+
+            collection = LocalCollection(
+                self._file_prefix(collection_name),
+                dimension,
+                precision,
+                scale,
+                rows,
+                version,
+            )
+            live_rows = [
+                row
+                for (row,) in self.conn.execute(
+                    "SELECT row FROM chunk WHERE collection_name = ?",
+                    (collection_name,),
+                )
+            ]
+            collection.live[live_rows] = True
+
+            self.collections[collection_name] = collection
+            return collection
+
+    def _open_for_write(
+        self, collection_name: str, dimension: int, precision: str, rows: int
+    ) -> dict[str, np.memmap]:
+        # Grow the files geometrically so appends do not rewrite them every time
+        prefix = self._file_prefix(collection_name)
+        files = {}
+        for suffix, (dtype, width) in get_layout(precision, dimension).items():
+            path = f"{prefix}.{suffix}"
+            row_size = width * np.dtype(dtype).itemsize
+            capacity = os.path.getsize(path) // row_size if os.path.exists(path) else 0
+
+            if rows > capacity:
+                capacity = max(rows, capacity * 2, 1024)
+                with open(path, "ab") as f:
+                    f.truncate(capacity * row_size)
+
+            files[suffix] = np.memmap(
+                path, dtype=dtype, mode="r+", shape=(capacity, width)
+            )
+        return files
+
+    def _calibrate(self, vectors: np.ndarray) -> float:
+        bound = float(np.quantile(np.abs(vectors), INT8_CALIBRATION_QUANTILE))
+        return INT8_SCALE / max(bound, 1e-6)
+
+    def _encode(
+        self, vectors: np.ndarray, precision: str, scale: float
+    ) -> dict[str, np.ndarray]:
+        # Normalized vectors to the contents of each file of the collection
+        if precision == "binary":
+            return {
+                "vectors": np.packbits(vectors > 0, axis=1),
+                "rescore": vectors.astype(np.float16),
+            }
+        if precision == "int8":
+            return {
+                "vectors": np.clip(
+                    np.round(vectors * scale), -INT8_SCALE, INT8_SCALE
+                ).astype(np.int8)
+            }
+        return {"vectors": vectors.astype(DTYPES[precision])}
+
+    def _filter_clause(self, filter: dict) -> tuple[str, list]:
+        clauses = []
+        params = []
+        for key, value in filter.items():
+            # A list value matches any of its elements
+            values = value if isinstance(value, list) else [value]
+            clauses.append(
+                f"json_extract(metadata, ?) IN ({','.join('?' * len(values))})"
+            )
+            params.extend([f'$."{key}"', *values])
+        return " AND ".join(clauses), params
+
+    def _to_get_result(
+        self, rows: list, collection: Optional[LocalCollection] = None
+    ) -> GetResult:
+        # Rows are (id, text, metadata, row), vectors are decoded when the
+        # collection is given
+        return GetResult(
+            ids=[[row[0] for row in rows]],
+            documents=[[row[1] for row in rows]],
+            metadatas=[[json.loads(row[2]) for row in rows]],
+            embeddings=(
+                [[collection.decode(row[3]).tolist() for row in rows]]
+                if collection is not None
+                else None
+            ),
+        )
+
+    def _compact(self, collection_name: str):
+        # Rewrite the vector files without the rows of deleted items
+        dimension, precision, _, rows, version = self._get_info(collection_name)
+        live_rows = [
+            row
+            for (row,) in self.conn.execute(
+                "SELECT row FROM chunk WHERE collection_name = ? ORDER BY row",
+                (collection_name,),
+            )
+        ]
+
+        prefix = self._file_prefix(collection_name)
+        layout = get_layout(precision, dimension)
+        for suffix, (dtype, width) in layout.items():
+            path = f"{prefix}.{suffix}"
+            source = np.memmap(path, dtype=dtype, mode="r", shape=(rows, width))
+            compacted = np.memmap(
+                f"{path}.tmp",
+                dtype=dtype,
+                mode="w+",
+                shape=(max(len(live_rows), 1), width),
+            )
+            for start in range(0, len(live_rows), SEARCH_BLOCK_SIZE):
+                block = live_rows[start : start + SEARCH_BLOCK_SIZE]
+                compacted[start : start + len(block)] = source[block]
+            compacted.flush()
+            del source, compacted
+
+        self.conn.executemany(
+            "UPDATE chunk SET row = ? WHERE collection_name = ? AND row = ?",
+            [(new, collection_name, old) for new, old in enumerate(live_rows)],
+        )
+        self.conn.execute(
+            "UPDATE collection SET rows = ?, version = version + 1 WHERE name = ?",
+            (len(live_rows), collection_name),
+        )
+        # Searches still holding the old mapping keep reading the old inode
+        for suffix in layout:
+            os.replace(f"{prefix}.{suffix}.tmp", f"{prefix}.{suffix}")
+        log.info(
+            f"Compacted collection {collection_name} "
+            f"from {rows} to {len(live_rows)} rows"
+        )
+
+    ####################
+    # Client interface
+    ####################
+
+    def has_collection(self, collection_name: str) -> bool:
+        # Check if the collection exists based on the collection name.
+        return self._get_info(collection_name) is not None
+
+    def delete_collection(self, collection_name: str):
+        # Delete the collection based on the collection name.
+        with self.lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM chunk WHERE collection_name = ?", (collection_name,)
+            )
+            self.conn.execute(
+                "DELETE FROM collection WHERE name = ?", (collection_name,)
+            )
+            self.collections.pop(collection_name, None)
+
+            prefix = self._file_prefix(collection_name)
+            for suffix in FILE_SUFFIXES:
+                if os.path.exists(f"{prefix}.{suffix}"):
+                    os.remove(f"{prefix}.{suffix}")
+
+    def search(
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
+    ) -> Optional[SearchResult]:
+        # Search for the nearest neighbor items based on the vectors and return 'limit' number of results.
+        try:
+            collection = self._load(collection_name)
+            if collection is None:
+                return None
+
+            live = collection.live
+            if filter:
+                # Rows outside the filter are masked out of the scan
+                clause, params = self._filter_clause(filter)
+                live = np.zeros_like(collection.live)
+                live[
+                    [
+                        row
+                        for (row,) in self.conn.execute(
+                            "SELECT row FROM chunk WHERE collection_name = ? "
+                            f"AND {clause}",
+                            [collection_name, *params],
+                        )
+                    ]
+                ] = True
+
+            queries = normalize(np.asarray(vectors, dtype=np.float32))
+            num_queries = len(queries)
+
+            # Binary scans keep more candidates for the re-scoring pass
+            candidates = limit
+            if collection.precision == "binary":
+                candidates = max(
+                    limit, math.ceil(limit * VECTOR_DB_RESCORE_OVERSAMPLING)
+                )
+
+            # Running top-k per query, merged block by block so memory stays
+            # bounded by the block size rather than the collection size
+            best_scores = np.empty((num_queries, 0), dtype=np.float32)
+            best_rows = np.empty((num_queries, 0), dtype=np.int64)
+
+            for start in range(0, collection.rows, SEARCH_BLOCK_SIZE):
+                end = min(start + SEARCH_BLOCK_SIZE, collection.rows)
+                block_live = live[start:end]
+                if not block_live.any():
+                    continue
+
+                scores = collection.score(queries, start, end)
+                scores[:, ~block_live] = -np.inf
+
+                scores = np.concatenate([best_scores, scores], axis=1)
+                block_rows = np.broadcast_to(
+                    np.arange(start, end), (num_queries, end - start)
+                )
+                rows = np.concatenate([best_rows, block_rows], axis=1)
+
+                if scores.shape[1] > candidates:
+                    top = np.argpartition(-scores, candidates - 1, axis=1)[
+                        :, :candidates
+                    ]
+                    scores = np.take_along_axis(scores, top, axis=1)
+                    rows = np.take_along_axis(rows, top, axis=1)
+
+                best_scores, best_rows = scores, rows
+
+            if collection.precision == "binary":
+                rescored = np.full(best_scores.shape, -np.inf, dtype=np.float32)
+                for qid in range(num_queries):
+                    found = np.isfinite(best_scores[qid])
+                    rescored[qid, found] = (
+                        collection.decode(best_rows[qid, found]) @ queries[qid]
+                    )
+                best_scores = rescored
+
+            order = np.argsort(-best_scores, axis=1)[:, :limit]
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+            best_rows = np.take_along_axis(best_rows, order, axis=1)
+
+            matched_rows = {
+                int(row)
+                for scores, rows in zip(best_scores, best_rows)
+                for score, row in zip(scores, rows)
+                if np.isfinite(score)
+            }
+            records = {}
+            matched_rows = list(matched_rows)
+            for start in range(0, len(matched_rows), SQLITE_MAX_VARIABLES):
+                batch = matched_rows[start : start + SQLITE_MAX_VARIABLES]
+                for row, id, text, metadata in self.conn.execute(
+                    "SELECT row, id, text, metadata FROM chunk WHERE "
+                    f"collection_name = ? AND row IN ({','.join('?' * len(batch))})",
+                    [collection_name, *batch],
+                ):
+                    records[row] = (id, text, json.loads(metadata))
+
+            ids = [[] for _ in range(num_queries)]
+            distances = [[] for _ in range(num_queries)]
+            documents = [[] for _ in range(num_queries)]
+            metadatas = [[] for _ in range(num_queries)]
+            embeddings = [[] for _ in range(num_queries)]
+
+            for qid in range(num_queries):
+                for score, row in zip(best_scores[qid], best_rows[qid]):
+                    record = records.get(int(row))
+                    if not np.isfinite(score) or record is None:
+                        continue
+
+                    ids[qid].append(record[0])
+                    distances[qid].append(float(score))
+                    documents[qid].append(record[1])
+                    metadatas[qid].append(record[2])
+                    if include_vectors:
+                        embeddings[qid].append(collection.decode(int(row)).tolist())
+
+            return SearchResult(
+                ids=ids,
+                distances=distances,
+                documents=documents,
+                metadatas=metadatas,
+                embeddings=embeddings if include_vectors else None,
+            )
+        except Exception as e:
+            log.exception(f"Error during search: {e}")
+            return None
+
+    async def asearch(
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
+    ) -> Optional[SearchResult]:
+        # Searches are CPU bound numpy scans, run in a thread
+        return await asyncio.to_thread(
+            self.search, collection_name, vectors, limit, include_vectors, filter
+        )
+
+    def query(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        # Query the items from the collection based on the filter.
+        if not self.has_collection(collection_name):
+            return None
+
+        clause, params = self._filter_clause(filter)
+        sql = "SELECT id, text, metadata, row FROM chunk WHERE collection_name = ?"
+        if clause:
+            sql += f" AND {clause}"
+        sql += " ORDER BY row"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+
+        return self._to_get_result(
+            self.conn.execute(sql, [collection_name, *params]).fetchall()
+        )
+
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        return await asyncio.to_thread(self.query, collection_name, filter, limit)
+
+    def get(
+        self, collection_name: str, include_vectors: bool = False
+    ) -> Optional[GetResult]:
+        # Get all the items in the collection.
+        if not include_vectors:
+            return self.query(collection_name, filter={})
+
+        with self.lock:
+            collection = self._load(collection_name)
+            if collection is None:
+                return None
+
+            rows = self.conn.execute(
+                "SELECT id, text, metadata, row FROM chunk "
+                "WHERE collection_name = ? ORDER BY row",
+                (collection_name,),
+            ).fetchall()
+        return self._to_get_result(rows, collection)
+
+    def iter_get(
+        self,
+        collection_name: str,
+        page_size: int = ITER_GET_PAGE_SIZE,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
+    ) -> Iterator[GetResult]:
+        # Pages of the collection's items, keyed on the row so that every
+        # page is an index range scan
+        clause, params = self._filter_clause(filter or {})
+        sql = (
+            "SELECT id, text, metadata, row FROM chunk "
+            "WHERE collection_name = ? AND row > ?"
+        )
+        if clause:
+            sql += f" AND {clause}"
+        sql += f" ORDER BY row LIMIT {int(page_size)}"
+
+        last_row = -1
+        while True:
+            with self.lock:
+                collection = self._load(collection_name)
+                if collection is None:
+                    return
+
+                rows = self.conn.execute(
+                    sql, [collection_name, last_row, *params]
+                ).fetchall()
+                if not rows:
+                    return
+                get_result = self._to_get_result(
+                    rows, collection if include_vectors else None
+                )
+
+            yield get_result
+            last_row = rows[-1][3]
+
+    def insert(self, collection_name: str, items: list[VectorItem]):
+        # Insert the items into the collection, if the collection does not exist, it will be created.
+        self.upsert(collection_name, items)
+
+    def upsert(self, collection_name: str, items: list[VectorItem]):
+        # Update the items in the collection, if the items are not present, insert them. If the collection does not exist, it will be created.
+        if not items:
+            return
+
+        vectors = normalize(
+            np.asarray([item["vector"] for item in items], dtype=np.float32)
+        )
+
+        with self.lock, self.conn:
+            info = self._get_info(collection_name)
+            if info is None:
+                dimension, precision, rows = vectors.shape[1], self.precision, 0
+                scale = self._calibrate(vectors) if precision == "int8" else INT8_SCALE
+                self.conn.execute(
+                    "INSERT INTO collection "
+                    "(name, dimension, dtype, scale, rows, version) "
+                    "VALUES (?, ?, ?, ?, 0, 0)",
+                    (collection_name, dimension, precision, scale),
+                )
+            else:
+                dimension, precision, scale, rows, _ = info
+                if vectors.shape[1] != dimension:
+                    raise ValueError(
+                        f"Vector dimension {vectors.shape[1]} does not match "
+                        f"collection {collection_name} dimension {dimension}"
+                    )
+
+            # Existing items are overwritten in place, new ones appended
+            item_ids = [item["id"] for item in items]
+            existing = {}
+            for start in range(0, len(item_ids), SQLITE_MAX_VARIABLES):
+                batch = item_ids[start : start + SQLITE_MAX_VARIABLES]
+                existing.update(
+                    self.conn.execute(
+                        "SELECT id, row FROM chunk WHERE collection_name = ? "
+                        f"AND id IN ({','.join('?' * len(batch))})",
+                        [collection_name, *batch],
+                    ).fetchall()
+                )
+
+            item_rows = []
+            for item_id in item_ids:
+                if item_id not in existing:
+                    existing[item_id] = rows
+                    rows += 1
+                item_rows.append(existing[item_id])
+
+            files = self._open_for_write(collection_name, dimension, precision, rows)
+            for suffix, encoded in self._encode(vectors, precision, scale).items():
+                files[suffix][item_rows] = encoded
+                files[suffix].flush()
+            del files
+
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO chunk "
+                "(collection_name, id, row, text, metadata) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        collection_name,
+                        item["id"],
+                        row,
+                        item["text"],
+                        json.dumps(item["metadata"], default=str),
+                    )
+                    for item, row in zip(items, item_rows)
+                ],
+            )
+            self.conn.execute(
+                "UPDATE collection SET rows = ?, version = version + 1 WHERE name = ?",
+                (rows, collection_name),
+            )
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        # Delete the items from the collection based on the ids.
+        with self.lock, self.conn:
+            info = self._get_info(collection_name)
+            if info is None:
+                return
+
+            if ids:
+                for start in range(0, len(ids), SQLITE_MAX_VARIABLES):
+                    batch = ids[start : start + SQLITE_MAX_VARIABLES]
+                    self.conn.execute(
+                        "DELETE FROM chunk WHERE collection_name = ? "
+                        f"AND id IN ({','.join('?' * len(batch))})",
+                        [collection_name, *batch],
+                    )
+            elif filter:
+                clause, params = self._filter_clause(filter)
+                self.conn.execute(
+                    f"DELETE FROM chunk WHERE collection_name = ? AND {clause}",
+                    [collection_name, *params],
+                )
+            else:
+                return
+
+            self.conn.execute(
+                "UPDATE collection SET version = version + 1 WHERE name = ?",
+                (collection_name,),
+            )
+
+            (live,) = self.conn.execute(
+                "SELECT COUNT(*) FROM chunk WHERE collection_name = ?",
+                (collection_name,),
+            ).fetchone()
+            if info[3] > 1024 and live < info[3] // 2:
+                self._compact(collection_name)
+
+    def reset(self):
+        # Resets the database. This will delete all collections and item entries.
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM chunk")
+            self.conn.execute("DELETE FROM collection")
+            self.collections = {}
+
+            for name in os.listdir(self.path):
+                suffix = name.removesuffix(".tmp").rsplit(".", 1)[-1]
+                if suffix in FILE_SUFFIXES:
+                    os.remove(os.path.join(self.path, name))
@@ -1,14 +1,22 @@
 from pymilvus import MilvusClient as Client
-from pymilvus import FieldSchema, DataType
+from pymilvus import Collection, FieldSchema, DataType, Function, FunctionType
+import asyncio
 import json
 import logging
-from typing import Optional
+from typing import Iterator, Optional
 
-from open_webui.retrieval.vector.main import VectorItem, SearchResult, GetResult
+from open_webui.retrieval.vector.main import (
+    ITER_GET_PAGE_SIZE,
+    VectorItem,
+    SearchResult,
+    GetResult,
+)
 from open_webui.config import (
     MILVUS_URI,
     MILVUS_DB,
     MILVUS_TOKEN,
+    MILVUS_ENABLE_BM25,
+    VECTOR_DB_PRECISION,
 )
 from open_webui.env import SRC_LOG_LEVELS
 
@@ -16,9 +24,23 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
+# Milvus quantizes float vectors in the index only, with IVF_SQ8 as its int8
+# scalar quantization. It has no binary or float16 index for float vectors.
+QUANTIZED_INDEX_PARAMS = {
+    "index_type": "IVF_SQ8",
+    "metric_type": "COSINE",
+    "params": {"nlist": 128},
+}
+QUANTIZED_SEARCH_PARAMS = {"metric_type": "COSINE", "params": {"nprobe": 16}}
+
+
 class MilvusClient:
     def __init__(self):
         self.collection_prefix = "open_webui"
+        if VECTOR_DB_PRECISION == "binary":
+            log.warning("Milvus has no binary quantization, using IVF_SQ8 (int8).")
+        elif VECTOR_DB_PRECISION == "float16":
+            log.warning("Milvus has no float16 index, using HNSW on float32.")
         if MILVUS_TOKEN is None:
             self.client = Client(uri=MILVUS_URI, database=MILVUS_DB)
         else:
@@ -50,28 +72,34 @@ class MilvusClient:
             }
         )
 
-    def _result_to_search_result(self, result) -> SearchResult:
+    def _result_to_search_result(
+        self, result, include_vectors: bool = False
+    ) -> SearchResult:
         ids = []
         distances = []
         documents = []
         metadatas = []
+        embeddings = []
 
         for match in result:
             _ids = []
             _distances = []
             _documents = []
             _metadatas = []
+            _embeddings = []
 
             for item in match:
                 _ids.append(item.get("id"))
                 _distances.append(item.get("distance"))
                 _documents.append(item.get("entity", {}).get("data", {}).get("text"))
                 _metadatas.append(item.get("entity", {}).get("metadata"))
+                _embeddings.append(item.get("entity", {}).get("vector"))
 
             ids.append(_ids)
             distances.append(_distances)
             documents.append(_documents)
             metadatas.append(_metadatas)
+            embeddings.append(_embeddings)
 
         return SearchResult(
             **{
@@ -79,6 +107,7 @@ class MilvusClient:
                 "distances": distances,
                 "documents": documents,
                 "metadatas": metadatas,
+                "embeddings": embeddings if include_vectors else None,
             }
         )
 
@@ -105,12 +134,39 @@ class MilvusClient:
         )
 
         index_params = self.client.prepare_index_params()
-        index_params.add_index(
-            field_name="vector",
-            index_type="HNSW",
-            metric_type="COSINE",
-            params={"M": 16, "efConstruction": 100},
-        )
+        if VECTOR_DB_PRECISION in ["int8", "binary"]:
+            index_params.add_index(field_name="vector", **QUANTIZED_INDEX_PARAMS)
+        else:
+            index_params.add_index(
+                field_name="vector",
+                index_type="HNSW",
+                metric_type="COSINE",
+                params={"M": 16, "efConstruction": 100},
+            )
+
+        if MILVUS_ENABLE_BM25:
+            # Full text search: Milvus derives a BM25 sparse vector from the
+            # analyzed "text" field on insert, used by `lexical_search`.
+            schema.add_field(
+                field_name="text",
+                datatype=DataType.VARCHAR,
+                max_length=65535,
+                enable_analyzer=True,
+            )
+            schema.add_field(field_name="sparse", datatype=DataType.SPARSE_FLOAT_VECTOR)
+            schema.add_function(
+                Function(
+                    name="text_bm25",
+                    input_field_names=["text"],
+                    output_field_names=["sparse"],
+                    function_type=FunctionType.BM25,
+                )
+            )
+            index_params.add_index(
+                field_name="sparse",
+                index_type="SPARSE_INVERTED_INDEX",
+                metric_type="BM25",
+            )
 
         self.client.create_collection(
             collection_name=f"{self.collection_prefix}_{collection_name}",
@@ -118,6 +174,41 @@ class MilvusClient:
             index_params=index_params,
         )
 
+    def _item_to_entity(self, item: VectorItem) -> dict:
+        entity = {
+            "id": item["id"],
+            "vector": item["vector"],
+            "data": {"text": item["text"]},
+            "metadata": item["metadata"],
+        }
+        if MILVUS_ENABLE_BM25:
+            # VARCHAR lengths are limited to 65535 bytes
+            entity["text"] = (
+                item["text"].encode("utf-8")[:65535].decode("utf-8", errors="ignore")
+            )
+        return entity
+
+    def _get_filter_string(self, filter: dict) -> str:
+        # Metadata equality filters, a list value matches any of its elements
+        return " && ".join(
+            [
+                (
+                    f'metadata["{key}"] in {json.dumps(value)}'
+                    if isinstance(value, list)
+                    else f'metadata["{key}"] == {json.dumps(value)}'
+                )
+                for key, value in filter.items()
+            ]
+        )
+
+    def _has_sparse_field(self, collection_name: str) -> bool:
+        description = self.client.describe_collection(
+            collection_name=f"{self.collection_prefix}_{collection_name}"
+        )
+        return any(
+            field.get("name") == "sparse" for field in description.get("fields", [])
+        )
+
     def has_collection(self, collection_name: str) -> bool:
         # Check if the collection exists based on the collection name.
         collection_name = collection_name.replace("-", "_")
@@ -133,7 +224,12 @@ class MilvusClient:
         )
 
     def search(
-        self, collection_name: str, vectors: list[list[float | int]], limit: int
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
     ) -> Optional[SearchResult]:
         # Search for the nearest neighbor items based on the vectors and return 'limit' number of results.
         collection_name = collection_name.replace("-", "_")
@@ -141,7 +237,52 @@ class MilvusClient:
             collection_name=f"{self.collection_prefix}_{collection_name}",
             data=vectors,
             limit=limit,
+            filter=self._get_filter_string(filter) if filter else "",
+            output_fields=(
+                ["data", "metadata", "vector"]
+                if include_vectors
+                else ["data", "metadata"]
+            ),
+            search_params=(
+                QUANTIZED_SEARCH_PARAMS
+                if VECTOR_DB_PRECISION in ["int8", "binary"]
+                else None
+            ),
+        )
+
+        return self._result_to_search_result(result, include_vectors)
+
+    async def asearch(
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
+    ) -> Optional[SearchResult]:
+        # pymilvus has no async client in this version, searches run in a thread
+        return await asyncio.to_thread(
+            self.search, collection_name, vectors, limit, include_vectors, filter
+        )
+
+    def lexical_search(
+        self, collection_name: str, query: str, limit: int
+    ) -> Optional[SearchResult]:
+        # BM25 full text search, only available on collections created with
+        # MILVUS_ENABLE_BM25. Returns None so callers can fall back otherwise.
+        collection_name = collection_name.replace("-", "_")
+        if not self.has_collection(collection_name) or not self._has_sparse_field(
+            collection_name
+        ):
+            return None
+
+        result = self.client.search(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            data=[query],
+            anns_field="sparse",
+            limit=limit,
             output_fields=["data", "metadata"],
+            search_params={"metric_type": "BM25"},
         )
 
         return self._result_to_search_result(result)
@@ -152,12 +293,7 @@ class MilvusClient:
         if not self.has_collection(collection_name):
             return None
 
-        filter_string = " && ".join(
-            [
-                f'metadata["{key}"] == {json.dumps(value)}'
-                for key, value in filter.items()
-            ]
-        )
+        filter_string = self._get_filter_string(filter)
 
         max_limit = 16383  # The maximum number of records per request
         all_results = []
@@ -207,14 +343,66 @@ class MilvusClient:
             )
             return None
 
-    def get(self, collection_name: str) -> Optional[GetResult]:
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        return await asyncio.to_thread(self.query, collection_name, filter, limit)
+
+    def get(
+        self, collection_name: str, include_vectors: bool = False
+    ) -> Optional[GetResult]:
         # Get all the items in the collection.
         collection_name = collection_name.replace("-", "_")
         result = self.client.query(
             collection_name=f"{self.collection_prefix}_{collection_name}",
             filter='id != ""',
+            **(
+                {"output_fields": ["data", "metadata", "vector"]}
+                if include_vectors
+                else {}
+            ),
         )
-        return self._result_to_get_result([result])
+        get_result = self._result_to_get_result([result])
+        if include_vectors:
+            get_result.embeddings = [[item.get("vector") for item in result]]
+        return get_result
+
+    def iter_get(
+        self,
+        collection_name: str,
+        page_size: int = ITER_GET_PAGE_SIZE,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
+    ) -> Iterator[GetResult]:
+        # Pages of the collection's items, read with a server side query
+        # iterator instead of a single query capped at 16384 items
+        collection_name = collection_name.replace("-", "_")
+        if not self.has_collection(collection_name):
+            return
+
+        iterator = Collection(
+            f"{self.collection_prefix}_{collection_name}", using=self.client._using
+        ).query_iterator(
+            batch_size=page_size,
+            expr=self._get_filter_string(filter) if filter else 'id != ""',
+            output_fields=(
+                ["id", "data", "metadata", "vector"]
+                if include_vectors
+                else ["id", "data", "metadata"]
+            ),
+        )
+        try:
+            while True:
+                page = iterator.next()
+                if not page:
+                    break
+
+                get_result = self._result_to_get_result([page])
+                if include_vectors:
+                    get_result.embeddings = [[item.get("vector") for item in page]]
+                yield get_result
+        finally:
+            iterator.close()
 
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
@@ -228,15 +416,7 @@ class MilvusClient:
 
         return self.client.insert(
             collection_name=f"{self.collection_prefix}_{collection_name}",
-            data=[
-                {
-                    "id": item["id"],
-                    "vector": item["vector"],
-                    "data": {"text": item["text"]},
-                    "metadata": item["metadata"],
-                }
-                for item in items
-            ],
+            data=[self._item_to_entity(item) for item in items],
         )
 
     def upsert(self, collection_name: str, items: list[VectorItem]):
@@ -251,15 +431,7 @@ class MilvusClient:
 
         return self.client.upsert(
             collection_name=f"{self.collection_prefix}_{collection_name}",
-            data=[
-                {
-                    "id": item["id"],
-                    "vector": item["vector"],
-                    "data": {"text": item["text"]},
-                    "metadata": item["metadata"],
-                }
-                for item in items
-            ],
+            data=[self._item_to_entity(item) for item in items],
         )
 
     def delete(
@@ -276,17 +448,9 @@ class MilvusClient:
                 ids=ids,
             )
         elif filter:
-            # Convert the filter dictionary to a string using JSON_CONTAINS.
-            filter_string = " && ".join(
-                [
-                    f'metadata["{key}"] == {json.dumps(value)}'
-                    for key, value in filter.items()
-                ]
-            )
-
             return self.client.delete(
                 collection_name=f"{self.collection_prefix}_{collection_name}",
-                filter=filter_string,
+                filter=self._get_filter_string(filter),
             )
 
     def reset(self):
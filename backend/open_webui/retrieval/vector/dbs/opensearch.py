@@ -1,7 +1,12 @@
-from opensearchpy import OpenSearch
-from typing import Optional
-
-from open_webui.retrieval.vector.main import VectorItem, SearchResult, GetResult
+from opensearchpy import AsyncOpenSearch, OpenSearch
+from typing import Iterator, Optional
+
+from open_webui.retrieval.vector.main import (
+    ITER_GET_PAGE_SIZE,
+    VectorItem,
+    SearchResult,
+    GetResult,
+)
 from open_webui.config import (
     OPENSEARCH_URI,
     OPENSEARCH_SSL,
@@ -20,33 +25,54 @@ class OpenSearchClient:
             verify_certs=OPENSEARCH_CERT_VERIFY,
             http_auth=(OPENSEARCH_USERNAME, OPENSEARCH_PASSWORD),
         )
+        self.aclient = AsyncOpenSearch(
+            hosts=[OPENSEARCH_URI],
+            use_ssl=OPENSEARCH_SSL,
+            verify_certs=OPENSEARCH_CERT_VERIFY,
+            http_auth=(OPENSEARCH_USERNAME, OPENSEARCH_PASSWORD),
+        )
 
-    def _result_to_get_result(self, result) -> GetResult:
+    def _result_to_get_result(self, result, include_vectors: bool = False) -> GetResult:
         ids = []
         documents = []
         metadatas = []
+        embeddings = []
 
         for hit in result["hits"]["hits"]:
             ids.append(hit["_id"])
             documents.append(hit["_source"].get("text"))
             metadatas.append(hit["_source"].get("metadata"))
+            embeddings.append(hit["_source"].get("vector"))
 
-        return GetResult(ids=ids, documents=documents, metadatas=metadatas)
+        return GetResult(
+            ids=[ids],
+            documents=[documents],
+            metadatas=[metadatas],
+            embeddings=[embeddings] if include_vectors else None,
+        )
 
-    def _result_to_search_result(self, result) -> SearchResult:
+    def _result_to_search_result(
+        self, result, include_vectors: bool = False
+    ) -> SearchResult:
         ids = []
         distances = []
         documents = []
         metadatas = []
+        embeddings = []
 
         for hit in result["hits"]["hits"]:
             ids.append(hit["_id"])
             distances.append(hit["_score"])
             documents.append(hit["_source"].get("text"))
             metadatas.append(hit["_source"].get("metadata"))
+            embeddings.append(hit["_source"].get("vector"))
 
         return SearchResult(
-            ids=ids, distances=distances, documents=documents, metadatas=metadatas
+            ids=[ids],
+            distances=[distances],
+            documents=[documents],
+            metadatas=[metadatas],
+            embeddings=[embeddings] if include_vectors else None,
         )
 
     def _create_index(self, index_name: str, dimension: int):
@@ -74,6 +100,18 @@ class OpenSearchClient:
         }
         self.client.indices.create(index=f"{self.index_prefix}_{index_name}", body=body)
 
+    def _get_filter_clauses(self, filter: dict) -> list[dict]:
+        # Metadata equality filters, a list value matches any of its elements.
+        # Strings are dynamically mapped as text, matched on their keyword field.
+        clauses = []
+        for field, value in filter.items():
+            values = value if isinstance(value, list) else [value]
+            path = f"metadata.{field}"
+            if all(isinstance(item, str) for item in values):
+                path = f"{path}.keyword"
+            clauses.append({"terms": {path: values}})
+        return clauses
+
     def _create_batches(self, items: list[VectorItem], batch_size=100):
         for i in range(0, len(items), batch_size):
             yield items[i : i + batch_size]
@@ -89,14 +127,56 @@ class OpenSearchClient:
         self.client.indices.delete(index=f"{self.index_prefix}_{index_name}")
 
     def search(
-        self, index_name: str, vectors: list[list[float]], limit: int
+        self,
+        index_name: str,
+        vectors: list[list[float]],
+        limit: int,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
     ) -> Optional[SearchResult]:
-        query = {
+        result = self.client.search(
+            index=f"{self.index_prefix}_{index_name}",
+            body=self._get_search_body(vectors, limit, include_vectors, filter),
+        )
+
+        return self._result_to_search_result(result, include_vectors)
+
+    async def asearch(
+        self,
+        index_name: str,
+        vectors: list[list[float]],
+        limit: int,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
+    ) -> Optional[SearchResult]:
+        result = await self.aclient.search(
+            index=f"{self.index_prefix}_{index_name}",
+            body=self._get_search_body(vectors, limit, include_vectors, filter),
+        )
+
+        return self._result_to_search_result(result, include_vectors)
+
+    def _get_search_body(
+        self,
+        vectors: list[list[float]],
+        limit: int,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
+    ) -> dict:
+        return {
             "size": limit,
-            "_source": ["text", "metadata"],
+            "_source": (
+                ["text", "metadata", "vector"]
+                if include_vectors
+                else ["text", "metadata"]
+            ),
             "query": {
                 "script_score": {
-                    "query": {"match_all": {}},
+                    "query": (
+                        {"bool": {"filter": self._get_filter_clauses(filter)}}
+                        if filter
+                        else {"match_all": {}}
+                    ),
                     "script": {
                         "source": "cosineSimilarity(params.vector, 'vector') + 1.0",
                         "params": {
@@ -107,8 +187,20 @@ class OpenSearchClient:
             },
         }
 
+    def lexical_search(
+        self, index_name: str, query: str, limit: int
+    ) -> Optional[SearchResult]:
+        if not self.has_collection(index_name):
+            return None
+
+        body = {
+            "size": limit,
+            "_source": ["text", "metadata"],
+            "query": {"match": {"text": query}},
+        }
+
         result = self.client.search(
-            index=f"{self.index_prefix}_{index_name}", body=query
+            index=f"{self.index_prefix}_{index_name}", body=body
         )
 
         return self._result_to_search_result(result)
@@ -120,13 +212,10 @@ class OpenSearchClient:
             return None
 
         query_body = {
-            "query": {"bool": {"filter": []}},
+            "query": {"bool": {"filter": self._get_filter_clauses(filter)}},
             "_source": ["text", "metadata"],
         }
 
-        for field, value in filter.items():
-            query_body["query"]["bool"]["filter"].append({"term": {field: value}})
-
         size = limit if limit else 10
 
         try:
@@ -141,17 +230,88 @@ class OpenSearchClient:
         except Exception as e:
             return None
 
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        if not await self.aclient.indices.exists(
+            index=f"{self.index_prefix}_{collection_name}"
+        ):
+            return None
+
+        query_body = {
+            "query": {"bool": {"filter": self._get_filter_clauses(filter)}},
+            "_source": ["text", "metadata"],
+        }
+
+        try:
+            result = await self.aclient.search(
+                index=f"{self.index_prefix}_{collection_name}",
+                body=query_body,
+                size=limit if limit else 10,
+            )
+
+            return self._result_to_get_result(result)
+
+        except Exception as e:
+            return None
+
     def get_or_create_index(self, index_name: str, dimension: int):
         if not self.has_index(index_name):
             self._create_index(index_name, dimension)
 
-    def get(self, index_name: str) -> Optional[GetResult]:
-        query = {"query": {"match_all": {}}, "_source": ["text", "metadata"]}
+    def get(
+        self, index_name: str, include_vectors: bool = False
+    ) -> Optional[GetResult]:
+        query = {
+            "query": {"match_all": {}},
+            "_source": (
+                ["text", "metadata", "vector"]
+                if include_vectors
+                else ["text", "metadata"]
+            ),
+        }
 
         result = self.client.search(
             index=f"{self.index_prefix}_{index_name}", body=query
         )
-        return self._result_to_get_result(result)
+        return self._result_to_get_result(result, include_vectors)
+
+    def iter_get(
+        self,
+        index_name: str,
+        page_size: int = ITER_GET_PAGE_SIZE,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
+    ) -> Iterator[GetResult]:
+        # Pages of the index's documents, read with the scroll API
+        if not self.has_collection(index_name):
+            return
+
+        body = {
+            "query": (
+                {"bool": {"filter": self._get_filter_clauses(filter)}}
+                if filter
+                else {"match_all": {}}
+            ),
+            "_source": (
+                ["text", "metadata", "vector"]
+                if include_vectors
+                else ["text", "metadata"]
+            ),
+        }
+
+        result = self.client.search(
+            index=f"{self.index_prefix}_{index_name}",
+            body=body,
+            size=page_size,
+            scroll="2m",
+        )
+        try:
+            while result["hits"]["hits"]:
+                yield self._result_to_get_result(result, include_vectors)
+                result = self.client.scroll(scroll_id=result["_scroll_id"], scroll="2m")
+        finally:
+            self.client.clear_scroll(scroll_id=result["_scroll_id"])
 
     def insert(self, index_name: str, items: list[VectorItem]):
         if not self.has_index(index_name):
@@ -193,7 +353,22 @@ class OpenSearchClient:
             ]
             self.client.bulk(actions)
 
-    def delete(self, index_name: str, ids: list[str]):
+    def delete(
+        self,
+        index_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        if not ids:
+            if filter:
+                self.client.delete_by_query(
+                    index=f"{self.index_prefix}_{index_name}",
+                    body={
+                        "query": {"bool": {"filter": self._get_filter_clauses(filter)}}
+                    },
+                )
+            return
+
         actions = [
             {"delete": {"_index": f"{self.index_prefix}_{index_name}", "_id": id}}
             for id in ids
@@ -1,12 +1,24 @@
-from typing import Optional, List, Dict, Any
+from typing import Iterator, Optional, List, Dict, Any
+import asyncio
+import hashlib
+import io
+import json
 import logging
+import math
+import re
+import struct
+
+import numpy as np
 from sqlalchemy import (
     cast,
     column,
     create_engine,
+    event,
+    func,
     Column,
     Integer,
     MetaData,
+    null,
     select,
     text,
     Text,
@@ -14,16 +26,40 @@ from sqlalchemy import (
     values,
 )
 from sqlalchemy.sql import true
-from sqlalchemy.pool import NullPool
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
 
-from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
-from sqlalchemy.dialects.postgresql import JSONB, array
-from pgvector.sqlalchemy import Vector
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.dialects.postgresql import JSONB, array, insert as pg_insert
+from pgvector.sqlalchemy import BIT, HALFVEC, Vector
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.exc import NoSuchTableError
 
-from open_webui.retrieval.vector.main import VectorItem, SearchResult, GetResult
-from open_webui.config import PGVECTOR_DB_URL, PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH
+from open_webui.retrieval.vector.main import (
+    ITER_GET_PAGE_SIZE,
+    VectorItem,
+    SearchResult,
+    GetResult,
+)
+from open_webui.config import (
+    PGVECTOR_DB_URL,
+    PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH,
+    PGVECTOR_INDEX_METHOD,
+    PGVECTOR_HNSW_M,
+    PGVECTOR_HNSW_EF_CONSTRUCTION,
+    PGVECTOR_HNSW_EF_SEARCH,
+    PGVECTOR_IVFFLAT_LISTS,
+    PGVECTOR_IVFFLAT_PROBES,
+    PGVECTOR_INDEX_PER_COLLECTION,
+    PGVECTOR_POOL_SIZE,
+    PGVECTOR_POOL_MAX_OVERFLOW,
+    PGVECTOR_POOL_TIMEOUT,
+    PGVECTOR_POOL_RECYCLE,
+    PGVECTOR_ENABLE_ASYNC,
+    VECTOR_DB_PRECISION,
+    VECTOR_DB_RESCORE_OVERSAMPLING,
+    VECTOR_DB_SHARED_COLLECTION,
+)
 
 from open_webui.env import SRC_LOG_LEVELS
 
@@ -34,6 +70,56 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
+# Text search configuration of the full text index; "simple" does not stem,
+# which keeps matching language independent.
+TEXT_SEARCH_CONFIG = "simple"
+
+# Dimensions supported by hnsw and ivfflat indexes per index type
+MAX_INDEXED_VECTOR_LENGTH = 2000
+MAX_INDEXED_HALFVEC_LENGTH = 4000
+MAX_INDEXED_BIT_LENGTH = 64000
+
+# Rows written per COPY or INSERT statement
+WRITE_BATCH_SIZE = 1000
+
+# Rows per list of auto sized ivfflat indexes, up to 1M rows
+IVFFLAT_ROWS_PER_LIST = 1000
+
+# Name of the vector index over the whole table
+TABLE_INDEX_NAME = "idx_document_chunk_vector"
+
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+PGCOPY_TRAILER = struct.pack("!h", -1)
+
+
+def get_filter_clauses(filter: Dict[str, Any]) -> list:
+    # Metadata equality filters, a list value matches any of its elements
+    clauses = []
+    for key, value in filter.items():
+        field = DocumentChunk.vmetadata[key].astext
+        if isinstance(value, list):
+            clauses.append(field.in_([str(item) for item in value]))
+        else:
+            clauses.append(field == str(value))
+    return clauses
+
+
+def encode_copy_field(value: Optional[bytes]) -> bytes:
+    if value is None:
+        return struct.pack("!i", -1)
+    return struct.pack("!i", len(value)) + value
+
+
+def encode_copy_vector(vector: np.ndarray) -> bytes:
+    # pgvector's binary format: int16 dimensions, int16 unused, float4 values
+    return struct.pack("!hh", len(vector), 0) + vector.astype(">f4").tobytes()
+
+
+def encode_copy_jsonb(value: Any) -> Optional[bytes]:
+    # jsonb's binary format: version byte followed by the JSON text
+    return b"\x01" + json.dumps(value).encode("utf-8") if value is not None else None
+
+
 class DocumentChunk(Base):
     __tablename__ = "document_chunk"
 
@@ -44,57 +130,169 @@ class DocumentChunk(Base):
     vmetadata = Column(MutableDict.as_mutable(JSONB), nullable=True)
 
 
+class DocumentCollection(Base):
+    __tablename__ = "document_collection"
+
+    collection_name = Column(Text, primary_key=True)
+    # Length of the vectors before they are zero padded to VECTOR_LENGTH
+    dimension = Column(Integer, nullable=False)
+
+
+def get_dimension_statement(collection_name: str):
+    return select(DocumentCollection.dimension).where(
+        DocumentCollection.collection_name == collection_name
+    )
+
+
+def trim_vectors(vectors: list, dimension: Optional[int]) -> List[List[float]]:
+    # Vectors are stored zero padded to VECTOR_LENGTH. Collections written
+    # before their dimension was recorded use the widest non-zero extent of
+    # the given vectors, a real trailing zero is only lost if all share it.
+    if not len(vectors):
+        return []
+
+    vectors = np.asarray(vectors)
+    if dimension is None:
+        nonzero = vectors != 0
+        extents = np.where(
+            nonzero.any(axis=1),
+            vectors.shape[1] - np.argmax(nonzero[:, ::-1], axis=1),
+            0,
+        )
+        dimension = int(extents.max())
+    return vectors[:, :dimension].tolist()
+
+
 class PgvectorClient:
     def __init__(self) -> None:
 
         # if no pgvector uri, use the existing database connection
         if not PGVECTOR_DB_URL:
-            from open_webui.internal.db import Session
+            from open_webui.internal.db import SessionLocal
 
-            self.session = Session
+            self.Session = SessionLocal
         else:
-            engine = create_engine(
-                PGVECTOR_DB_URL, pool_pre_ping=True, poolclass=NullPool
-            )
-            SessionLocal = sessionmaker(
+            if PGVECTOR_POOL_SIZE > 0:
+                engine = create_engine(
+                    PGVECTOR_DB_URL,
+                    pool_size=PGVECTOR_POOL_SIZE,
+                    max_overflow=PGVECTOR_POOL_MAX_OVERFLOW,
+                    pool_timeout=PGVECTOR_POOL_TIMEOUT,
+                    pool_recycle=PGVECTOR_POOL_RECYCLE,
+                    pool_pre_ping=True,
+                    poolclass=QueuePool,
+                )
+            else:
+                engine = create_engine(
+                    PGVECTOR_DB_URL, pool_pre_ping=True, poolclass=NullPool
+                )
+            self.Session = sessionmaker(
                 autocommit=False, autoflush=False, bind=engine, expire_on_commit=False
             )
-            self.session = scoped_session(SessionLocal)
 
+        self.AsyncSession = None
+        if PGVECTOR_ENABLE_ASYNC:
+            self.AsyncSession = self.create_async_sessionmaker()
+
+        # Rows of each collection (None for the whole table) when its index
+        # was last checked, and rows written since
+        self.index_rows: dict[Optional[str], list[int]] = {}
+
+        if VECTOR_DB_PRECISION == "int8":
+            log.warning(
+                "pgvector has no int8 vector type, indexing vectors as halfvec."
+            )
+
+        # Every call uses its own session (and pooled connection), so
+        # retrieval running in several threads never shares a transaction
+        session = self.Session()
         try:
             # Ensure the pgvector extension is available
-            self.session.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
+            session.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
 
             # Check vector length consistency
-            self.check_vector_length()
+            self.check_vector_length(session)
 
             # Create the tables if they do not exist
             # Base.metadata.create_all requires a bind (engine or connection)
             # Get the connection from the session
-            connection = self.session.connection()
+            connection = session.connection()
             Base.metadata.create_all(bind=connection)
 
-            # Create an index on the vector column if it doesn't exist
-            self.session.execute(
+            # Create (or rebuild, when the settings changed) the vector index
+            # over the whole table, unless collections get their own. The
+            # indexes of the other mode are superseded and dropped.
+            if PGVECTOR_INDEX_PER_COLLECTION:
+                session.execute(text(f"DROP INDEX IF EXISTS {TABLE_INDEX_NAME};"))
+            else:
+                (rows,) = session.execute(
+                    text("SELECT count(*) FROM document_chunk;")
+                ).one()
+                self.ensure_vector_index(session, TABLE_INDEX_NAME, rows)
+                self.index_rows[None] = [rows, 0]
+                self.drop_collection_indexes(session)
+            session.execute(
                 text(
-                    "CREATE INDEX IF NOT EXISTS idx_document_chunk_vector "
-                    "ON document_chunk USING ivfflat (vector vector_cosine_ops) WITH (lists = 100);"
+                    "CREATE INDEX IF NOT EXISTS idx_document_chunk_collection_name "
+                    "ON document_chunk (collection_name);"
                 )
             )
-            self.session.execute(
+            if VECTOR_DB_SHARED_COLLECTION:
+                # Logical collections are metadata filters on the shared one
+                session.execute(
+                    text(
+                        "CREATE INDEX IF NOT EXISTS "
+                        "idx_document_chunk_metadata_collection_name ON "
+                        "document_chunk ((vmetadata->>'collection_name'));"
+                    )
+                )
+            # Full text index used by lexical_search, the expression has to
+            # match `text_search_vector` for the planner to use it.
+            session.execute(
                 text(
-                    "CREATE INDEX IF NOT EXISTS idx_document_chunk_collection_name "
-                    "ON document_chunk (collection_name);"
+                    "CREATE INDEX IF NOT EXISTS idx_document_chunk_text_search "
+                    "ON document_chunk USING gin "
+                    f"(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(text, '')));"
                 )
             )
-            self.session.commit()
+            session.commit()
             log.info("Initialization complete.")
         except Exception as e:
-            self.session.rollback()
+            session.rollback()
             log.exception(f"Error during initialization: {e}")
             raise
+        finally:
+            session.close()
+
+    def create_async_sessionmaker(self):
+        # Optional asyncpg engine so retrieval can run on the event loop
+        from pgvector.asyncpg import register_vector
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        from open_webui.config import DATABASE_URL
 
-    def check_vector_length(self) -> None:
+        url = make_url(PGVECTOR_DB_URL or DATABASE_URL).set(
+            drivername="postgresql+asyncpg"
+        )
+        if PGVECTOR_POOL_SIZE > 0:
+            engine = create_async_engine(
+                url,
+                pool_size=PGVECTOR_POOL_SIZE,
+                max_overflow=PGVECTOR_POOL_MAX_OVERFLOW,
+                pool_timeout=PGVECTOR_POOL_TIMEOUT,
+                pool_recycle=PGVECTOR_POOL_RECYCLE,
+                pool_pre_ping=True,
+            )
+        else:
+            engine = create_async_engine(url, pool_pre_ping=True, poolclass=NullPool)
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def connect(dbapi_connection, connection_record):
+            dbapi_connection.run_async(register_vector)
+
+        return async_sessionmaker(engine, expire_on_commit=False)
+
+    def check_vector_length(self, session) -> None:
         """
         Check if the VECTOR_LENGTH matches the existing vector column dimension in the database.
         Raises an exception if there is a mismatch.
@@ -103,7 +301,7 @@ class PgvectorClient:
         try:
             # Attempt to reflect the 'document_chunk' table
             document_chunk_table = Table(
-                "document_chunk", metadata, autoload_with=self.session.bind
+                "document_chunk", metadata, autoload_with=session.bind
             )
         except NoSuchTableError:
             # Table does not exist; no action needed
@@ -129,6 +327,180 @@ class PgvectorClient:
                 "The 'vector' column does not exist in the 'document_chunk' table."
             )
 
+    def get_index_options(self, rows: int) -> Optional[Dict[str, Any]]:
+        if PGVECTOR_INDEX_METHOD == "hnsw":
+            return {
+                "method": "hnsw",
+                "m": PGVECTOR_HNSW_M,
+                "ef_construction": PGVECTOR_HNSW_EF_CONSTRUCTION,
+            }
+        elif PGVECTOR_INDEX_METHOD == "ivfflat":
+            lists = PGVECTOR_IVFFLAT_LISTS
+            if lists <= 0:
+                # pgvector's guidance: rows / 1000 up to 1M rows, sqrt(rows) above
+                lists = (
+                    rows // IVFFLAT_ROWS_PER_LIST
+                    if rows <= 1_000_000
+                    else int(math.sqrt(rows))
+                )
+            return {"method": "ivfflat", "lists": max(lists, 1)}
+        return None
+
+    def ensure_vector_index(
+        self,
+        session,
+        index_name: str,
+        rows: int,
+        collection_name: Optional[str] = None,
+    ) -> None:
+        options = self.get_index_options(rows)
+        if options is None:
+            return
+
+        expression, opclass, max_length = self.get_index_expression()
+        if VECTOR_LENGTH > max_length:
+            log.warning(
+                f"Vector length {VECTOR_LENGTH} exceeds the "
+                f"{max_length} dimensions supported by "
+                f"{options['method']} with {opclass}, skipping the index."
+            )
+            return
+
+        existing = session.execute(
+            text(
+                "SELECT indexdef FROM pg_indexes "
+                "WHERE tablename = 'document_chunk' AND indexname = :name"
+            ),
+            {"name": index_name},
+        ).scalar()
+
+        if existing is not None:
+            method = re.search(r"USING (\w+)", existing)
+            params = {
+                key: int(value)
+                for key, value in re.findall(r"(\w+)='?(\d+)'?", existing)
+            }
+            if method and method.group(1) == options["method"] and opclass in existing:
+                if options["method"] == "hnsw" and all(
+                    params.get(key) == options[key] for key in ["m", "ef_construction"]
+                ):
+                    return
+                if options["method"] == "ivfflat":
+                    lists = params.get("lists", 0)
+                    # Only rebuild an auto-sized index once it is far off
+                    if lists == options["lists"] or (
+                        PGVECTOR_IVFFLAT_LISTS <= 0
+                        and options["lists"] / 2 <= lists <= options["lists"] * 2
+                    ):
+                        return
+
+            log.info(f"Rebuilding vector index {index_name} with {options}")
+            session.execute(text(f"DROP INDEX IF EXISTS {index_name};"))
+
+        with_clause = ", ".join(
+            f"{key} = {int(value)}" for key, value in options.items() if key != "method"
+        )
+        where_clause = (
+            " WHERE collection_name = '{}'".format(collection_name.replace("'", "''"))
+            if collection_name is not None
+            else ""
+        )
+        session.execute(
+            text(
+                f"CREATE INDEX IF NOT EXISTS {index_name} ON document_chunk "
+                f"USING {options['method']} ({expression} {opclass}) "
+                f"WITH ({with_clause}){where_clause};"
+            )
+        )
+
+    def get_index_expression(self) -> tuple:
+        # Quantized indexes are expression indexes over the stored vectors, so
+        # changing VECTOR_DB_PRECISION rebuilds the indexes without migrating
+        # the table. pgvector has no int8 type, int8 uses halfvec instead.
+        if VECTOR_DB_PRECISION == "binary":
+            return (
+                f"(binary_quantize(vector)::bit({VECTOR_LENGTH}))",
+                "bit_hamming_ops",
+                MAX_INDEXED_BIT_LENGTH,
+            )
+        if VECTOR_DB_PRECISION in ["float16", "int8"]:
+            return (
+                f"(vector::halfvec({VECTOR_LENGTH}))",
+                "halfvec_cosine_ops",
+                MAX_INDEXED_HALFVEC_LENGTH,
+            )
+        return "vector", "vector_cosine_ops", MAX_INDEXED_VECTOR_LENGTH
+
+    def get_collection_index_name(self, collection_name: str) -> str:
+        return (
+            "idx_document_chunk_vector_"
+            + hashlib.sha256(collection_name.encode()).hexdigest()[:16]
+        )
+
+    def drop_collection_indexes(self, session) -> None:
+        for (index_name,) in session.execute(
+            text(
+                "SELECT indexname FROM pg_indexes "
+                "WHERE tablename = 'document_chunk' "
+                "AND indexname LIKE 'idx_document_chunk_vector\\_%'"
+            )
+        ).all():
+            session.execute(text(f"DROP INDEX IF EXISTS {index_name};"))
+
+    def ensure_collection_index(self, collection_name: str, written: int = 0) -> None:
+        # Partial indexes keep the ANN scan within the collection being
+        # searched instead of filtering a scan over every collection.
+        key = collection_name if PGVECTOR_INDEX_PER_COLLECTION else None
+        entry = self.index_rows.get(key)
+        if entry is not None:
+            entry[1] += written
+            # Only auto sized ivfflat lists follow the number of rows, they
+            # are checked again once the rows doubled
+            if not (
+                PGVECTOR_INDEX_METHOD == "ivfflat"
+                and PGVECTOR_IVFFLAT_LISTS <= 0
+                and entry[1] >= max(entry[0], IVFFLAT_ROWS_PER_LIST)
+            ):
+                return
+
+        session = self.Session()
+        try:
+            query = session.query(DocumentChunk)
+            if key is not None:
+                query = query.filter(DocumentChunk.collection_name == key)
+            rows = query.count()
+
+            self.ensure_vector_index(
+                session,
+                (
+                    self.get_collection_index_name(key)
+                    if key is not None
+                    else TABLE_INDEX_NAME
+                ),
+                rows,
+                collection_name=key,
+            )
+            session.commit()
+            self.index_rows[key] = [rows, 0]
+        except Exception as e:
+            session.rollback()
+            log.exception(f"Error creating index for {collection_name}: {e}")
+        finally:
+            session.close()
+
+    def get_search_options(self) -> list:
+        # SET LOCAL only lasts until the end of the current transaction
+        statements = []
+        if PGVECTOR_HNSW_EF_SEARCH > 0:
+            statements.append(
+                text(f"SET LOCAL hnsw.ef_search = {int(PGVECTOR_HNSW_EF_SEARCH)};")
+            )
+        if PGVECTOR_IVFFLAT_PROBES > 0:
+            statements.append(
+                text(f"SET LOCAL ivfflat.probes = {int(PGVECTOR_IVFFLAT_PROBES)};")
+            )
+        return statements
+
     def adjust_vector_length(self, vector: List[float]) -> List[float]:
         # Adjust vector to have length VECTOR_LENGTH
         current_length = len(vector)
@@ -141,164 +513,446 @@ class PgvectorClient:
             )
         return vector
 
+    def adjust_vector_lengths(self, items: List[VectorItem]) -> np.ndarray:
+        # Pad all vectors to VECTOR_LENGTH at once
+        vectors = np.zeros((len(items), VECTOR_LENGTH), dtype=np.float32)
+        for idx, item in enumerate(items):
+            vector = item["vector"]
+            if len(vector) > VECTOR_LENGTH:
+                raise Exception(
+                    f"Vector length {len(vector)} not supported. Max length must be <= {VECTOR_LENGTH}"
+                )
+            vectors[idx, : len(vector)] = vector
+        return vectors
+
+    def set_collection_dimension(
+        self, session, collection_name: str, items: List[VectorItem]
+    ) -> None:
+        stmt = pg_insert(DocumentCollection).values(
+            collection_name=collection_name,
+            dimension=max(len(item["vector"]) for item in items),
+        )
+        session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[DocumentCollection.collection_name],
+                set_={"dimension": stmt.excluded.dimension},
+            )
+        )
+
+    def get_rows(
+        self, collection_name: str, items: List[VectorItem], vectors: np.ndarray
+    ) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": item["id"],
+                "vector": vector,
+                "collection_name": collection_name,
+                "text": item["text"],
+                "vmetadata": item["metadata"],
+            }
+            for item, vector in zip(items, vectors)
+        ]
+
+    def copy_items(
+        self,
+        session,
+        collection_name: str,
+        items: List[VectorItem],
+        vectors: np.ndarray,
+    ) -> None:
+        # Stream the rows with a binary COPY, one round trip per batch and no
+        # text formatting of the vectors
+        buffer = io.BytesIO()
+        buffer.write(PGCOPY_HEADER)
+
+        collection = collection_name.encode("utf-8")
+        for item, vector in zip(items, vectors):
+            buffer.write(struct.pack("!h", 5))
+            for value in [
+                item["id"].encode("utf-8"),
+                encode_copy_vector(vector),
+                collection,
+                item["text"].encode("utf-8") if item["text"] is not None else None,
+                encode_copy_jsonb(item["metadata"]),
+            ]:
+                buffer.write(encode_copy_field(value))
+
+        buffer.write(PGCOPY_TRAILER)
+        buffer.seek(0)
+
+        cursor = session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                "COPY document_chunk (id, vector, collection_name, text, vmetadata) "
+                "FROM STDIN WITH (FORMAT binary)",
+                buffer,
+            )
+        finally:
+            cursor.close()
+
     def insert(self, collection_name: str, items: List[VectorItem]) -> None:
+        session = self.Session()
         try:
-            new_items = []
-            for item in items:
-                vector = self.adjust_vector_length(item["vector"])
-                new_chunk = DocumentChunk(
-                    id=item["id"],
-                    vector=vector,
-                    collection_name=collection_name,
-                    text=item["text"],
-                    vmetadata=item["metadata"],
-                )
-                new_items.append(new_chunk)
-            self.session.bulk_save_objects(new_items)
-            self.session.commit()
+            if not items:
+                return
+
+            vectors = self.adjust_vector_lengths(items)
+            # COPY is only available through psycopg2's copy_expert
+            use_copy = session.connection().dialect.driver == "psycopg2"
+
+            for start in range(0, len(items), WRITE_BATCH_SIZE):
+                batch = items[start : start + WRITE_BATCH_SIZE]
+                batch_vectors = vectors[start : start + WRITE_BATCH_SIZE]
+                if use_copy:
+                    self.copy_items(session, collection_name, batch, batch_vectors)
+                else:
+                    session.execute(
+                        pg_insert(DocumentChunk).values(
+                            self.get_rows(collection_name, batch, batch_vectors)
+                        )
+                    )
+            self.set_collection_dimension(session, collection_name, items)
+            session.commit()
             log.info(
-                f"Inserted {len(new_items)} items into collection '{collection_name}'."
+                f"Inserted {len(items)} items into collection '{collection_name}'."
             )
+            self.ensure_collection_index(collection_name, len(items))
         except Exception as e:
-            self.session.rollback()
+            session.rollback()
             log.exception(f"Error during insert: {e}")
             raise
+        finally:
+            session.close()
 
     def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        session = self.Session()
         try:
-            for item in items:
-                vector = self.adjust_vector_length(item["vector"])
-                existing = (
-                    self.session.query(DocumentChunk)
-                    .filter(DocumentChunk.id == item["id"])
-                    .first()
+            if not items:
+                return
+
+            vectors = self.adjust_vector_lengths(items)
+            for start in range(0, len(items), WRITE_BATCH_SIZE):
+                rows = self.get_rows(
+                    collection_name,
+                    items[start : start + WRITE_BATCH_SIZE],
+                    vectors[start : start + WRITE_BATCH_SIZE],
                 )
-                if existing:
-                    existing.vector = vector
-                    existing.text = item["text"]
-                    existing.vmetadata = item["metadata"]
-                    existing.collection_name = (
-                        collection_name  # Update collection_name if necessary
-                    )
-                else:
-                    new_chunk = DocumentChunk(
-                        id=item["id"],
-                        vector=vector,
-                        collection_name=collection_name,
-                        text=item["text"],
-                        vmetadata=item["metadata"],
-                    )
-                    self.session.add(new_chunk)
-            self.session.commit()
+                # A statement cannot update the same row twice, keep the last
+                rows = list({row["id"]: row for row in rows}.values())
+
+                stmt = pg_insert(DocumentChunk).values(rows)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[DocumentChunk.id],
+                    set_={
+                        "vector": stmt.excluded.vector,
+                        "collection_name": stmt.excluded.collection_name,
+                        "text": stmt.excluded.text,
+                        "vmetadata": stmt.excluded.vmetadata,
+                    },
+                )
+                session.execute(stmt)
+            self.set_collection_dimension(session, collection_name, items)
+            session.commit()
             log.info(
                 f"Upserted {len(items)} items into collection '{collection_name}'."
             )
+            self.ensure_collection_index(collection_name, len(items))
         except Exception as e:
-            self.session.rollback()
+            session.rollback()
             log.exception(f"Error during upsert: {e}")
             raise
+        finally:
+            session.close()
 
-    def search(
+    def get_search_statement(
         self,
         collection_name: str,
         vectors: List[List[float]],
-        limit: Optional[int] = None,
-    ) -> Optional[SearchResult]:
-        try:
-            if not vectors:
-                return None
+        limit: Optional[int],
+        include_vectors: bool,
+        filter: Optional[Dict[str, Any]] = None,
+    ):
+        # Adjust query vectors to VECTOR_LENGTH
+        vectors = [self.adjust_vector_length(list(vector)) for vector in vectors]
 
-            # Adjust query vectors to VECTOR_LENGTH
-            vectors = [self.adjust_vector_length(vector) for vector in vectors]
-            num_queries = len(vectors)
+        def vector_expr(vector):
+            return cast(array(vector), Vector(VECTOR_LENGTH))
 
-            def vector_expr(vector):
-                return cast(array(vector), Vector(VECTOR_LENGTH))
+        # Create the values for query vectors
+        qid_col = column("qid", Integer)
+        q_vector_col = column("q_vector", Vector(VECTOR_LENGTH))
+        query_vectors = (
+            values(qid_col, q_vector_col)
+            .data([(idx, vector_expr(vector)) for idx, vector in enumerate(vectors)])
+            .alias("query_vectors")
+        )
 
-            # Create the values for query vectors
-            qid_col = column("qid", Integer)
-            q_vector_col = column("q_vector", Vector(VECTOR_LENGTH))
-            query_vectors = (
-                values(qid_col, q_vector_col)
-                .data(
-                    [(idx, vector_expr(vector)) for idx, vector in enumerate(vectors)]
-                )
-                .alias("query_vectors")
-            )
-
-            # Build the lateral subquery for each query vector
-            subq = (
+        # Build the lateral subquery for each query vector
+        if VECTOR_DB_PRECISION == "binary":
+            # The bit index finds candidates by hamming distance, which are
+            # then re-ranked by the cosine distance of the full vectors
+            candidates = (
                 select(
                     DocumentChunk.id,
                     DocumentChunk.text,
                     DocumentChunk.vmetadata,
-                    (
-                        DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)
-                    ).label("distance"),
+                    DocumentChunk.vector,
+                )
+                .where(
+                    DocumentChunk.collection_name == collection_name,
+                    *get_filter_clauses(filter or {}),
                 )
-                .where(DocumentChunk.collection_name == collection_name)
                 .order_by(
-                    (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector))
+                    cast(
+                        func.binary_quantize(DocumentChunk.vector), BIT(VECTOR_LENGTH)
+                    ).hamming_distance(
+                        cast(
+                            func.binary_quantize(query_vectors.c.q_vector),
+                            BIT(VECTOR_LENGTH),
+                        )
+                    )
                 )
+                .correlate(query_vectors)
             )
             if limit is not None:
-                subq = subq.limit(limit)
-            subq = subq.lateral("result")
+                candidates = candidates.limit(
+                    math.ceil(limit * VECTOR_DB_RESCORE_OVERSAMPLING)
+                )
+            candidates = candidates.subquery("candidates")
 
-            # Build the main query by joining query_vectors and the lateral subquery
-            stmt = (
-                select(
-                    query_vectors.c.qid,
-                    subq.c.id,
-                    subq.c.text,
-                    subq.c.vmetadata,
-                    subq.c.distance,
+            distance = candidates.c.vector.cosine_distance(query_vectors.c.q_vector)
+            subq = select(
+                candidates.c.id,
+                candidates.c.text,
+                candidates.c.vmetadata,
+                (
+                    candidates.c.vector
+                    if include_vectors
+                    else cast(null(), Vector(VECTOR_LENGTH))
+                ).label("vector"),
+                distance.label("distance"),
+            )
+        else:
+            if VECTOR_DB_PRECISION in ["float16", "int8"]:
+                # Same expression as the halfvec index so the planner can use it
+                distance = cast(
+                    DocumentChunk.vector, HALFVEC(VECTOR_LENGTH)
+                ).cosine_distance(
+                    cast(query_vectors.c.q_vector, HALFVEC(VECTOR_LENGTH))
                 )
-                .select_from(query_vectors)
-                .join(subq, true())
-                .order_by(query_vectors.c.qid, subq.c.distance)
+            else:
+                distance = DocumentChunk.vector.cosine_distance(
+                    query_vectors.c.q_vector
+                )
+            subq = select(
+                DocumentChunk.id,
+                DocumentChunk.text,
+                DocumentChunk.vmetadata,
+                (
+                    DocumentChunk.vector
+                    if include_vectors
+                    else cast(null(), Vector(VECTOR_LENGTH))
+                ).label("vector"),
+                distance.label("distance"),
+            ).where(
+                DocumentChunk.collection_name == collection_name,
+                *get_filter_clauses(filter or {}),
             )
 
-            result_proxy = self.session.execute(stmt)
-            results = result_proxy.all()
+        subq = subq.order_by(distance)
+        if limit is not None:
+            subq = subq.limit(limit)
+        subq = subq.lateral("result")
 
-            ids = [[] for _ in range(num_queries)]
-            distances = [[] for _ in range(num_queries)]
-            documents = [[] for _ in range(num_queries)]
-            metadatas = [[] for _ in range(num_queries)]
+        # Build the main query by joining query_vectors and the lateral subquery
+        stmt = (
+            select(
+                query_vectors.c.qid,
+                subq.c.id,
+                subq.c.text,
+                subq.c.vmetadata,
+                subq.c.vector,
+                subq.c.distance,
+            )
+            .select_from(query_vectors)
+            .join(subq, true())
+            .order_by(query_vectors.c.qid, subq.c.distance)
+        )
+        return stmt
 
-            if not results:
+    def get_search_result(
+        self,
+        results: list,
+        num_queries: int,
+        include_vectors: bool,
+        dimension: Optional[int] = None,
+    ) -> SearchResult:
+        ids = [[] for _ in range(num_queries)]
+        distances = [[] for _ in range(num_queries)]
+        documents = [[] for _ in range(num_queries)]
+        metadatas = [[] for _ in range(num_queries)]
+        embeddings = [[] for _ in range(num_queries)]
+
+        if not results:
+            return SearchResult(
+                ids=ids,
+                distances=distances,
+                documents=documents,
+                metadatas=metadatas,
+                embeddings=embeddings if include_vectors else None,
+            )
+
+        for row in results:
+            qid = int(row.qid)
+            ids[qid].append(row.id)
+            distances[qid].append(row.distance)
+            documents[qid].append(row.text)
+            metadatas[qid].append(row.vmetadata)
+
+        if include_vectors:
+            vectors = trim_vectors([row.vector for row in results], dimension)
+            for row, vector in zip(results, vectors):
+                embeddings[int(row.qid)].append(vector)
+
+        return SearchResult(
+            ids=ids,
+            distances=distances,
+            documents=documents,
+            metadatas=metadatas,
+            embeddings=embeddings if include_vectors else None,
+        )
+
+    def search(
+        self,
+        collection_name: str,
+        vectors: List[List[float]],
+        limit: Optional[int] = None,
+        include_vectors: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> Optional[SearchResult]:
+        session = self.Session()
+        try:
+            if not vectors:
+                return None
+
+            stmt = self.get_search_statement(
+                collection_name, vectors, limit, include_vectors, filter
+            )
+            for statement in self.get_search_options():
+                session.execute(statement)
+            results = session.execute(stmt).all()
+            dimension = (
+                session.execute(get_dimension_statement(collection_name)).scalar()
+                if include_vectors
+                else None
+            )
+
+            return self.get_search_result(
+                results, len(vectors), include_vectors, dimension
+            )
+        except Exception as e:
+            log.exception(f"Error during search: {e}")
+            return None
+        finally:
+            session.close()
+
+    async def asearch(
+        self,
+        collection_name: str,
+        vectors: List[List[float]],
+        limit: Optional[int] = None,
+        include_vectors: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> Optional[SearchResult]:
+        # Without PGVECTOR_ENABLE_ASYNC the blocking search runs in a thread
+        if self.AsyncSession is None:
+            return await asyncio.to_thread(
+                self.search, collection_name, vectors, limit, include_vectors, filter
+            )
+
+        try:
+            if not vectors:
+                return None
+
+            stmt = self.get_search_statement(
+                collection_name, vectors, limit, include_vectors, filter
+            )
+            async with self.AsyncSession() as session:
+                for statement in self.get_search_options():
+                    await session.execute(statement)
+                results = (await session.execute(stmt)).all()
+                dimension = (
+                    (
+                        await session.execute(get_dimension_statement(collection_name))
+                    ).scalar()
+                    if include_vectors
+                    else None
+                )
+
+            return self.get_search_result(
+                results, len(vectors), include_vectors, dimension
+            )
+        except Exception as e:
+            log.exception(f"Error during search: {e}")
+            return None
+
+    def lexical_search(
+        self, collection_name: str, query: str, limit: int
+    ) -> Optional[SearchResult]:
+        session = self.Session()
+        try:
+            # Match chunks containing any of the query terms and rank them by
+            # term density, mirroring the recall of a BM25 retriever.
+            terms = set(re.findall(r"\w+", query.lower()))
+            if not terms:
                 return SearchResult(
-                    ids=ids,
-                    distances=distances,
-                    documents=documents,
-                    metadatas=metadatas,
+                    ids=[[]], distances=[[]], documents=[[]], metadatas=[[]]
                 )
 
-            for row in results:
-                qid = int(row.qid)
-                ids[qid].append(row.id)
-                distances[qid].append(row.distance)
-                documents[qid].append(row.text)
-                metadatas[qid].append(row.vmetadata)
+            text_search_vector = func.to_tsvector(
+                TEXT_SEARCH_CONFIG, func.coalesce(DocumentChunk.text, "")
+            )
+            text_search_query = func.to_tsquery(
+                TEXT_SEARCH_CONFIG, " | ".join(f"'{term}'" for term in terms)
+            )
+            rank = func.ts_rank_cd(text_search_vector, text_search_query).label("rank")
+
+            stmt = (
+                select(
+                    DocumentChunk.id,
+                    DocumentChunk.text,
+                    DocumentChunk.vmetadata,
+                    rank,
+                )
+                .where(DocumentChunk.collection_name == collection_name)
+                .where(text_search_vector.op("@@")(text_search_query))
+                .order_by(rank.desc())
+                .limit(limit)
+            )
+            results = session.execute(stmt).all()
 
             return SearchResult(
-                ids=ids, distances=distances, documents=documents, metadatas=metadatas
+                ids=[[row.id for row in results]],
+                distances=[[row.rank for row in results]],
+                documents=[[row.text for row in results]],
+                metadatas=[[row.vmetadata for row in results]],
             )
         except Exception as e:
-            log.exception(f"Error during search: {e}")
+            log.exception(f"Error during lexical search: {e}")
             return None
+        finally:
+            session.close()
 
     def query(
         self, collection_name: str, filter: Dict[str, Any], limit: Optional[int] = None
     ) -> Optional[GetResult]:
+        session = self.Session()
         try:
-            query = self.session.query(DocumentChunk).filter(
+            query = session.query(DocumentChunk).filter(
                 DocumentChunk.collection_name == collection_name
             )
 
-            for key, value in filter.items():
-                query = query.filter(DocumentChunk.vmetadata[key].astext == str(value))
+            query = query.filter(*get_filter_clauses(filter))
 
             if limit is not None:
                 query = query.limit(limit)
@@ -320,12 +974,46 @@ class PgvectorClient:
         except Exception as e:
             log.exception(f"Error during query: {e}")
             return None
+        finally:
+            session.close()
+
+    async def aquery(
+        self, collection_name: str, filter: Dict[str, Any], limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        # Without PGVECTOR_ENABLE_ASYNC the blocking query runs in a thread
+        if self.AsyncSession is None:
+            return await asyncio.to_thread(self.query, collection_name, filter, limit)
+
+        try:
+            stmt = select(
+                DocumentChunk.id, DocumentChunk.text, DocumentChunk.vmetadata
+            ).where(
+                DocumentChunk.collection_name == collection_name,
+                *get_filter_clauses(filter),
+            )
+            if limit is not None:
+                stmt = stmt.limit(limit)
+
+            async with self.AsyncSession() as session:
+                results = (await session.execute(stmt)).all()
+
+            if not results:
+                return None
+
+            return self.get_rows_result(results, include_vectors=False)
+        except Exception as e:
+            log.exception(f"Error during query: {e}")
+            return None
 
     def get(
-        self, collection_name: str, limit: Optional[int] = None
+        self,
+        collection_name: str,
+        limit: Optional[int] = None,
+        include_vectors: bool = False,
     ) -> Optional[GetResult]:
+        session = self.Session()
         try:
-            query = self.session.query(DocumentChunk).filter(
+            query = session.query(DocumentChunk).filter(
                 DocumentChunk.collection_name == collection_name
             )
             if limit is not None:
@@ -336,14 +1024,66 @@ class PgvectorClient:
             if not results:
                 return None
 
-            ids = [[result.id for result in results]]
-            documents = [[result.text for result in results]]
-            metadatas = [[result.vmetadata for result in results]]
-
-            return GetResult(ids=ids, documents=documents, metadatas=metadatas)
+            dimension = (
+                self.get_dimension(session, collection_name)
+                if include_vectors
+                else None
+            )
+            return self.get_rows_result(results, include_vectors, dimension)
         except Exception as e:
             log.exception(f"Error during get: {e}")
             return None
+        finally:
+            session.close()
+
+    def get_dimension(self, session, collection_name: str) -> Optional[int]:
+        return session.execute(get_dimension_statement(collection_name)).scalar()
+
+    def get_rows_result(
+        self, rows, include_vectors: bool, dimension: Optional[int] = None
+    ) -> GetResult:
+        return GetResult(
+            ids=[[row.id for row in rows]],
+            documents=[[row.text for row in rows]],
+            metadatas=[[row.vmetadata for row in rows]],
+            embeddings=(
+                [trim_vectors([row.vector for row in rows], dimension)]
+                if include_vectors
+                else None
+            ),
+        )
+
+    def iter_get(
+        self,
+        collection_name: str,
+        page_size: int = ITER_GET_PAGE_SIZE,
+        include_vectors: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[GetResult]:
+        # Pages of the collection's items, streamed from a server side cursor
+        columns = [DocumentChunk.id, DocumentChunk.text, DocumentChunk.vmetadata]
+        if include_vectors:
+            columns.append(DocumentChunk.vector)
+        stmt = (
+            select(*columns)
+            .where(
+                DocumentChunk.collection_name == collection_name,
+                *get_filter_clauses(filter or {}),
+            )
+            .execution_options(yield_per=page_size)
+        )
+
+        session = self.Session()
+        try:
+            dimension = (
+                self.get_dimension(session, collection_name)
+                if include_vectors
+                else None
+            )
+            for rows in session.execute(stmt).partitions():
+                yield self.get_rows_result(rows, include_vectors, dimension)
+        finally:
+            session.close()
 
     def delete(
         self,
@@ -351,44 +1091,51 @@ class PgvectorClient:
         ids: Optional[List[str]] = None,
         filter: Optional[Dict[str, Any]] = None,
     ) -> None:
+        session = self.Session()
         try:
-            query = self.session.query(DocumentChunk).filter(
+            query = session.query(DocumentChunk).filter(
                 DocumentChunk.collection_name == collection_name
             )
             if ids:
                 query = query.filter(DocumentChunk.id.in_(ids))
             if filter:
-                for key, value in filter.items():
-                    query = query.filter(
-                        DocumentChunk.vmetadata[key].astext == str(value)
-                    )
+                query = query.filter(*get_filter_clauses(filter))
             deleted = query.delete(synchronize_session=False)
-            self.session.commit()
+            session.commit()
             log.info(f"Deleted {deleted} items from collection '{collection_name}'.")
         except Exception as e:
-            self.session.rollback()
+            session.rollback()
             log.exception(f"Error during delete: {e}")
             raise
+        finally:
+            session.close()
 
     def reset(self) -> None:
+        session = self.Session()
         try:
-            deleted = self.session.query(DocumentChunk).delete()
-            self.session.commit()
+            deleted = session.query(DocumentChunk).delete()
+            session.query(DocumentCollection).delete()
+            self.drop_collection_indexes(session)
+            session.commit()
+            self.index_rows = {}
             log.info(
                 f"Reset complete. Deleted {deleted} items from 'document_chunk' table."
             )
         except Exception as e:
-            self.session.rollback()
+            session.rollback()
             log.exception(f"Error during reset: {e}")
             raise
+        finally:
+            session.close()
 
     def close(self) -> None:
         pass
 
     def has_collection(self, collection_name: str) -> bool:
+        session = self.Session()
         try:
             exists = (
-                self.session.query(DocumentChunk)
+                session.query(DocumentChunk)
                 .filter(DocumentChunk.collection_name == collection_name)
                 .first()
                 is not None
@@ -397,7 +1144,28 @@ class PgvectorClient:
         except Exception as e:
             log.exception(f"Error checking collection existence: {e}")
             return False
+        finally:
+            session.close()
 
     def delete_collection(self, collection_name: str) -> None:
         self.delete(collection_name)
+        session = self.Session()
+        try:
+            session.query(DocumentCollection).filter(
+                DocumentCollection.collection_name == collection_name
+            ).delete(synchronize_session=False)
+            if PGVECTOR_INDEX_PER_COLLECTION:
+                session.execute(
+                    text(
+                        "DROP INDEX IF EXISTS "
+                        f"{self.get_collection_index_name(collection_name)};"
+                    )
+                )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            log.exception(f"Error dropping {collection_name}: {e}")
+        finally:
+            session.close()
+        self.index_rows.pop(collection_name, None)
         log.info(f"Collection '{collection_name}' deleted.")
@@ -1,12 +1,24 @@
-from typing import Optional
+from typing import Iterator, Optional
 import logging
 
+from qdrant_client import AsyncQdrantClient
 from qdrant_client import QdrantClient as Qclient
 from qdrant_client.http.models import PointStruct
 from qdrant_client.models import models
 
-from open_webui.retrieval.vector.main import VectorItem, SearchResult, GetResult
-from open_webui.config import QDRANT_URI, QDRANT_API_KEY
+from open_webui.retrieval.vector.main import (
+    ITER_GET_PAGE_SIZE,
+    VectorItem,
+    SearchResult,
+    GetResult,
+)
+from open_webui.config import (
+    QDRANT_URI,
+    QDRANT_API_KEY,
+    VECTOR_DB_PRECISION,
+    VECTOR_DB_RESCORE_OVERSAMPLING,
+    VECTOR_DB_SHARED_COLLECTION,
+)
 from open_webui.env import SRC_LOG_LEVELS
 
 NO_LIMIT = 999999999
@@ -25,6 +37,11 @@ class QdrantClient:
             if self.QDRANT_URI
             else None
         )
+        self.aclient = (
+            AsyncQdrantClient(url=self.QDRANT_URI, api_key=self.QDRANT_API_KEY)
+            if self.QDRANT_URI
+            else None
+        )
 
     def _result_to_get_result(self, points) -> GetResult:
         ids = []
@@ -45,14 +62,85 @@ class QdrantClient:
             }
         )
 
+    def _result_to_search_result(
+        self, points, include_vectors: bool = False
+    ) -> SearchResult:
+        get_result = self._result_to_get_result(points)
+        return SearchResult(
+            ids=get_result.ids,
+            documents=get_result.documents,
+            metadatas=get_result.metadatas,
+            distances=[[point.score for point in points]],
+            embeddings=(
+                [[point.vector for point in points]] if include_vectors else None
+            ),
+        )
+
+    def _get_filter(self, filter: dict):
+        # Metadata equality filters, a list value matches any of its elements
+        return models.Filter(
+            must=[
+                models.FieldCondition(
+                    key=f"metadata.{key}",
+                    match=(
+                        models.MatchAny(any=value)
+                        if isinstance(value, list)
+                        else models.MatchValue(value=value)
+                    ),
+                )
+                for key, value in filter.items()
+            ]
+        )
+
+    def _get_quantization_config(self):
+        # Quantized vectors are kept in RAM and searched first, the originals
+        # move to disk and only re-score the oversampled candidates
+        if VECTOR_DB_PRECISION == "int8":
+            # Qdrant calibrates the int8 range per collection on this quantile
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8, quantile=0.99, always_ram=True
+                )
+            )
+        if VECTOR_DB_PRECISION == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=True)
+            )
+        return None
+
+    def _get_search_params(self):
+        if VECTOR_DB_PRECISION not in ["int8", "binary"]:
+            return None
+        return models.SearchParams(
+            quantization=models.QuantizationSearchParams(
+                rescore=True, oversampling=VECTOR_DB_RESCORE_OVERSAMPLING
+            )
+        )
+
     def _create_collection(self, collection_name: str, dimension: int):
         collection_name_with_prefix = f"{self.collection_prefix}_{collection_name}"
+        quantization_config = self._get_quantization_config()
         self.client.create_collection(
             collection_name=collection_name_with_prefix,
             vectors_config=models.VectorParams(
-                size=dimension, distance=models.Distance.COSINE
+                size=dimension,
+                distance=models.Distance.COSINE,
+                datatype=(
+                    models.Datatype.FLOAT16
+                    if VECTOR_DB_PRECISION == "float16"
+                    else None
+                ),
+                on_disk=quantization_config is not None,
             ),
+            quantization_config=quantization_config,
         )
+        if VECTOR_DB_SHARED_COLLECTION:
+            # Logical collections are payload filters on the shared collection
+            self.client.create_payload_index(
+                collection_name=collection_name_with_prefix,
+                field_name="metadata.collection_name",
+                field_schema=models.PayloadSchemaType.KEYWORD,
+            )
 
         log.info(f"collection {collection_name_with_prefix} successfully created!")
 
@@ -83,7 +171,12 @@ class QdrantClient:
         )
 
     def search(
-        self, collection_name: str, vectors: list[list[float | int]], limit: int
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
     ) -> Optional[SearchResult]:
         # Search for the nearest neighbor items based on the vectors and return 'limit' number of results.
         if limit is None:
@@ -93,14 +186,32 @@ class QdrantClient:
             collection_name=f"{self.collection_prefix}_{collection_name}",
             query=vectors[0],
             limit=limit,
+            with_vectors=include_vectors,
+            search_params=self._get_search_params(),
+            query_filter=self._get_filter(filter) if filter else None,
         )
-        get_result = self._result_to_get_result(query_response.points)
-        return SearchResult(
-            ids=get_result.ids,
-            documents=get_result.documents,
-            metadatas=get_result.metadatas,
-            distances=[[point.score for point in query_response.points]],
+        return self._result_to_search_result(query_response.points, include_vectors)
+
+    async def asearch(
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
+    ) -> Optional[SearchResult]:
+        if limit is None:
+            limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
+
+        query_response = await self.aclient.query_points(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            query=vectors[0],
+            limit=limit,
+            with_vectors=include_vectors,
+            search_params=self._get_search_params(),
+            query_filter=self._get_filter(filter) if filter else None,
         )
+        return self._result_to_search_result(query_response.points, include_vectors)
 
     def query(self, collection_name: str, filter: dict, limit: Optional[int] = None):
         # Construct the filter string for querying
@@ -110,17 +221,9 @@ class QdrantClient:
             if limit is None:
                 limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
 
-            field_conditions = []
-            for key, value in filter.items():
-                field_conditions.append(
-                    models.FieldCondition(
-                        key=f"metadata.{key}", match=models.MatchValue(value=value)
-                    )
-                )
-
             points = self.client.query_points(
                 collection_name=f"{self.collection_prefix}_{collection_name}",
-                query_filter=models.Filter(should=field_conditions),
+                query_filter=self._get_filter(filter),
                 limit=limit,
             )
             return self._result_to_get_result(points.points)
@@ -128,13 +231,68 @@ class QdrantClient:
             log.exception(f"Error querying a collection '{collection_name}': {e}")
             return None
 
-    def get(self, collection_name: str) -> Optional[GetResult]:
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ):
+        if not await self.aclient.collection_exists(
+            f"{self.collection_prefix}_{collection_name}"
+        ):
+            return None
+        try:
+            if limit is None:
+                limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
+
+            points = await self.aclient.query_points(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                query_filter=self._get_filter(filter),
+                limit=limit,
+            )
+            return self._result_to_get_result(points.points)
+        except Exception as e:
+            log.exception(f"Error querying a collection '{collection_name}': {e}")
+            return None
+
+    def get(
+        self, collection_name: str, include_vectors: bool = False
+    ) -> Optional[GetResult]:
         # Get all the items in the collection.
         points = self.client.query_points(
             collection_name=f"{self.collection_prefix}_{collection_name}",
             limit=NO_LIMIT,  # otherwise qdrant would set limit to 10!
+            with_vectors=include_vectors,
         )
-        return self._result_to_get_result(points.points)
+        get_result = self._result_to_get_result(points.points)
+        if include_vectors:
+            get_result.embeddings = [[point.vector for point in points.points]]
+        return get_result
+
+    def iter_get(
+        self,
+        collection_name: str,
+        page_size: int = ITER_GET_PAGE_SIZE,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
+    ) -> Iterator[GetResult]:
+        # Pages of the collection's items, read with the scroll API
+        if not self.has_collection(collection_name):
+            return
+
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                scroll_filter=self._get_filter(filter) if filter else None,
+                limit=page_size,
+                offset=offset,
+                with_vectors=include_vectors,
+            )
+            if points:
+                get_result = self._result_to_get_result(points)
+                if include_vectors:
+                    get_result.embeddings = [[point.vector for point in points]]
+                yield get_result
+            if offset is None:
+                break
 
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
@@ -166,13 +324,10 @@ class QdrantClient:
                     ),
                 ),
         elif filter:
-            for key, value in filter.items():
-                field_conditions.append(
-                    models.FieldCondition(
-                        key=f"metadata.{key}",
-                        match=models.MatchValue(value=value),
-                    ),
-                ),
+            return self.client.delete(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                points_selector=models.FilterSelector(filter=self._get_filter(filter)),
+            )
 
         return self.client.delete(
             collection_name=f"{self.collection_prefix}_{collection_name}",
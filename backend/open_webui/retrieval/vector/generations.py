@@ -0,0 +1,123 @@
+import logging
+import threading
+from typing import Optional
+
+from open_webui.config import (
+    RAG_HYBRID_BM25_INDEX_MANAGER,
+    RAG_HYBRID_BM25_INDEX_REDIS_URL,
+    RAG_HYBRID_BM25_INDEX_TTL,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Counter of the writes to all collections, bumped by a reset
+ALL_COLLECTIONS = "*"
+
+
+class CollectionGenerations:
+    """
+    Counters of the writes to each collection, compared by what is built from
+    the content of a collection (e.g. BM25 indexes) to tell whether it is
+    still current. Kept in Redis when `redis_url` is given so that the writes
+    of the other workers are seen too, for `expire` seconds after the last one.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None, expire: int = 86400):
+        self.expire = expire
+        self.counters: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+        if redis_url:
+            import redis
+
+            self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+            self.redis_key = "open-webui:collection_generation"
+        else:
+            self.redis = None
+
+    def bump(self, collection_name: Optional[str] = None):
+        key = collection_name or ALL_COLLECTIONS
+        if self.redis is not None:
+            try:
+                pipe = self.redis.pipeline()
+                pipe.incr(f"{self.redis_key}:{key}")
+                pipe.expire(f"{self.redis_key}:{key}", self.expire)
+                pipe.execute()
+            except Exception as e:
+                log.warning(f"Error bumping the generation of {key}: {e}")
+        else:
+            with self.lock:
+                self.counters[key] = self.counters.get(key, 0) + 1
+
+    def get(self, collection_names: list[str]) -> Optional[tuple]:
+        # None when the counters can not be read, nothing is current then
+        keys = [ALL_COLLECTIONS, *collection_names]
+        if self.redis is not None:
+            try:
+                values = self.redis.mget([f"{self.redis_key}:{key}" for key in keys])
+            except Exception as e:
+                log.warning(f"Error reading collection generations: {e}")
+                return None
+        else:
+            with self.lock:
+                values = [self.counters.get(key) for key in keys]
+        return tuple(int(value or 0) for value in values)
+
+
+COLLECTION_GENERATIONS = CollectionGenerations(
+    redis_url=(
+        RAG_HYBRID_BM25_INDEX_REDIS_URL
+        if RAG_HYBRID_BM25_INDEX_MANAGER == "redis"
+        else None
+    ),
+    # Longer than anything built from a collection is kept
+    expire=max(2 * RAG_HYBRID_BM25_INDEX_TTL, 86400),
+)
+
+
+class GenerationTrackingClient:
+    """
+    Bumps the generation of the collections written through the wrapped
+    client, once the write is done so that nothing built while it ran is
+    taken for current.
+    """
+
+    def __init__(self, client, generations: CollectionGenerations):
+        self.client = client
+        self.generations = generations
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def insert(self, collection_name: str, items):
+        try:
+            return self.client.insert(collection_name, items)
+        finally:
+            self.generations.bump(collection_name)
+
+    def upsert(self, collection_name: str, items):
+        try:
+            return self.client.upsert(collection_name, items)
+        finally:
+            self.generations.bump(collection_name)
+
+    def delete(self, collection_name: str, ids=None, filter=None):
+        try:
+            return self.client.delete(collection_name, ids=ids, filter=filter)
+        finally:
+            self.generations.bump(collection_name)
+
+    def delete_collection(self, collection_name: str):
+        try:
+            return self.client.delete_collection(collection_name)
+        finally:
+            self.generations.bump(collection_name)
+
+    def reset(self):
+        try:
+            return self.client.reset()
+        finally:
+            self.generations.bump()
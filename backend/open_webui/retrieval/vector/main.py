@@ -2,6 +2,10 @@ from pydantic import BaseModel
 from typing import Optional, List, Any
 
 
+# Items per page returned by the `iter_get` of the vector DB clients
+ITER_GET_PAGE_SIZE = 1000
+
+
 class VectorItem(BaseModel):
     id: str
     text: str
@@ -13,6 +17,8 @@ class GetResult(BaseModel):
     ids: Optional[List[List[str]]]
     documents: Optional[List[List[str]]]
     metadatas: Optional[List[List[Any]]]
+    # Stored vectors of the items, only set when requested with `include_vectors`
+    embeddings: Optional[List[List[List[float | int]]]] = None
 
 
 class SearchResult(GetResult):
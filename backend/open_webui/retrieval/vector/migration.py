@@ -0,0 +1,219 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterator, Optional
+
+from open_webui.config import VECTOR_DB, VECTOR_DB_SHARED_COLLECTION
+from open_webui.models.files import Files
+from open_webui.models.knowledge import Knowledges
+from open_webui.models.users import Users
+from open_webui.retrieval.vector.connector import (
+    VECTOR_DB_CLIENT,
+    get_vector_db_client,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Items read, re-embedded and written per step
+MIGRATION_PAGE_SIZE = 1000
+# Collections migrated concurrently
+MIGRATION_WORKERS = 4
+
+# Suffix of the collection holding re-embedded items until they replace the
+# original collection on the same backend
+STAGING_SUFFIX = "-reembed"
+
+
+def get_client(vector_db: str):
+    # The configured backend is reused, a second client on the same storage
+    # (e.g. Chroma's SQLite files) would not see the first one's writes
+    if vector_db == VECTOR_DB:
+        return VECTOR_DB_CLIENT
+    if vector_db == "chroma":
+        # Chroma's settings are only read when it is the configured backend
+        raise ValueError("Chroma can only be migrated with VECTOR_DB=chroma")
+    return get_vector_db_client(vector_db)
+
+
+def get_collection_names() -> list[str]:
+    # Collections written by Open WebUI: one per file, knowledge base and
+    # user memory. Web search collections are transient and not migrated.
+    return (
+        [f"file-{file.id}" for file in Files.get_files()]
+        + [knowledge.id for knowledge in Knowledges.get_knowledge_bases()]
+        + [f"user-memory-{user.id}" for user in Users.get_users()]
+    )
+
+
+def iter_items(
+    client, collection_name: str, page_size: int, include_vectors: bool
+) -> Iterator[list[dict]]:
+    for page in client.iter_get(
+        collection_name, page_size=page_size, include_vectors=include_vectors
+    ):
+        embeddings = page.embeddings[0] if page.embeddings else None
+        yield [
+            {
+                "id": id,
+                "text": page.documents[0][idx],
+                "vector": embeddings[idx] if embeddings else None,
+                "metadata": page.metadatas[0][idx],
+            }
+            for idx, id in enumerate(page.ids[0])
+        ]
+
+
+def copy_collection(
+    source,
+    target,
+    source_name: str,
+    target_name: str,
+    page_size: int,
+    embedding_function: Optional[Callable] = None,
+    embedding_config: Optional[str] = None,
+) -> int:
+    # Restarting a copy starts over, so a collection is never left half old
+    if target.has_collection(target_name):
+        target.delete_collection(target_name)
+
+    count = 0
+    for items in iter_items(
+        source, source_name, page_size, include_vectors=embedding_function is None
+    ):
+        if embedding_function is not None:
+            vectors = embedding_function([item["text"] for item in items])
+            if vectors is None or len(vectors) != len(items):
+                raise ValueError(f"Failed to embed {len(items)} items")
+
+            for item, vector in zip(items, vectors):
+                item["vector"] = vector
+                item["metadata"] = {
+                    **(item["metadata"] or {}),
+                    "embedding_config": embedding_config,
+                }
+
+        target.upsert(target_name, items)
+        count += len(items)
+    return count
+
+
+def migrate_collections(
+    source,
+    target,
+    collection_names: list[str],
+    embedding_function: Optional[Callable] = None,
+    embedding_config: Optional[str] = None,
+    page_size: int = MIGRATION_PAGE_SIZE,
+    workers: int = MIGRATION_WORKERS,
+    checkpoint: Optional[dict] = None,
+    report: Optional[Callable] = None,
+) -> dict:
+    """
+    Copy collections from `source` to `target`, re-embedding the items with
+    `embedding_function` when given. Collections are migrated in parallel and
+    each finished collection is recorded in `checkpoint`, which is passed to
+    `report` with the throughput stats after every collection so that an
+    interrupted run can resume from it. Failed collections are retried on
+    resume.
+    """
+    if source is target and embedding_function is None:
+        raise ValueError("Source and target are the same, nothing to migrate")
+    if source is target and VECTOR_DB_SHARED_COLLECTION:
+        # The shared collection is chosen by the current embedding model, the
+        # items embedded with the previous one are not reachable through it
+        raise ValueError(
+            "Re-embedding in place is not supported with VECTOR_DB_SHARED_COLLECTION"
+        )
+
+    checkpoint = {"completed": [], "staged": [], "errors": {}, **(checkpoint or {})}
+    completed = set(checkpoint["completed"])
+    staged = set(checkpoint["staged"])
+
+    pending = [
+        name for name in dict.fromkeys(collection_names) if name not in completed
+    ]
+    stats = {
+        "collections": len(pending),
+        "items": 0,
+        "errors": 0,
+        "seconds": 0.0,
+        "items_per_second": 0.0,
+    }
+
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def save():
+        with lock:
+            checkpoint["completed"] = sorted(completed)
+            checkpoint["staged"] = sorted(staged)
+            stats["seconds"] = time.perf_counter() - start
+            stats["items_per_second"] = stats["items"] / max(stats["seconds"], 1e-9)
+            if report:
+                report(checkpoint, stats)
+
+    def migrate(collection_name: str) -> int:
+        if source is not target:
+            return copy_collection(
+                source,
+                target,
+                collection_name,
+                collection_name,
+                page_size,
+                embedding_function=embedding_function,
+                embedding_config=embedding_config,
+            )
+
+        # Re-embedding in place goes through a staging collection, the
+        # original is only replaced once all of its items are re-embedded
+        staging_name = f"{collection_name}{STAGING_SUFFIX}"
+        if collection_name not in staged:
+            copy_collection(
+                source,
+                target,
+                collection_name,
+                staging_name,
+                page_size,
+                embedding_function=embedding_function,
+                embedding_config=embedding_config,
+            )
+            with lock:
+                staged.add(collection_name)
+            save()
+
+        count = copy_collection(
+            target, target, staging_name, collection_name, page_size
+        )
+        if target.has_collection(staging_name):
+            target.delete_collection(staging_name)
+        with lock:
+            staged.discard(collection_name)
+        return count
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(migrate, name): name for name in pending}
+        for future in as_completed(futures):
+            collection_name = futures[future]
+            try:
+                items = future.result()
+                with lock:
+                    stats["items"] += items
+                    completed.add(collection_name)
+                    checkpoint["errors"].pop(collection_name, None)
+            except Exception as e:
+                log.exception(f"Error migrating collection {collection_name}: {e}")
+                with lock:
+                    stats["errors"] += 1
+                    checkpoint["errors"][collection_name] = str(e)
+            save()
+
+    log.info(
+        f"Migrated {stats['items']} items of {stats['collections']} collections "
+        f"in {stats['seconds']:.1f}s ({stats['items_per_second']:.0f} items/s), "
+        f"{stats['errors']} failed"
+    )
+    return stats
@@ -0,0 +1,272 @@
+import asyncio
+import hashlib
+import logging
+from typing import Iterator, Optional
+
+from open_webui.config import RAG_EMBEDDING_ENGINE, RAG_EMBEDDING_MODEL
+from open_webui.models.knowledge import Knowledges
+from open_webui.retrieval.vector.main import (
+    ITER_GET_PAGE_SIZE,
+    VectorItem,
+    SearchResult,
+    GetResult,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Metadata key holding the logical collection of an item
+COLLECTION_NAME_KEY = "collection_name"
+
+
+class SharedCollectionClient:
+    """
+    Keeps the logical collections of the wrapped client in one physical
+    collection per embedding model. Items carry their logical collection in
+    their metadata, and a knowledge base is read together with the
+    collections of its files, so file chunks are not copied into it.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def _get_physical_name(self) -> str:
+        # Vectors of different embedding models can not share an index
+        embedding_config = f"{RAG_EMBEDDING_ENGINE.value}:{RAG_EMBEDDING_MODEL.value}"
+        return f"shared-{hashlib.sha256(embedding_config.encode()).hexdigest()[:16]}"
+
+    def get_collection_members(self, collection_name: str) -> list[str]:
+        # Logical collections read for a collection name
+        if collection_name.startswith(("file-", "user-memory-")):
+            return [collection_name]
+
+        knowledge = Knowledges.get_knowledge_by_id(collection_name)
+        if knowledge is None:
+            return [collection_name]
+
+        file_ids = (knowledge.data or {}).get("file_ids", [])
+        return [collection_name, *[f"file-{file_id}" for file_id in file_ids]]
+
+    def _get_filter(
+        self, collection_names: list[str], filter: Optional[dict] = None
+    ) -> dict:
+        collection_names = list(dict.fromkeys(collection_names))
+        return {
+            **(filter or {}),
+            COLLECTION_NAME_KEY: (
+                collection_names[0] if len(collection_names) == 1 else collection_names
+            ),
+        }
+
+    def _add_collection_name(
+        self, collection_name: str, items: list[VectorItem]
+    ) -> list[VectorItem]:
+        return [
+            {
+                **item,
+                "metadata": {
+                    **(item["metadata"] or {}),
+                    COLLECTION_NAME_KEY: collection_name,
+                },
+            }
+            for item in items
+        ]
+
+    def has_collection(self, collection_name: str) -> bool:
+        physical_name = self._get_physical_name()
+        if not self.client.has_collection(physical_name):
+            return False
+
+        result = self.client.query(
+            physical_name, filter=self._get_filter([collection_name]), limit=1
+        )
+        return result is not None and len(result.ids[0]) > 0
+
+    def delete_collection(self, collection_name: str):
+        physical_name = self._get_physical_name()
+        if self.client.has_collection(physical_name):
+            self.client.delete(
+                physical_name, filter=self._get_filter([collection_name])
+            )
+
+    def search(
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
+    ) -> Optional[SearchResult]:
+        return self.search_collections(
+            [collection_name], vectors, limit, include_vectors, filter
+        )
+
+    def search_collections(
+        self,
+        collection_names: list[str],
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
+    ) -> Optional[SearchResult]:
+        # A single filtered search over all the given collections
+        physical_name = self._get_physical_name()
+        if not self.client.has_collection(physical_name):
+            return None
+
+        members = [
+            member
+            for collection_name in collection_names
+            for member in self.get_collection_members(collection_name)
+        ]
+        return self.client.search(
+            physical_name,
+            vectors,
+            limit,
+            include_vectors=include_vectors,
+            filter=self._get_filter(members, filter),
+        )
+
+    async def asearch(
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
+    ) -> Optional[SearchResult]:
+        return await self.asearch_collections(
+            [collection_name], vectors, limit, include_vectors, filter
+        )
+
+    async def asearch_collections(
+        self,
+        collection_names: list[str],
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
+    ) -> Optional[SearchResult]:
+        # Knowledge bases are looked up in the database, off the event loop
+        members = await asyncio.to_thread(
+            lambda: [
+                member
+                for collection_name in collection_names
+                for member in self.get_collection_members(collection_name)
+            ]
+        )
+        return await self.client.asearch(
+            self._get_physical_name(),
+            vectors,
+            limit,
+            include_vectors=include_vectors,
+            filter=self._get_filter(members, filter),
+        )
+
+    def lexical_search(
+        self, collection_name: str, query: str, limit: int
+    ) -> Optional[SearchResult]:
+        # Full text searches of the backends are not filtered, callers fall
+        # back to a BM25 index over get()
+        return None
+
+    def query(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        physical_name = self._get_physical_name()
+        if not self.client.has_collection(physical_name):
+            return None
+
+        return self.client.query(
+            physical_name,
+            filter=self._get_filter(
+                self.get_collection_members(collection_name), filter
+            ),
+            limit=limit,
+        )
+
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        members = await asyncio.to_thread(self.get_collection_members, collection_name)
+        return await self.client.aquery(
+            self._get_physical_name(),
+            filter=self._get_filter(members, filter),
+            limit=limit,
+        )
+
+    def get(
+        self, collection_name: str, include_vectors: bool = False
+    ) -> Optional[GetResult]:
+        physical_name = self._get_physical_name()
+        if not self.client.has_collection(physical_name):
+            return None
+
+        filter = self._get_filter(self.get_collection_members(collection_name))
+        if not include_vectors:
+            return self.client.query(physical_name, filter=filter)
+
+        # Filtered queries do not return vectors, the pages are merged instead
+        result = GetResult(ids=[[]], documents=[[]], metadatas=[[]], embeddings=[[]])
+        for page in self.client.iter_get(
+            physical_name, include_vectors=True, filter=filter
+        ):
+            result.ids[0].extend(page.ids[0])
+            result.documents[0].extend(page.documents[0])
+            result.metadatas[0].extend(page.metadatas[0])
+            result.embeddings[0].extend(page.embeddings[0])
+        return result
+
+    def iter_get(
+        self,
+        collection_name: str,
+        page_size: int = ITER_GET_PAGE_SIZE,
+        include_vectors: bool = False,
+        filter: Optional[dict] = None,
+    ) -> Iterator[GetResult]:
+        physical_name = self._get_physical_name()
+        if not self.client.has_collection(physical_name):
+            return
+
+        yield from self.client.iter_get(
+            physical_name,
+            page_size=page_size,
+            include_vectors=include_vectors,
+            filter=self._get_filter(
+                self.get_collection_members(collection_name), filter
+            ),
+        )
+
+    def insert(self, collection_name: str, items: list[VectorItem]):
+        return self.client.insert(
+            self._get_physical_name(), self._add_collection_name(collection_name, items)
+        )
+
+    def upsert(self, collection_name: str, items: list[VectorItem]):
+        return self.client.upsert(
+            self._get_physical_name(), self._add_collection_name(collection_name, items)
+        )
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        physical_name = self._get_physical_name()
+        if not self.client.has_collection(physical_name):
+            return
+
+        # Only items stored under the collection itself, file chunks leave a
+        # knowledge base when the file id is removed from it
+        if ids:
+            return self.client.delete(physical_name, ids=ids)
+        elif filter:
+            return self.client.delete(
+                physical_name, filter=self._get_filter([collection_name], filter)
+            )
+
+    def reset(self):
+        return self.client.reset()
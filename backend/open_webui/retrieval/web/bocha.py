@@ -1,9 +1,7 @@
 import logging
 from typing import Optional
 
-import requests
-import json
-from open_webui.retrieval.web.main import SearchResult, get_filtered_results
+from open_webui.retrieval.web.main import SearchResult, get_json, normalize_results
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
@@ -34,7 +32,7 @@ def _parse_response(response):
     return result
 
 
-def search_bocha(
+async def search_bocha(
     api_key: str, query: str, count: int, filter_list: Optional[list[str]] = None
 ) -> list[SearchResult]:
     """Search using Bocha's Search API and return the results as a list of SearchResult objects.
@@ -46,20 +44,15 @@ def search_bocha(
     url = "https://api.bochaai.com/v1/web-search?utm_source=ollama"
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
 
-    payload = json.dumps(
-        {"query": query, "summary": True, "freshness": "noLimit", "count": count}
-    )
-
-    response = requests.post(url, headers=headers, data=payload, timeout=5)
-    response.raise_for_status()
-    results = _parse_response(response.json())
-    print(results)
-    if filter_list:
-        results = get_filtered_results(results, filter_list)
+    payload = {"query": query, "summary": True, "freshness": "noLimit", "count": count}
 
-    return [
-        SearchResult(
-            link=result["url"], title=result.get("name"), snippet=result.get("summary")
-        )
-        for result in results.get("webpage", [])[:count]
-    ]
+    results = _parse_response(
+        await get_json("POST", url, headers=headers, json=payload)
+    )
+    return normalize_results(
+        results.get("webpage", []),
+        count,
+        filter_list,
+        title="name",
+        snippet="summary",
+    )
@@ -1,15 +1,14 @@
 import logging
 from typing import Optional
 
-import requests
-from open_webui.retrieval.web.main import SearchResult, get_filtered_results
+from open_webui.retrieval.web.main import SearchResult, get_json, normalize_results
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
-def search_brave(
+async def search_brave(
     api_key: str, query: str, count: int, filter_list: Optional[list[str]] = None
 ) -> list[SearchResult]:
     """Search using Brave's Search API and return the results as a list of SearchResult objects.
@@ -26,17 +25,6 @@ def search_brave(
     }
     params = {"q": query, "count": count}
 
-    response = requests.get(url, headers=headers, params=params)
-    response.raise_for_status()
-
-    json_response = response.json()
+    json_response = await get_json("GET", url, headers=headers, params=params)
     results = json_response.get("web", {}).get("results", [])
-    if filter_list:
-        results = get_filtered_results(results, filter_list)
-
-    return [
-        SearchResult(
-            link=result["url"], title=result.get("title"), snippet=result.get("snippet")
-        )
-        for result in results[:count]
-    ]
+    return normalize_results(results, count, filter_list)
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from open_webui.config import (
+    PLAYWRIGHT_BLOCKED_RESOURCES,
+    PLAYWRIGHT_POOL_ACQUIRE_TIMEOUT,
+    PLAYWRIGHT_POOL_PAGES_PER_CONTEXT,
+    PLAYWRIGHT_POOL_SIZE,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# Put in the queue of a stopped pool to wake the borrowers waiting on it
+_STOPPED = object()
+
+
+class BrowserContextPool:
+    """
+    A browser started once, with `size` warmed contexts rendering a page
+    each at a time. Requests for the resource types in `blocked_resources`
+    are aborted, and a context is replaced by a fresh one after
+    `pages_per_context` pages so that its memory and state do not pile up.
+    Borrowers wait at most `acquire_timeout` seconds for a free context.
+    The browser is launched locally, or connected to at `ws_url`.
+    """
+
+    def __init__(
+        self,
+        size: int = PLAYWRIGHT_POOL_SIZE,
+        pages_per_context: int = PLAYWRIGHT_POOL_PAGES_PER_CONTEXT,
+        blocked_resources: Optional[list[str]] = None,
+        ws_url: Optional[str] = None,
+        headless: bool = True,
+        acquire_timeout: float = PLAYWRIGHT_POOL_ACQUIRE_TIMEOUT,
+    ):
+        self.size = max(1, size)
+        self.pages_per_context = pages_per_context
+        self.acquire_timeout = acquire_timeout
+        self.blocked_resources = set(
+            PLAYWRIGHT_BLOCKED_RESOURCES
+            if blocked_resources is None
+            else blocked_resources
+        )
+        self.ws_url = ws_url
+        self.headless = headless
+
+        self.playwright = None
+        self.browser = None
+        self.contexts: Optional[asyncio.Queue] = None
+        self.page_counts: dict = {}
+
+    async def start(self):
+        from playwright.async_api import async_playwright
+
+        self.playwright = await async_playwright().start()
+        try:
+            if self.ws_url:
+                self.browser = await self.playwright.chromium.connect(self.ws_url)
+            else:
+                self.browser = await self.playwright.chromium.launch(
+                    headless=self.headless
+                )
+
+            self.contexts = asyncio.Queue()
+            for _ in range(self.size):
+                self.contexts.put_nowait(await self._new_context())
+        except BaseException:
+            await self.stop()
+            raise
+        log.info(f"Started a pool of {self.size} browser contexts")
+
+    async def stop(self):
+        if self.contexts is not None:
+            self.contexts.put_nowait(_STOPPED)
+            self.contexts = None
+        if self.browser is not None:
+            try:
+                await self.browser.close()
+            except Exception as e:
+                log.warning(f"Error closing the browser: {e}")
+            self.browser = None
+        if self.playwright is not None:
+            await self.playwright.stop()
+            self.playwright = None
+        self.page_counts.clear()
+
+    async def _acquire(self) -> tuple[asyncio.Queue, object]:
+        contexts = self.contexts
+        if contexts is None:
+            raise RuntimeError("The browser pool is stopped")
+        try:
+            context = await asyncio.wait_for(
+                contexts.get(), timeout=self.acquire_timeout or None
+            )
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"No browser context was free within {self.acquire_timeout}s"
+            )
+        if context is _STOPPED:
+            # Passed on to the next borrower waiting
+            contexts.put_nowait(_STOPPED)
+            raise RuntimeError("The browser pool is stopped")
+        return contexts, context
+
+    async def _block_resources(self, route):
+        if route.request.resource_type in self.blocked_resources:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _new_context(self, **kwargs):
+        context = await self.browser.new_context(**kwargs)
+        if self.blocked_resources:
+            await context.route("**/*", self._block_resources)
+        self.page_counts[context] = 0
+        return context
+
+    async def _close_context(self, context):
+        self.page_counts.pop(context, None)
+        try:
+            await context.close()
+        except Exception as e:
+            log.warning(f"Error closing a browser context: {e}")
+
+    @asynccontextmanager
+    async def context(self, proxy: Optional[dict] = None) -> AsyncIterator:
+        """
+        Lend a context for rendering one page, waiting while all of them are
+        busy. Contexts with a proxy are not pooled, they are created on the
+        shared browser and closed after use. Fails when the pool is stopped.
+        """
+        # Slots hold a context, or None once it was recycled or failed to be
+        # created, a new one is then created by the next borrower
+        contexts, context = await self._acquire()
+        try:
+            if context is None:
+                context = await self._new_context()
+
+            if proxy:
+                proxied_context = await self._new_context(proxy=proxy)
+                try:
+                    yield proxied_context
+                finally:
+                    await self._close_context(proxied_context)
+                return
+
+            yield context
+            self.page_counts[context] += 1
+            if self.page_counts[context] >= self.pages_per_context:
+                await self._close_context(context)
+                context = None
+        finally:
+            # Unless the pool was stopped meanwhile
+            if contexts is self.contexts:
+                contexts.put_nowait(context)
+
+
+_pool: Optional[BrowserContextPool] = None
+_pool_lock = asyncio.Lock()
+
+
+async def get_browser_pool(ws_url: Optional[str] = None) -> BrowserContextPool:
+    """
+    Return the shared pool, started on first use and restarted when the
+    remote browser it was connected to changes.
+    """
+    global _pool
+    async with _pool_lock:
+        if _pool is not None and (
+            _pool.ws_url != (ws_url or None) or not _pool.browser.is_connected()
+        ):
+            await _pool.stop()
+            _pool = None
+        if _pool is None:
+            pool = BrowserContextPool(ws_url=ws_url or None)
+            await pool.start()
+            _pool = pool
+        return _pool
+
+
+async def close_browser_pool():
+    global _pool
+    async with _pool_lock:
+        if _pool is not None:
+            await _pool.stop()
+            _pool = None
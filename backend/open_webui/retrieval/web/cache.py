@@ -0,0 +1,324 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from open_webui.config import (
+    ENABLE_RAG_WEB_FETCH_CACHE,
+    RAG_WEB_FETCH_CACHE_DIR,
+    RAG_WEB_FETCH_CACHE_MANAGER,
+    RAG_WEB_FETCH_CACHE_MAX_AGE,
+    RAG_WEB_FETCH_CACHE_MAX_SIZE,
+    RAG_WEB_FETCH_CACHE_REDIS_URL,
+    RAG_WEB_FETCH_CACHE_TTL,
+    RAG_WEB_SEARCH_CACHE_SIZE,
+    RAG_WEB_SEARCH_CACHE_TTL,
+)
+from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def normalize_url(url: str) -> str:
+    # Spellings of the same page share a cache entry
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme, parts.port) in (("http", 80), ("https", 443)):
+        netloc = netloc.rsplit(":", 1)[0]
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+class WebFetchCache:
+    """
+    Fetched web pages with their extracted text, keyed by normalized URL.
+    Pages are fresh for `ttl` seconds and kept for revalidation for
+    `max_age` seconds. The least recently used pages are evicted once the
+    cache holds more than `max_size` bytes. Pages are stored as files in
+    `cache_dir`, or in Redis when `redis_url` is given.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        max_age: int,
+        max_size: int,
+        cache_dir: Optional[str] = None,
+        redis_url: Optional[str] = None,
+    ):
+        self.ttl = ttl
+        self.max_age = max(max_age, ttl)
+        self.max_size = max_size
+        self.lock = threading.Lock()
+
+        if redis_url:
+            import redis
+
+            self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+            self.redis_key = "open-webui:web_fetch_cache"
+        else:
+            self.redis = None
+            self.cache_dir = Path(cache_dir)
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Recounted from the files on eviction, other processes share them
+            self.size = sum(path.stat().st_size for path in self._get_paths())
+
+    def _get_key(self, url: str) -> str:
+        return hashlib.sha256(normalize_url(url).encode()).hexdigest()
+
+    def _get_paths(self) -> list[Path]:
+        return list(self.cache_dir.glob("*.json"))
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    def get(self, url: str) -> Optional[dict]:
+        key = self._get_key(url)
+        try:
+            if self.redis is not None:
+                data = self.redis.get(f"{self.redis_key}:{key}")
+                if data is None:
+                    return None
+                self.redis.zadd(f"{self.redis_key}:lru", {key: time.time()})
+                return json.loads(data)
+
+            path = self.cache_dir / f"{key}.json"
+            with self.lock:
+                if not path.exists():
+                    return None
+                entry = json.loads(path.read_text())
+                if time.time() - entry["fetched_at"] >= self.max_age:
+                    self.size -= path.stat().st_size
+                    path.unlink()
+                    return None
+                # The modification time orders the files for eviction
+                os.utime(path)
+                return entry
+        except Exception as e:
+            log.warning(f"Error reading {url} from the web fetch cache: {e}")
+            return None
+
+    def set(
+        self,
+        url: str,
+        html: str,
+        text: str,
+        metadata: dict,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        entry = {
+            "url": url,
+            "html": html,
+            "text": text,
+            "metadata": metadata,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        }
+        self.put(url, entry)
+
+    def touch(self, url: str, entry: dict):
+        # The site confirmed the page is unchanged, it is fresh again
+        self.put(url, {**entry, "fetched_at": time.time()})
+
+    def put(self, url: str, entry: dict):
+        key = self._get_key(url)
+        data = json.dumps(entry)
+        size = len(data.encode())
+        if size > self.max_size:
+            return
+
+        try:
+            if self.redis is not None:
+                self._put_redis(key, data, size)
+            else:
+                self._put_file(key, data, size)
+        except Exception as e:
+            log.warning(f"Error writing {url} to the web fetch cache: {e}")
+
+    def _put_file(self, key: str, data: str, size: int):
+        path = self.cache_dir / f"{key}.json"
+        with self.lock:
+            if path.exists():
+                self.size -= path.stat().st_size
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_text(data)
+            tmp_path.replace(path)
+            self.size += size
+
+            if self.size > self.max_size:
+                paths = []
+                for cache_path in self._get_paths():
+                    try:
+                        paths.append((cache_path, cache_path.stat()))
+                    except FileNotFoundError:
+                        continue
+                paths.sort(key=lambda item: item[1].st_mtime)
+
+                self.size = sum(stat.st_size for _, stat in paths)
+                for cache_path, stat in paths:
+                    if self.size <= self.max_size:
+                        break
+                    cache_path.unlink(missing_ok=True)
+                    self.size -= stat.st_size
+
+    def _put_redis(self, key: str, data: str, size: int):
+        # Sizes are tracked next to the entries, expired entries are counted
+        # until they are evicted
+        sizes_key = f"{self.redis_key}:sizes"
+        lru_key = f"{self.redis_key}:lru"
+        total_key = f"{self.redis_key}:size"
+
+        previous_size = int(self.redis.hget(sizes_key, key) or 0)
+        pipe = self.redis.pipeline()
+        pipe.set(f"{self.redis_key}:{key}", data, ex=self.max_age)
+        pipe.hset(sizes_key, key, size)
+        pipe.zadd(lru_key, {key: time.time()})
+        pipe.incrby(total_key, size - previous_size)
+        total = pipe.execute()[-1]
+
+        while total > self.max_size:
+            oldest = self.redis.zpopmin(lru_key)
+            if not oldest:
+                break
+            oldest_key = oldest[0][0]
+            oldest_size = int(self.redis.hget(sizes_key, oldest_key) or 0)
+            pipe = self.redis.pipeline()
+            pipe.delete(f"{self.redis_key}:{oldest_key}")
+            pipe.hdel(sizes_key, oldest_key)
+            pipe.decrby(total_key, oldest_size)
+            total = pipe.execute()[-1]
+
+
+WEB_FETCH_CACHE = (
+    WebFetchCache(
+        RAG_WEB_FETCH_CACHE_TTL,
+        RAG_WEB_FETCH_CACHE_MAX_AGE,
+        RAG_WEB_FETCH_CACHE_MAX_SIZE * 1024 * 1024,
+        cache_dir=RAG_WEB_FETCH_CACHE_DIR,
+        redis_url=(
+            RAG_WEB_FETCH_CACHE_REDIS_URL
+            if RAG_WEB_FETCH_CACHE_MANAGER == "redis"
+            else None
+        ),
+    )
+    if ENABLE_RAG_WEB_FETCH_CACHE
+    else None
+)
+
+
+class WebSearchCache:
+    """
+    Results of the search engines and the collections built from them, reused
+    by identical searches for `ttl` seconds. Hits and misses are counted per
+    kind of entry.
+    """
+
+    def __init__(self, ttl: int, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = {"results": 0, "collections": 0}
+        self.misses = {"results": 0, "collections": 0}
+
+    def _get(self, kind: str, key: tuple):
+        with self.lock:
+            entry = self.entries.get((kind, *key))
+            if entry is not None and time.time() - entry[0] < self.ttl:
+                self.entries.move_to_end((kind, *key))
+                return entry[1]
+            return None
+
+    def _set(self, kind: str, key: tuple, value):
+        with self.lock:
+            self.entries[(kind, *key)] = (time.time(), value)
+            self.entries.move_to_end((kind, *key))
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def _count(self, kind: str, hit: bool):
+        with self.lock:
+            (self.hits if hit else self.misses)[kind] += 1
+
+    def _get_results_key(
+        self, engine: str, query: str, count: int, filter_list: Optional[list[str]]
+    ) -> tuple:
+        return (
+            engine,
+            " ".join(query.lower().split()),
+            count,
+            tuple(sorted(filter_list or [])),
+        )
+
+    def get_results(
+        self, engine: str, query: str, count: int, filter_list: Optional[list[str]]
+    ) -> Optional[list]:
+        results = self._get(
+            "results", self._get_results_key(engine, query, count, filter_list)
+        )
+        self._count("results", results is not None)
+        return results
+
+    def set_results(
+        self,
+        engine: str,
+        query: str,
+        count: int,
+        filter_list: Optional[list[str]],
+        results: list,
+    ):
+        self._set(
+            "results",
+            self._get_results_key(engine, query, count, filter_list),
+            results,
+        )
+
+    def get_collection(self, collection_name: str, key: tuple) -> Optional[dict]:
+        """
+        Return the result of processing the pages of `key` (the URLs and
+        settings they were embedded with) into `collection_name`, if the
+        collection still holds them.
+        """
+        result = self._get("collections", (collection_name, *key))
+        if (
+            result is not None
+            and result.get("collection_name")
+            and not VECTOR_DB_CLIENT.has_collection(collection_name=collection_name)
+        ):
+            result = None
+        self._count("collections", result is not None)
+        return result
+
+    def set_collection(self, collection_name: str, key: tuple, result: dict):
+        self._set("collections", (collection_name, *key), result)
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "ttl": self.ttl,
+                "size": len(self.entries),
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+            }
+
+
+WEB_SEARCH_CACHE = (
+    WebSearchCache(RAG_WEB_SEARCH_CACHE_TTL, RAG_WEB_SEARCH_CACHE_SIZE)
+    if RAG_WEB_SEARCH_CACHE_TTL > 0
+    else None
+)
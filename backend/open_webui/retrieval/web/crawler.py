@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Callable, Mapping, Optional, Union
+from urllib.parse import urlparse
+
+import aiohttp
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Connections kept open to the crawled sites, shared by all searches
+CRAWLER_POOL_SIZE = 100
+
+# Responses worth asking for again
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Longest wait for a retry a site may ask for with Retry-After
+MAX_RETRY_DELAY = 30
+
+# Hosts with a limiter above which the idle limiters are dropped
+MAX_HOST_LIMITERS = 1000
+
+_sessions: dict[bool, aiohttp.ClientSession] = {}
+
+# Limiters of the crawled hosts, shared by all crawls so that concurrent
+# searches keep to the limits of a host together
+_host_limiters: dict[str, "HostLimiter"] = {}
+
+
+def get_crawler_session(trust_env: bool = False) -> aiohttp.ClientSession:
+    # One session per proxy setting, created on first use so that it is bound
+    # to the running event loop
+    session = _sessions.get(trust_env)
+    if (
+        session is None
+        or session.closed
+        or session._loop is not asyncio.get_running_loop()
+    ):
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=CRAWLER_POOL_SIZE, ttl_dns_cache=300),
+            trust_env=trust_env,
+            # Cookies of one site must not be sent along with another search
+            cookie_jar=aiohttp.DummyCookieJar(),
+        )
+        _sessions[trust_env] = session
+    return session
+
+
+async def close_crawler_sessions():
+    for session in _sessions.values():
+        if not session.closed:
+            await session.close()
+    _sessions.clear()
+    _host_limiters.clear()
+
+
+@dataclass
+class FetchedPage:
+    url: str
+    status: int
+    headers: Mapping[str, str]
+    text: str
+
+
+class HostLimiter:
+    """Limits the concurrent requests and the request rate to one host."""
+
+    def __init__(self, concurrency: int, requests_per_second: Optional[float]):
+        self.settings = (concurrency, requests_per_second)
+        self.loop = asyncio.get_running_loop()
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.next_request = 0.0
+        self.active = 0
+
+    def is_idle(self) -> bool:
+        return self.active == 0 and self.next_request <= time.monotonic()
+
+    async def __aenter__(self):
+        self.active += 1
+        try:
+            await self.semaphore.acquire()
+        except BaseException:
+            self.active -= 1
+            raise
+        if self.interval:
+            now = time.monotonic()
+            wait = self.next_request - now
+            self.next_request = max(now, self.next_request) + self.interval
+            if wait > 0:
+                try:
+                    await asyncio.sleep(wait)
+                except BaseException:
+                    await self.__aexit__()
+                    raise
+
+    async def __aexit__(self, *args):
+        self.active -= 1
+        self.semaphore.release()
+
+
+def get_host_limiter(
+    url: str, concurrency: int, requests_per_second: Optional[float]
+) -> HostLimiter:
+    # Bound to the running event loop like the sessions, and replaced when the
+    # limits are changed
+    host = urlparse(url).netloc.lower()
+    limiter = _host_limiters.get(host)
+    if (
+        limiter is None
+        or limiter.loop is not asyncio.get_running_loop()
+        or limiter.settings != (concurrency, requests_per_second)
+    ):
+        if len(_host_limiters) >= MAX_HOST_LIMITERS:
+            for idle in [
+                key for key, value in _host_limiters.items() if value.is_idle()
+            ]:
+                del _host_limiters[idle]
+        limiter = HostLimiter(concurrency, requests_per_second)
+        _host_limiters[host] = limiter
+    return limiter
+
+
+class Crawler:
+    """
+    Fetches pages concurrently over a shared connection pool, with at most
+    `host_concurrency` requests and `host_requests_per_second` requests per
+    second to each host across all crawls. Failed requests are retried with exponential
+    backoff and jitter, honouring Retry-After. A crawl stops after
+    `time_budget` seconds or when its consumer stops reading, and the
+    requests still pending are cancelled.
+    """
+
+    def __init__(
+        self,
+        host_concurrency: int = 2,
+        host_requests_per_second: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        request_timeout: float = 10,
+        retries: int = 3,
+        backoff: float = 0.5,
+        trust_env: bool = False,
+    ):
+        self.host_concurrency = host_concurrency
+        self.host_requests_per_second = host_requests_per_second
+        self.time_budget = time_budget
+        self.request_timeout = request_timeout
+        self.retries = max(1, retries)
+        self.backoff = backoff
+        self.trust_env = trust_env
+
+    def _get_retry_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = 0.0
+            if delay > 0:
+                return min(delay, MAX_RETRY_DELAY)
+        return self.backoff * 2**attempt * (1 + random.random())
+
+    async def fetch(self, url: str, **kwargs) -> FetchedPage:
+        session = get_crawler_session(self.trust_env)
+        kwargs.setdefault("timeout", aiohttp.ClientTimeout(total=self.request_timeout))
+        for attempt in range(self.retries):
+            last_attempt = attempt == self.retries - 1
+            try:
+                async with get_host_limiter(
+                    url, self.host_concurrency, self.host_requests_per_second
+                ):
+                    async with session.get(url, **kwargs) as response:
+                        if last_attempt or response.status not in RETRY_STATUSES:
+                            return FetchedPage(
+                                url=url,
+                                status=response.status,
+                                headers=response.headers.copy(),
+                                text=await response.text(errors="replace"),
+                            )
+                        reason = f"status {response.status}"
+                        delay = self._get_retry_delay(
+                            attempt, response.headers.get("Retry-After")
+                        )
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if last_attempt:
+                    raise
+                reason = str(e) or e.__class__.__name__
+                delay = self._get_retry_delay(attempt, None)
+
+            log.warning(
+                f"Error fetching {url} with attempt {attempt + 1}/{self.retries}: "
+                f"{reason}. Retrying in {delay:.1f}s..."
+            )
+            await asyncio.sleep(delay)
+
+    async def _fetch_or_error(
+        self, url: str, request_kwargs: Callable[[str], dict]
+    ) -> Union[FetchedPage, Exception]:
+        try:
+            return await self.fetch(url, **request_kwargs(url))
+        except Exception as e:
+            return e
+
+    async def crawl(
+        self,
+        urls: list[str],
+        request_kwargs: Callable[[str], dict] = lambda url: {},
+    ) -> AsyncIterator[tuple[str, Union[FetchedPage, Exception]]]:
+        """
+        Yield the page of each URL, or the error fetching it, as soon as it
+        is done. Use with contextlib.aclosing so that stopping early cancels
+        the pending requests.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.time_budget if self.time_budget else None
+        tasks = {
+            asyncio.create_task(self._fetch_or_error(url, request_kwargs)): url
+            for url in dict.fromkeys(urls)
+        }
+        pending = set(tasks)
+        try:
+            while pending:
+                timeout = None
+                if deadline is not None:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield tasks[task], task.result()
+
+            if pending:
+                log.info(
+                    f"Crawl time budget of {self.time_budget}s exhausted, "
+                    f"{len(pending)} of {len(tasks)} pages dropped"
+                )
+        finally:
+            for task in pending:
+                task.cancel()
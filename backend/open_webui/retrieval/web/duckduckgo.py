@@ -1,7 +1,8 @@
+import asyncio
 import logging
 from typing import Optional
 
-from open_webui.retrieval.web.main import SearchResult, get_filtered_results
+from open_webui.retrieval.web.main import SearchResult, normalize_results
 from duckduckgo_search import DDGS
 from open_webui.env import SRC_LOG_LEVELS
 
@@ -9,7 +10,7 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
-def search_duckduckgo(
+async def search_duckduckgo(
     query: str, count: int, filter_list: Optional[list[str]] = None
 ) -> list[SearchResult]:
     """
@@ -21,26 +22,19 @@ def search_duckduckgo(
     Returns:
         list[SearchResult]: A list of search results
     """
-    # Use the DDGS context manager to create a DDGS object
-    with DDGS() as ddgs:
-        # Use the ddgs.text() method to perform the search
-        ddgs_gen = ddgs.text(
-            query, safesearch="moderate", max_results=count, backend="api"
-        )
-        # Check if there are search results
-        if ddgs_gen:
-            # Convert the search results into a list
-            search_results = [r for r in ddgs_gen]
 
-    if filter_list:
-        search_results = get_filtered_results(search_results, filter_list)
+    def search() -> list[dict]:
+        # Use the DDGS context manager to create a DDGS object
+        with DDGS() as ddgs:
+            # Use the ddgs.text() method to perform the search
+            ddgs_gen = ddgs.text(
+                query, safesearch="moderate", max_results=count, backend="api"
+            )
+            # Convert the search results into a list
+            return [r for r in ddgs_gen] if ddgs_gen else []
 
-    # Return the list of search results
-    return [
-        SearchResult(
-            link=result["href"],
-            title=result.get("title"),
-            snippet=result.get("body"),
-        )
-        for result in search_results
-    ]
+    # duckduckgo_search only has a blocking client
+    search_results = await asyncio.to_thread(search)
+    return normalize_results(
+        search_results, count, filter_list, link="href", snippet="body"
+    )
@@ -1,10 +1,8 @@
 import logging
-from dataclasses import dataclass
 from typing import Optional
 
-import requests
 from open_webui.env import SRC_LOG_LEVELS
-from open_webui.retrieval.web.main import SearchResult
+from open_webui.retrieval.web.main import SearchResult, get_json, normalize_results
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
@@ -12,14 +10,7 @@ log.setLevel(SRC_LOG_LEVELS["RAG"])
 EXA_API_BASE = "https://api.exa.ai"
 
 
-@dataclass
-class ExaResult:
-    url: str
-    title: str
-    text: str
-
-
-def search_exa(
+async def search_exa(
     api_key: str,
     query: str,
     count: int,
@@ -46,31 +37,13 @@ def search_exa(
     }
 
     try:
-        response = requests.post(
-            f"{EXA_API_BASE}/search", headers=headers, json=payload
+        data = await get_json(
+            "POST", f"{EXA_API_BASE}/search", headers=headers, json=payload
         )
-        response.raise_for_status()
-        data = response.json()
-
-        results = []
-        for result in data["results"]:
-            results.append(
-                ExaResult(
-                    url=result["url"],
-                    title=result["title"],
-                    text=result["text"],
-                )
-            )
 
+        results = data["results"]
         log.info(f"Found {len(results)} results")
-        return [
-            SearchResult(
-                link=result.url,
-                title=result.title,
-                snippet=result.text,
-            )
-            for result in results
-        ]
+        return normalize_results(results, count or 5, snippet="text")
     except Exception as e:
         log.error(f"Error searching Exa: {e}")
         return []
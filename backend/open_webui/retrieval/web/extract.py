@@ -0,0 +1,319 @@
+import re
+from html.parser import HTMLParser
+from typing import Callable, Optional
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# Elements whose content is never page text
+SKIPPED_TAGS = {
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "svg",
+    "canvas",
+    "iframe",
+    "object",
+    "select",
+    "button",
+}
+
+# Page furniture around the main content
+BOILERPLATE_TAGS = {"nav", "header", "footer", "aside", "form", "dialog"}
+BOILERPLATE_ROLES = {
+    "navigation",
+    "banner",
+    "contentinfo",
+    "complementary",
+    "search",
+    "dialog",
+    "menu",
+    "menubar",
+}
+BOILERPLATE_PATTERN = re.compile(
+    r"(^|[-_])(nav|navbar|menu|footer|sidebar|breadcrumbs?|cookies?|consent|"
+    r"banner|advert|ads|share|social|related|popup|modal|newsletter|subscribe)"
+    r"([-_]|$)",
+    re.IGNORECASE,
+)
+# Classes of a page state rather than of furniture, e.g. "no-sidebar" or
+# "menu-open" on the <body> or the page wrapper
+STATE_PATTERN = re.compile(
+    r"^(no|has|with|is)[-_]|[-_](open|closed|enabled|disabled|active|visible|"
+    r"hidden|expanded|collapsed)$",
+    re.IGNORECASE,
+)
+
+# Elements that start a new line of text
+BLOCK_TAGS = {
+    "address",
+    "article",
+    "blockquote",
+    "br",
+    "dd",
+    "div",
+    "dl",
+    "dt",
+    "figcaption",
+    "figure",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "hr",
+    "li",
+    "main",
+    "ol",
+    "p",
+    "pre",
+    "section",
+    "table",
+    "td",
+    "th",
+    "tr",
+    "ul",
+}
+
+VOID_TAGS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "param",
+    "source",
+    "track",
+    "wbr",
+}
+
+# Share of the page text the <main>/<article> content needs to be used alone
+MAIN_CONTENT_MIN_RATIO = 0.2
+
+
+class ContentHandler:
+    """
+    Collects the readable text and the metadata of a page from the events of
+    a streaming HTML parser, without building a tree. The text of boilerplate
+    elements is dropped when they close, unless they wrap <main>/<article>,
+    and the content of <main>/<article> is preferred when the page has enough
+    of it. Pages left without text fall back to all of their text.
+    """
+
+    def __init__(self, url: str):
+        self.metadata = {"source": url}
+        self.lines = []
+        self.main_lines = []
+        self.all_lines = []
+        self.line = []
+        # Open elements being skipped and open main content elements
+        self.skip_tag: Optional[str] = None
+        self.skip_depth = 0
+        self.main_tag: Optional[str] = None
+        self.main_depth = 0
+        # Open boilerplate elements: [tag, depth, first line, first main
+        # line, whether it wraps main content]
+        self.boilerplate = []
+        self.in_title = False
+        self.title = []
+
+    def _is_skipped(self, tag: str, attrs: dict) -> bool:
+        if tag in SKIPPED_TAGS:
+            return True
+        return attrs.get("aria-hidden") == "true" or "hidden" in attrs
+
+    def _is_boilerplate(self, tag: str, attrs: dict) -> bool:
+        if tag in BOILERPLATE_TAGS:
+            return True
+        if (attrs.get("role") or "").lower() in BOILERPLATE_ROLES:
+            return True
+        names = (attrs.get("class") or "").split() + [attrs.get("id") or ""]
+        return any(
+            BOILERPLATE_PATTERN.search(name) and not STATE_PATTERN.search(name)
+            for name in names
+        )
+
+    def _break_line(self):
+        if self.line:
+            text = " ".join("".join(self.line).split())
+            if text:
+                self.lines.append(text)
+                self.all_lines.append(text)
+                if self.main_depth:
+                    self.main_lines.append(text)
+            self.line = []
+
+    def start(self, tag: str, attrs: dict):
+        tag = tag.lower()
+        if self.skip_depth:
+            if tag == self.skip_tag and tag not in VOID_TAGS:
+                self.skip_depth += 1
+            return
+
+        if tag == "html" and "language" not in self.metadata:
+            self.metadata["language"] = attrs.get("lang") or "No language found."
+        elif tag == "title" and "title" not in self.metadata:
+            self.in_title = True
+        elif tag == "meta" and (attrs.get("name") or "").lower() == "description":
+            self.metadata.setdefault(
+                "description", attrs.get("content") or "No description found."
+            )
+
+        if tag in ("head", "title", "meta", "link", "base"):
+            return
+
+        if tag not in ("html", "body") and self._is_skipped(tag, attrs):
+            if tag not in VOID_TAGS:
+                self.skip_tag = tag
+                self.skip_depth = 1
+            return
+
+        if tag in BLOCK_TAGS:
+            self._break_line()
+        if tag in VOID_TAGS:
+            pass
+        elif tag not in ("html", "body") and self._is_boilerplate(tag, attrs):
+            self._break_line()
+            self.boilerplate.append(
+                [tag, 1, len(self.lines), len(self.main_lines), False]
+            )
+        elif self.boilerplate and tag == self.boilerplate[-1][0]:
+            self.boilerplate[-1][1] += 1
+
+        if tag in ("main", "article"):
+            if self.main_tag is None:
+                self.main_tag = tag
+            if tag == self.main_tag:
+                self.main_depth += 1
+            # A page wrapper matching the boilerplate rules is kept
+            for element in self.boilerplate:
+                element[4] = True
+
+    def end(self, tag: str):
+        tag = tag.lower()
+        if self.skip_depth:
+            if tag == self.skip_tag:
+                self.skip_depth -= 1
+            return
+
+        if tag == "title" and self.in_title:
+            self.in_title = False
+            self.metadata["title"] = " ".join("".join(self.title).split())
+            return
+
+        if tag in BLOCK_TAGS:
+            self._break_line()
+        if tag == self.main_tag and self.main_depth:
+            self._break_line()
+            self.main_depth -= 1
+        if self.boilerplate and tag == self.boilerplate[-1][0]:
+            element = self.boilerplate[-1]
+            element[1] -= 1
+            if element[1] == 0:
+                self._break_line()
+                self.boilerplate.pop()
+                _, _, lines_start, main_lines_start, wraps_main = element
+                if not wraps_main:
+                    del self.lines[lines_start:]
+                    del self.main_lines[main_lines_start:]
+
+    def data(self, data: str):
+        if self.in_title:
+            self.title.append(data)
+        elif not self.skip_depth:
+            self.line.append(data)
+
+    def close(self) -> str:
+        self.in_title = False
+        self._break_line()
+        text_length = sum(len(line) for line in self.lines)
+        main_length = sum(len(line) for line in self.main_lines)
+        if self.main_lines and main_length >= MAIN_CONTENT_MIN_RATIO * text_length:
+            return "\n".join(self.main_lines)
+        return "\n".join(self.lines or self.all_lines)
+
+
+class StdlibContentParser(HTMLParser):
+    """Feeds the events of Python's HTMLParser into a ContentHandler."""
+
+    def __init__(self, handler: ContentHandler):
+        super().__init__(convert_charrefs=True)
+        self.handler = handler
+
+    def handle_starttag(self, tag, attrs):
+        self.handler.start(tag, dict(attrs))
+
+    def handle_endtag(self, tag):
+        self.handler.end(tag)
+
+    def handle_data(self, data):
+        self.handler.data(data)
+
+
+class LxmlContentTarget:
+    """Feeds the events of lxml's HTML parser into a ContentHandler."""
+
+    def __init__(self, handler: ContentHandler):
+        self.handler = handler
+
+    def start(self, tag, attrib):
+        self.handler.start(tag, dict(attrib))
+
+    def end(self, tag):
+        self.handler.end(tag)
+
+    def data(self, data):
+        self.handler.data(data)
+
+    def close(self):
+        pass
+
+
+def extract_fast(html: str, url: str) -> tuple[str, dict]:
+    """
+    Extract the readable text and metadata of a page in one streaming pass,
+    with libxml2 when lxml is installed and Python's HTMLParser otherwise.
+    """
+    handler = ContentHandler(url)
+    if etree is not None:
+        parser = etree.HTMLParser(
+            target=LxmlContentTarget(handler), remove_comments=True
+        )
+    else:
+        parser = StdlibContentParser(handler)
+    parser.feed(html)
+    parser.close()
+    return handler.close(), handler.metadata
+
+
+def extract_bs4(html: str, url: str) -> tuple[str, dict]:
+    """Extract the text of the whole page with BeautifulSoup."""
+    from bs4 import BeautifulSoup
+
+    from open_webui.retrieval.web.utils import extract_metadata
+
+    soup = BeautifulSoup(html, "xml" if url.endswith(".xml") else "html.parser")
+    return soup.get_text(), extract_metadata(soup, url)
+
+
+WEB_CONTENT_EXTRACTORS: dict[str, Callable[[str, str], tuple[str, dict]]] = {
+    "fast": extract_fast,
+    "bs4": extract_bs4,
+}
+
+
+def extract_page(extractor: str, html: str, url: str) -> tuple[str, dict]:
+    # Runs inside an extraction worker process when the pool is enabled.
+    # XML documents are not HTML pages, they keep the BeautifulSoup path.
+    if url.endswith(".xml"):
+        extractor = "bs4"
+    return WEB_CONTENT_EXTRACTORS.get(extractor, extract_fast)(html, url)
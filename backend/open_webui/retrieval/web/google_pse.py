@@ -1,15 +1,14 @@
 import logging
 from typing import Optional
 
-import requests
-from open_webui.retrieval.web.main import SearchResult, get_filtered_results
+from open_webui.retrieval.web.main import SearchResult, get_json, normalize_results
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
-def search_google_pse(
+async def search_google_pse(
     api_key: str,
     search_engine_id: str,
     query: str,
@@ -32,6 +31,7 @@ def search_google_pse(
     url = "https://www.googleapis.com/customsearch/v1"
     headers = {"Content-Type": "application/json"}
     all_results = []
+    total = count
     start_index = 1  # Google PSE start parameter is 1-based
 
     while count > 0:
@@ -43,9 +43,7 @@ def search_google_pse(
             "num": num_results_this_page,
             "start": start_index,
         }
-        response = requests.request("GET", url, headers=headers, params=params)
-        response.raise_for_status()
-        json_response = response.json()
+        json_response = await get_json("GET", url, headers=headers, params=params)
         results = json_response.get("items", [])
         if results:  # check if results are returned. If not, no more pages to fetch.
             all_results.extend(results)
@@ -56,14 +54,4 @@ def search_google_pse(
         else:
             break  # No more results from Google PSE, break the loop
 
-    if filter_list:
-        all_results = get_filtered_results(all_results, filter_list)
-
-    return [
-        SearchResult(
-            link=result["link"],
-            title=result.get("title"),
-            snippet=result.get("snippet"),
-        )
-        for result in all_results
-    ]
+    return normalize_results(all_results, total, filter_list, link="link")
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from langchain_core.documents import Document
+
+from open_webui.constants import ERROR_MESSAGES
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class WebSearchIngestion:
+    """
+    The pages of a web search embedded into one collection as they are
+    loaded. `save(documents, overwrite)` indexes a page and returns its
+    number of chunks, the first page indexed replaces the collection.
+
+    Callers wait until `min_chunks` chunks or `min_pages` pages are indexed,
+    or a deadline, while the remaining pages keep being indexed in the
+    background. `on_done` is called once all pages are indexed.
+    """
+
+    def __init__(
+        self,
+        collection_name: str,
+        documents: AsyncIterator[Document],
+        save: Callable[[list[Document], bool], int],
+        min_chunks: int = 0,
+        min_pages: int = 0,
+        on_done: Optional[Callable[["WebSearchIngestion"], None]] = None,
+    ):
+        self.collection_name = collection_name
+        self.documents = documents
+        self.save = save
+        self.min_chunks = min_chunks
+        self.min_pages = min_pages
+        self.on_done = on_done
+
+        self.pages = 0
+        self.chunks = 0
+        self.error: Optional[Exception] = None
+        self.task: Optional[asyncio.Task] = None
+        # Set once there is enough context, or once anything is indexed
+        self.enough = asyncio.Event()
+        self.indexed = asyncio.Event()
+
+    def has_enough(self) -> bool:
+        return bool(
+            (self.min_chunks and self.chunks >= self.min_chunks)
+            or (self.min_pages and self.pages >= self.min_pages)
+        )
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+        WEB_SEARCH_INGESTIONS[self.collection_name] = self
+        self.task.add_done_callback(
+            lambda _: WEB_SEARCH_INGESTIONS.pop(self.collection_name, None)
+        )
+
+    async def run(self):
+        overwrite = True
+        try:
+            async for document in self.documents:
+                try:
+                    chunks = await run_in_threadpool(self.save, [document], overwrite)
+                except Exception as e:
+                    log.warning(
+                        f"Error indexing {document.metadata.get('source')} "
+                        f"into {self.collection_name}: {e}"
+                    )
+                    continue
+                if not chunks:
+                    continue
+
+                overwrite = False
+                self.pages += 1
+                self.chunks += chunks
+                self.indexed.set()
+                if self.has_enough():
+                    self.enough.set()
+
+            log.info(
+                f"Indexed {self.chunks} chunks of {self.pages} pages "
+                f"into {self.collection_name}"
+            )
+            if self.pages and self.on_done:
+                self.on_done(self)
+        except Exception as e:
+            log.exception(e)
+            self.error = e
+        finally:
+            self.indexed.set()
+            self.enough.set()
+
+    async def wait(self, deadline: Optional[float] = None):
+        """
+        Wait until there is enough context, or for `deadline` seconds and
+        then until at least one page is indexed.
+        """
+        try:
+            await asyncio.wait_for(self.enough.wait(), timeout=deadline or None)
+        except asyncio.TimeoutError:
+            log.info(
+                f"Continuing with {self.pages} pages indexed into "
+                f"{self.collection_name} after {deadline}s"
+            )
+            await self.indexed.wait()
+
+        if not self.pages:
+            raise self.error or ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+
+
+# Ingestions still indexing pages, by collection name, joined by identical
+# searches instead of starting over
+WEB_SEARCH_INGESTIONS: dict[str, WebSearchIngestion] = {}
@@ -1,7 +1,6 @@
 import logging
 
-import requests
-from open_webui.retrieval.web.main import SearchResult
+from open_webui.retrieval.web.main import SearchResult, get_json, normalize_results
 from open_webui.env import SRC_LOG_LEVELS
 from yarl import URL
 
@@ -9,7 +8,7 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
-def search_jina(api_key: str, query: str, count: int) -> list[SearchResult]:
+async def search_jina(api_key: str, query: str, count: int) -> list[SearchResult]:
     """
     Search using Jina's Search API and return the results as a list of SearchResult objects.
     Args:
@@ -31,18 +30,5 @@ def search_jina(api_key: str, query: str, count: int) -> list[SearchResult]:
     payload = {"q": query, "count": count if count <= 10 else 10}
 
     url = str(URL(jina_search_endpoint))
-    response = requests.post(url, headers=headers, json=payload)
-    response.raise_for_status()
-    data = response.json()
-
-    results = []
-    for result in data["data"]:
-        results.append(
-            SearchResult(
-                link=result["url"],
-                title=result.get("title"),
-                snippet=result.get("content"),
-            )
-        )
-
-    return results
+    data = await get_json("POST", url, headers=headers, json=payload)
+    return normalize_results(data["data"], payload["count"], snippet="content")
@@ -1,15 +1,14 @@
 import logging
 from typing import Optional
 
-import requests
-from open_webui.retrieval.web.main import SearchResult, get_filtered_results
+from open_webui.retrieval.web.main import SearchResult, get_json, normalize_results
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
-def search_kagi(
+async def search_kagi(
     api_key: str, query: str, count: int, filter_list: Optional[list[str]] = None
 ) -> list[SearchResult]:
     """Search using Kagi's Search API and return the results as a list of SearchResult objects.
@@ -27,22 +26,9 @@ def search_kagi(
     }
     params = {"q": query, "limit": count}
 
-    response = requests.get(url, headers=headers, params=params)
-    response.raise_for_status()
-    json_response = response.json()
-    search_results = json_response.get("data", [])
-
-    results = [
-        SearchResult(
-            link=result["url"], title=result["title"], snippet=result.get("snippet")
-        )
-        for result in search_results
-        if result["t"] == 0
+    json_response = await get_json("GET", url, headers=headers, params=params)
+    # Search results have type 0, related searches are listed too
+    search_results = [
+        result for result in json_response.get("data", []) if result.get("t") == 0
     ]
-
-    print(results)
-
-    if filter_list:
-        results = get_filtered_results(results, filter_list)
-
-    return results
+    return normalize_results(search_results, count, filter_list)
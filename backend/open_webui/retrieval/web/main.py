@@ -1,21 +1,79 @@
+import asyncio
 import validators
 
 from typing import Optional
 from urllib.parse import urlparse
 
+import aiohttp
 from pydantic import BaseModel
 
 
+# Seconds a search engine has to answer. Engines that crawl or summarize the
+# result pages before answering get longer.
+DEFAULT_SEARCH_ENGINE_TIMEOUT = 10
+SEARCH_ENGINE_TIMEOUTS = {
+    "bocha": 20,
+    "exa": 30,
+    "jina": 30,
+    "tavily": 20,
+}
+
+# Connections kept open to the search engines, shared by all requests
+SEARCH_ENGINE_POOL_SIZE = 100
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_search_engine_timeout(engine: str) -> float:
+    return SEARCH_ENGINE_TIMEOUTS.get(engine, DEFAULT_SEARCH_ENGINE_TIMEOUT)
+
+
+def get_session() -> aiohttp.ClientSession:
+    # Created on first use so that it is bound to the running event loop
+    global _session
+    if (
+        _session is None
+        or _session.closed
+        or _session._loop is not asyncio.get_running_loop()
+    ):
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=SEARCH_ENGINE_POOL_SIZE, ttl_dns_cache=300
+            ),
+            # Proxy settings from the environment apply, as they did with requests
+            trust_env=True,
+        )
+    return _session
+
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def get_json(method: str, url: str, **kwargs):
+    async with get_session().request(method, url, **kwargs) as response:
+        response.raise_for_status()
+        # Some engines answer JSON with a text/html or text/plain content type
+        return await response.json(content_type=None)
+
+
+def is_allowed_url(url: str, filter_list: list[str]) -> bool:
+    if not validators.url(url):
+        return False
+    domain = urlparse(url).netloc
+    return any(domain.endswith(filtered_domain) for filtered_domain in filter_list)
+
+
 def get_filtered_results(results, filter_list):
     if not filter_list:
         return results
     filtered_results = []
     for result in results:
         url = result.get("url") or result.get("link", "")
-        if not validators.url(url):
-            continue
-        domain = urlparse(url).netloc
-        if any(domain.endswith(filtered_domain) for filtered_domain in filter_list):
+        if is_allowed_url(url, filter_list):
             filtered_results.append(result)
     return filtered_results
 
@@ -24,3 +82,34 @@ class SearchResult(BaseModel):
     link: str
     title: Optional[str]
     snippet: Optional[str]
+
+
+def normalize_results(
+    results: list[dict],
+    count: int,
+    filter_list: Optional[list[str]] = None,
+    link: str = "url",
+    title: str = "title",
+    snippet: str = "snippet",
+) -> list[SearchResult]:
+    """
+    Turn the raw results of a search engine into at most `count`
+    SearchResults, keeping their order. Results without a link, outside the
+    domains of `filter_list` or repeating an earlier link are dropped.
+    """
+    search_results = []
+    seen = set()
+    for result in results:
+        url = result.get(link)
+        if not url or url in seen:
+            continue
+        if filter_list and not is_allowed_url(url, filter_list):
+            continue
+
+        seen.add(url)
+        search_results.append(
+            SearchResult(link=url, title=result.get(title), snippet=result.get(snippet))
+        )
+        if len(search_results) >= count:
+            break
+    return search_results
@@ -1,15 +1,14 @@
 import logging
 from typing import Optional
 
-import requests
-from open_webui.retrieval.web.main import SearchResult, get_filtered_results
+from open_webui.retrieval.web.main import SearchResult, get_json, normalize_results
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
-def search_searxng(
+async def search_searxng(
     query_url: str,
     query: str,
     count: int,
@@ -36,7 +35,7 @@ def search_searxng(
         list[SearchResult]: A list of SearchResults sorted by relevance score in descending order.
 
     Raise:
-        requests.exceptions.RequestException: If a request error occurs during the search process.
+        aiohttp.ClientError: If a request error occurs during the search process.
     """
 
     # Default values for optional parameters are provided as empty strings or None when not specified.
@@ -64,7 +63,8 @@ def search_searxng(
 
     log.debug(f"searching {query_url}")
 
-    response = requests.get(
+    json_response = await get_json(
+        "GET",
         query_url,
         headers={
             "User-Agent": "Open WebUI (https://github.com/open-webui/open-webui) RAG Bot",
@@ -76,16 +76,6 @@ def search_searxng(
         params=params,
     )
 
-    response.raise_for_status()  # Raise an exception for HTTP errors.
-
-    json_response = response.json()
     results = json_response.get("results", [])
     sorted_results = sorted(results, key=lambda x: x.get("score", 0), reverse=True)
-    if filter_list:
-        sorted_results = get_filtered_results(sorted_results, filter_list)
-    return [
-        SearchResult(
-            link=result["url"], title=result.get("title"), snippet=result.get("content")
-        )
-        for result in sorted_results[:count]
-    ]
+    return normalize_results(sorted_results, count, filter_list, snippet="content")
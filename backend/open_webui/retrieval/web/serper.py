@@ -1,16 +1,14 @@
-import json
 import logging
 from typing import Optional
 
-import requests
-from open_webui.retrieval.web.main import SearchResult, get_filtered_results
+from open_webui.retrieval.web.main import SearchResult, get_json, normalize_results
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
-def search_serper(
+async def search_serper(
     api_key: str, query: str, count: int, filter_list: Optional[list[str]] = None
 ) -> list[SearchResult]:
     """Search using serper.dev's API and return the results as a list of SearchResult objects.
@@ -21,23 +19,13 @@ def search_serper(
     """
     url = "https://google.serper.dev/search"
 
-    payload = json.dumps({"q": query})
+    payload = {"q": query}
     headers = {"X-API-KEY": api_key, "Content-Type": "application/json"}
 
-    response = requests.request("POST", url, headers=headers, data=payload)
-    response.raise_for_status()
-
-    json_response = response.json()
+    json_response = await get_json("POST", url, headers=headers, json=payload)
     results = sorted(
         json_response.get("organic", []), key=lambda x: x.get("position", 0)
     )
-    if filter_list:
-        results = get_filtered_results(results, filter_list)
-    return [
-        SearchResult(
-            link=result["link"],
-            title=result.get("title"),
-            snippet=result.get("description"),
-        )
-        for result in results[:count]
-    ]
+    return normalize_results(
+        results, count, filter_list, link="link", snippet="description"
+    )
@@ -2,15 +2,15 @@ import logging
 from typing import Optional
 from urllib.parse import urlencode
 
-import requests
-from open_webui.retrieval.web.main import SearchResult, get_filtered_results
+from open_webui.retrieval.web.main import SearchResult, get_json, normalize_results
+from yarl import URL
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
-def search_serply(
+async def search_serply(
     api_key: str,
     query: str,
     count: int,
@@ -48,22 +48,13 @@ def search_serply(
         "X-Proxy-Location": proxy_location,
     }
 
-    response = requests.request("GET", url, headers=headers)
-    response.raise_for_status()
-
-    json_response = response.json()
+    # The query is part of the path, it must not be quoted again
+    json_response = await get_json("GET", URL(url, encoded=True), headers=headers)
     log.info(f"results from serply search: {json_response}")
 
     results = sorted(
         json_response.get("results", []), key=lambda x: x.get("realPosition", 0)
     )
-    if filter_list:
-        results = get_filtered_results(results, filter_list)
-    return [
-        SearchResult(
-            link=result["link"],
-            title=result.get("title"),
-            snippet=result.get("description"),
-        )
-        for result in results[:count]
-    ]
+    return normalize_results(
+        results, count, filter_list, link="link", snippet="description"
+    )
@@ -1,15 +1,14 @@
 import logging
 from typing import Optional
 
-import requests
-from open_webui.retrieval.web.main import SearchResult, get_filtered_results
+from open_webui.retrieval.web.main import SearchResult, get_json, normalize_results
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
-def search_serpstack(
+async def search_serpstack(
     api_key: str,
     query: str,
     count: int,
@@ -31,18 +30,8 @@ def search_serpstack(
         "query": query,
     }
 
-    response = requests.request("POST", url, headers=headers, params=params)
-    response.raise_for_status()
-
-    json_response = response.json()
+    json_response = await get_json("POST", url, headers=headers, params=params)
     results = sorted(
         json_response.get("organic_results", []), key=lambda x: x.get("position", 0)
     )
-    if filter_list:
-        results = get_filtered_results(results, filter_list)
-    return [
-        SearchResult(
-            link=result["url"], title=result.get("title"), snippet=result.get("snippet")
-        )
-        for result in results[:count]
-    ]
+    return normalize_results(results, count, filter_list)
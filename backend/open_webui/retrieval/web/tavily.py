@@ -1,15 +1,14 @@
 import logging
 from typing import Optional
 
-import requests
-from open_webui.retrieval.web.main import SearchResult
+from open_webui.retrieval.web.main import SearchResult, get_json, normalize_results
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
-def search_tavily(
+async def search_tavily(
     api_key: str,
     query: str,
     count: int,
@@ -27,18 +26,6 @@ def search_tavily(
     """
     url = "https://api.tavily.com/search"
     data = {"query": query, "api_key": api_key}
-    response = requests.post(url, json=data)
-    response.raise_for_status()
-
-    json_response = response.json()
-
+    json_response = await get_json("POST", url, json=data)
     raw_search_results = json_response.get("results", [])
-
-    return [
-        SearchResult(
-            link=result["url"],
-            title=result.get("title", ""),
-            snippet=result.get("content"),
-        )
-        for result in raw_search_results[:count]
-    ]
+    return normalize_results(raw_search_results, count, snippet="content")
@@ -5,6 +5,9 @@ import ssl
 import urllib.parse
 import urllib.request
 from collections import defaultdict
+from contextlib import aclosing
+from concurrent.futures import TimeoutError
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, time, timedelta
 from typing import (
     Any,
@@ -17,7 +20,6 @@ from typing import (
     Union,
     Literal,
 )
-import aiohttp
 import certifi
 import validators
 from langchain_community.document_loaders import PlaywrightURLLoader, WebBaseLoader
@@ -29,10 +31,22 @@ from open_webui.config import (
     ENABLE_RAG_LOCAL_WEB_FETCH,
     PLAYWRIGHT_WS_URI,
     RAG_WEB_LOADER_ENGINE,
+    RAG_WEB_LOADER_EXTRACTOR,
+    RAG_WEB_LOADER_CONCURRENT_REQUESTS_PER_HOST,
+    RAG_WEB_LOADER_MAX_CONTENT_LENGTH,
+    RAG_WEB_LOADER_TIMEOUT,
     FIRECRAWL_API_BASE_URL,
     FIRECRAWL_API_KEY,
 )
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.retrieval.loaders.main import get_extraction_pool
+from open_webui.retrieval.web.browser import BrowserContextPool, get_browser_pool
+from open_webui.retrieval.web.cache import WEB_FETCH_CACHE
+from open_webui.retrieval.web.crawler import Crawler
+from open_webui.retrieval.web.extract import extract_page
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    CONTENT_EXTRACTION_WORKERS,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
@@ -95,6 +109,37 @@ def extract_metadata(soup, url):
     return metadata
 
 
+def extract_web_page(html: str, url: str) -> tuple[str, dict]:
+    """Extract the text and metadata of a fetched page, in the extraction
+    process pool when it is enabled."""
+    if CONTENT_EXTRACTION_WORKERS <= 0:
+        return extract_page(RAG_WEB_LOADER_EXTRACTOR, html, url)
+
+    future = get_extraction_pool("web").submit(
+        extract_page, RAG_WEB_LOADER_EXTRACTOR, html, url
+    )
+    try:
+        return future.result()
+    except (TimeoutError, BrokenProcessPool) as e:
+        raise Exception(f"Error extracting content from {url}: {e}")
+
+
+async def aextract_web_page(html: str, url: str) -> tuple[str, dict]:
+    """Async version of extract_web_page."""
+    if CONTENT_EXTRACTION_WORKERS <= 0:
+        return await asyncio.to_thread(
+            extract_page, RAG_WEB_LOADER_EXTRACTOR, html, url
+        )
+
+    future = get_extraction_pool("web").submit(
+        extract_page, RAG_WEB_LOADER_EXTRACTOR, html, url
+    )
+    try:
+        return await asyncio.wrap_future(future)
+    except (TimeoutError, BrokenProcessPool) as e:
+        raise Exception(f"Error extracting content from {url}: {e}")
+
+
 def verify_ssl_cert(url: str) -> bool:
     """Verify SSL certificate for the given URL."""
     if not url.startswith("https://"):
@@ -184,7 +229,7 @@ class SafeFireCrawlLoader(BaseLoader):
                 yield from loader.lazy_load()
             except Exception as e:
                 if self.continue_on_failure:
-                    log.exception(e, "Error loading %s", url)
+                    log.exception(f"Error loading {url}: {e}")
                     continue
                 raise e
 
@@ -204,7 +249,7 @@ class SafeFireCrawlLoader(BaseLoader):
                     yield document
             except Exception as e:
                 if self.continue_on_failure:
-                    log.exception(e, "Error loading %s", url)
+                    log.exception(f"Error loading {url}: {e}")
                     continue
                 raise e
 
@@ -320,53 +365,80 @@ class SafePlaywrightURLLoader(PlaywrightURLLoader):
                     yield Document(page_content=text, metadata=metadata)
                 except Exception as e:
                     if self.continue_on_failure:
-                        log.exception(e, "Error loading %s", url)
+                        log.exception(f"Error loading {url}: {e}")
                         continue
                     raise e
             browser.close()
 
-    async def alazy_load(self) -> AsyncIterator[Document]:
-        """Safely load URLs asynchronously with support for remote browser."""
-        from playwright.async_api import async_playwright
+    async def _aload_url(self, pool: BrowserContextPool, url: str) -> Document:
+        await self._safe_process_url(url)
+        async with pool.context(proxy=self.proxy) as context:
+            page = await context.new_page()
+            try:
+                response = await page.goto(url)
+                if response is None:
+                    raise ValueError(f"page.goto() returned None for url {url}")
 
-        async with async_playwright() as p:
-            # Use remote browser if ws_endpoint is provided, otherwise use local browser
-            if self.playwright_ws_url:
-                browser = await p.chromium.connect(self.playwright_ws_url)
-            else:
-                browser = await p.chromium.launch(
-                    headless=self.headless, proxy=self.proxy
-                )
+                text = await self.evaluator.evaluate_async(page, pool.browser, response)
+            finally:
+                await page.close()
+        return Document(page_content=text, metadata={"source": url})
 
-            for url in self.urls:
-                try:
-                    await self._safe_process_url(url)
-                    page = await browser.new_page()
-                    response = await page.goto(url)
-                    if response is None:
-                        raise ValueError(f"page.goto() returned None for url {url}")
+    async def alazy_load_as_completed(self) -> AsyncIterator[Document]:
+        """Safely load URLs asynchronously, each page as soon as it is rendered."""
+        pool = await get_browser_pool(self.playwright_ws_url)
 
-                    text = await self.evaluator.evaluate_async(page, browser, response)
-                    metadata = {"source": url}
-                    yield Document(page_content=text, metadata=metadata)
-                except Exception as e:
+        async def load(url: str):
+            try:
+                return url, await self._aload_url(pool, url)
+            except Exception as e:
+                return url, e
+
+        tasks = [asyncio.create_task(load(url)) for url in self.urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                url, document = await next_done
+                if isinstance(document, Exception):
                     if self.continue_on_failure:
-                        log.exception(e, "Error loading %s", url)
+                        log.exception(f"Error loading {url}: {document}")
                         continue
-                    raise e
-            await browser.close()
+                    raise document
+                yield document
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def alazy_load(self) -> AsyncIterator[Document]:
+        """Safely load URLs asynchronously on the shared browser context pool."""
+        pool = await get_browser_pool(self.playwright_ws_url)
+
+        # Pages render concurrently, as many as the pool has contexts
+        documents = await asyncio.gather(
+            *[self._aload_url(pool, url) for url in self.urls],
+            return_exceptions=True,
+        )
+        for url, document in zip(self.urls, documents):
+            if isinstance(document, Exception):
+                if self.continue_on_failure:
+                    log.exception(f"Error loading {url}: {document}")
+                    continue
+                raise document
+            yield document
 
     def _verify_ssl_cert(self, url: str) -> bool:
         return verify_ssl_cert(url)
 
     async def _wait_for_rate_limit(self):
         """Wait to respect the rate limit if specified."""
+        # The slot is reserved before waiting, pages are loaded concurrently
+        now = datetime.now()
+        request_time = now
         if self.requests_per_second and self.last_request_time:
             min_interval = timedelta(seconds=1.0 / self.requests_per_second)
-            time_since_last = datetime.now() - self.last_request_time
-            if time_since_last < min_interval:
-                await asyncio.sleep((min_interval - time_since_last).total_seconds())
-        self.last_request_time = datetime.now()
+            request_time = max(now, self.last_request_time + min_interval)
+        self.last_request_time = request_time
+        if request_time > now:
+            await asyncio.sleep((request_time - now).total_seconds())
 
     def _sync_wait_for_rate_limit(self):
         """Synchronous version of rate limit wait."""
@@ -393,46 +465,141 @@ class SafePlaywrightURLLoader(PlaywrightURLLoader):
 
 
 class SafeWebBaseLoader(WebBaseLoader):
-    """WebBaseLoader with enhanced error handling for URLs."""
+    """WebBaseLoader with enhanced error handling for URLs.
 
-    def __init__(self, trust_env: bool = False, *args, **kwargs):
+    Pages are fetched by a Crawler, `requests_per_second` applies to each
+    host instead of all of them, across all the loaders fetching from it.
+    """
+
+    def __init__(
+        self,
+        trust_env: bool = False,
+        *args,
+        time_budget: Optional[float] = RAG_WEB_LOADER_TIMEOUT,
+        max_content_length: Optional[int] = RAG_WEB_LOADER_MAX_CONTENT_LENGTH,
+        **kwargs,
+    ):
         """Initialize SafeWebBaseLoader
         Args:
             trust_env (bool, optional): set to True if using proxy to make web requests, for example
                 using http(s)_proxy environment variables. Defaults to False.
+            time_budget (float, optional): seconds spent fetching pages, pages still
+                loading after it are dropped. Defaults to RAG_WEB_LOADER_TIMEOUT.
+            max_content_length (int, optional): characters of page text after which
+                the remaining pages are not fetched. Defaults to RAG_WEB_LOADER_MAX_CONTENT_LENGTH.
         """
         super().__init__(*args, **kwargs)
         self.trust_env = trust_env
-
-    async def _fetch(
-        self, url: str, retries: int = 3, cooldown: int = 2, backoff: float = 1.5
-    ) -> str:
-        async with aiohttp.ClientSession(trust_env=self.trust_env) as session:
-            for i in range(retries):
-                try:
-                    kwargs: Dict = dict(
-                        headers=self.session.headers,
-                        cookies=self.session.cookies.get_dict(),
-                    )
-                    if not self.session.verify:
-                        kwargs["ssl"] = False
-
-                    async with session.get(
-                        url, **(self.requests_kwargs | kwargs)
-                    ) as response:
-                        if self.raise_for_status:
-                            response.raise_for_status()
-                        return await response.text()
-                except aiohttp.ClientConnectionError as e:
-                    if i == retries - 1:
-                        raise
-                    else:
-                        log.warning(
-                            f"Error fetching {url} with attempt "
-                            f"{i + 1}/{retries}: {e}. Retrying..."
+        self.time_budget = time_budget
+        self.max_content_length = max_content_length
+        # Cache entries of the pages being loaded and the validators of the
+        # pages fetched again
+        self.cached_pages: Dict[str, dict] = {}
+        self.page_validators: Dict[str, tuple] = {}
+
+    def _get_cached_pages(self) -> Dict[str, dict]:
+        if WEB_FETCH_CACHE is None:
+            return {}
+
+        cached_pages = {}
+        for path in self.web_paths:
+            entry = WEB_FETCH_CACHE.get(path)
+            if entry is not None:
+                cached_pages[path] = entry
+        return cached_pages
+
+    def _get_request_headers(self, url: str) -> Dict:
+        headers = dict(self.session.headers)
+        if entry := self.cached_pages.get(url):
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _get_request_kwargs(self, url: str) -> Dict:
+        kwargs: Dict = dict(
+            headers=self._get_request_headers(url),
+            cookies=self.session.cookies.get_dict(),
+        )
+        if not self.session.verify:
+            kwargs["ssl"] = False
+        return self.requests_kwargs | kwargs
+
+    async def _crawl(self, urls: List[str]) -> AsyncIterator[tuple]:
+        """Yield (url, html) as pages arrive, html is None if a page is unchanged."""
+        crawler = Crawler(
+            host_concurrency=RAG_WEB_LOADER_CONCURRENT_REQUESTS_PER_HOST,
+            host_requests_per_second=self.requests_per_second,
+            time_budget=self.time_budget,
+            trust_env=self.trust_env,
+        )
+        async with aclosing(crawler.crawl(urls, self._get_request_kwargs)) as pages:
+            async for url, page in pages:
+                if not isinstance(page, Exception):
+                    if page.status == 304 and url in self.cached_pages:
+                        yield url, None
+                        continue
+                    if not (self.raise_for_status and page.status >= 400):
+                        self.page_validators[url] = (
+                            page.headers.get("ETag"),
+                            page.headers.get("Last-Modified"),
                         )
-                        await asyncio.sleep(cooldown * backoff**i)
-        raise ValueError("retry count exceeded")
+                        yield url, page.text
+                        continue
+                    page = ValueError(f"{page.status} response")
+
+                if not self.continue_on_failure:
+                    raise page
+                log.warning(f"Error fetching {url}, skipping: {page}")
+
+    async def fetch_all(self, urls: List[str]) -> Any:
+        """Fetch all urls concurrently with per-host limits."""
+        results = {}
+        async with aclosing(self._crawl(urls)) as pages:
+            async for url, html in pages:
+                # Unchanged pages are answered from the cache
+                results[url] = (
+                    html if html is not None else self.cached_pages[url]["html"]
+                )
+        return [results.get(url, "") for url in urls]
+
+    def _get_cached_document(self, url: str) -> Document:
+        # The site answered 304, the cached text is still current
+        entry = self.cached_pages[url]
+        WEB_FETCH_CACHE.touch(url, entry)
+        return Document(page_content=entry["text"], metadata=entry["metadata"])
+
+    def _get_document(self, url: str, html: Optional[str]) -> Document:
+        """Build the document of a page, `html` is None if it is unchanged."""
+        if html is None:
+            return self._get_cached_document(url)
+
+        text, metadata = extract_web_page(html, url)
+        return self._save_document(url, html, text, metadata)
+
+    async def _aget_document(self, url: str, html: Optional[str]) -> Document:
+        """Async version of _get_document."""
+        if html is None:
+            return await asyncio.to_thread(self._get_cached_document, url)
+
+        text, metadata = await aextract_web_page(html, url)
+        return await asyncio.to_thread(self._save_document, url, html, text, metadata)
+
+    def _save_document(
+        self, url: str, html: str, text: str, metadata: dict
+    ) -> Document:
+        if WEB_FETCH_CACHE is not None:
+            etag, last_modified = self.page_validators.get(url, (None, None))
+            WEB_FETCH_CACHE.set(
+                url,
+                html=html,
+                text=text,
+                metadata=metadata,
+                etag=etag,
+                last_modified=last_modified,
+            )
+        return Document(page_content=text, metadata=metadata)
 
     def _unpack_fetch_results(
         self, results: Any, urls: List[str], parser: Union[str, None] = None
@@ -459,36 +626,124 @@ class SafeWebBaseLoader(WebBaseLoader):
         results = await self.fetch_all(urls)
         return self._unpack_fetch_results(results, urls, parser=parser)
 
+    def _fetch_sync(self, url: str) -> Optional[str]:
+        response = self.session.get(
+            url, **(self.requests_kwargs | {"headers": self._get_request_headers(url)})
+        )
+        if response.status_code == 304 and url in self.cached_pages:
+            return None
+        if self.raise_for_status:
+            response.raise_for_status()
+        if self.encoding is not None:
+            response.encoding = self.encoding
+        elif self.autoset_encoding:
+            response.encoding = response.apparent_encoding
+        self.page_validators[url] = (
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+        return response.text
+
     def lazy_load(self) -> Iterator[Document]:
         """Lazy load text from the url(s) in web_path with error handling."""
+        self.cached_pages = self._get_cached_pages()
         for path in self.web_paths:
             try:
-                soup = self._scrape(path, bs_kwargs=self.bs_kwargs)
-                text = soup.get_text(**self.bs_get_text_kwargs)
-
-                # Build metadata
-                metadata = extract_metadata(soup, path)
-
-                yield Document(page_content=text, metadata=metadata)
+                entry = self.cached_pages.get(path)
+                if entry is not None and WEB_FETCH_CACHE.is_fresh(entry):
+                    yield Document(
+                        page_content=entry["text"], metadata=entry["metadata"]
+                    )
+                else:
+                    yield self._get_document(path, self._fetch_sync(path))
             except Exception as e:
                 # Log the error and continue with the next URL
-                log.exception(e, "Error loading %s", path)
+                log.exception(f"Error loading {path}: {e}")
+
+    async def _aload_as_completed(self) -> AsyncIterator[tuple[str, Document]]:
+        self.cached_pages = await asyncio.to_thread(self._get_cached_pages)
+        fresh_pages = {
+            path: entry
+            for path, entry in self.cached_pages.items()
+            if WEB_FETCH_CACHE.is_fresh(entry)
+        }
+
+        # Fresh pages are neither fetched nor parsed again
+        content_length = 0
+        for path, entry in fresh_pages.items():
+            content_length += len(entry["text"])
+            yield path, Document(page_content=entry["text"], metadata=entry["metadata"])
+        if self.max_content_length and content_length >= self.max_content_length:
+            return
+
+        # The other pages are extracted as they arrive, concurrently and in the
+        # process pool if enabled, and handed out in the order they are done
+        paths = [path for path in self.web_paths if path not in fresh_pages]
+        queue: asyncio.Queue = asyncio.Queue()
+        extractions: List[asyncio.Task] = []
+
+        async def extract(path: str, html: Optional[str]):
+            try:
+                queue.put_nowait((path, await self._aget_document(path, html)))
+            except Exception as e:
+                queue.put_nowait((path, e))
+
+        async def crawl():
+            try:
+                async with aclosing(self._crawl(paths)) as pages:
+                    async for path, html in pages:
+                        extractions.append(asyncio.create_task(extract(path, html)))
+            finally:
+                queue.put_nowait(None)
+
+        crawler = asyncio.create_task(crawl())
+        try:
+            crawled = False
+            extracted = 0
+            while not crawled or extracted < len(extractions):
+                item = await queue.get()
+                if item is None:
+                    crawled = True
+                    continue
+
+                extracted += 1
+                path, document = item
+                if isinstance(document, Exception):
+                    log.exception(f"Error loading {path}: {document}")
+                    continue
+
+                yield path, document
+                content_length += len(document.page_content)
+                if (
+                    self.max_content_length
+                    and content_length >= self.max_content_length
+                ):
+                    log.info(
+                        f"Collected {self.max_content_length} characters, "
+                        f"skipping the remaining pages"
+                    )
+                    break
+            else:
+                # Raises the fetch errors not skipped
+                await crawler
+        finally:
+            crawler.cancel()
+            for task in extractions:
+                task.cancel()
+
+    async def alazy_load_as_completed(self) -> AsyncIterator[Document]:
+        """Async lazy load text from the url(s) in web_path, each page as soon as it is loaded."""
+        async for _, document in self._aload_as_completed():
+            yield document
 
     async def alazy_load(self) -> AsyncIterator[Document]:
         """Async lazy load text from the url(s) in web_path."""
-        results = await self.ascrape_all(self.web_paths)
-        for path, soup in zip(self.web_paths, results):
-            text = soup.get_text(**self.bs_get_text_kwargs)
-            metadata = {"source": path}
-            if title := soup.find("title"):
-                metadata["title"] = title.get_text()
-            if description := soup.find("meta", attrs={"name": "description"}):
-                metadata["description"] = description.get(
-                    "content", "No description found."
-                )
-            if html := soup.find("html"):
-                metadata["language"] = html.get("lang", "No language found.")
-            yield Document(page_content=text, metadata=metadata)
+        documents = {
+            path: document async for path, document in self._aload_as_completed()
+        }
+        for path in self.web_paths:
+            if path in documents:
+                yield documents[path]
 
     async def aload(self) -> list[Document]:
         """Load data into Document objects."""
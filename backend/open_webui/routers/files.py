@@ -8,15 +8,17 @@ from urllib.parse import quote
 from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
 from fastapi.responses import FileResponse, StreamingResponse
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, ENABLE_INGESTION_QUEUE
 from open_webui.models.files import (
     FileForm,
     FileModel,
     FileModelResponse,
     Files,
 )
+from open_webui.models.jobs import IngestionJobModel, IngestionJobs
 from open_webui.routers.retrieval import ProcessFileForm, process_file
 from open_webui.routers.audio import transcribe
+from open_webui.retrieval.ingestion import INGESTION_QUEUE
 from open_webui.storage.provider import Storage
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from pydantic import BaseModel
@@ -67,6 +69,17 @@ def upload_file(
             ),
         )
 
+        if ENABLE_INGESTION_QUEUE:
+            # Extraction and embedding run on the ingestion workers, progress is
+            # reported through socket events and /files/jobs/{job_id}
+            job = INGESTION_QUEUE.submit(user.id, "file", {"file_id": id})
+            return FileModelResponse(
+                **{
+                    **file_item.model_dump(),
+                    "job_id": job.id,
+                }
+            )
+
         try:
             if file.content_type in [
                 "audio/mpeg",
@@ -125,6 +138,24 @@ async def list_files(user=Depends(get_verified_user)):
     return files
 
 
+############################
+# Get Ingestion Job By Id
+############################
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobModel)
+async def get_ingestion_job_by_id(job_id: str, user=Depends(get_verified_user)):
+    job = IngestionJobs.get_job_by_id(job_id)
+
+    if job and (job.user_id == user.id or user.role == "admin"):
+        return job
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+
 ############################
 # Delete All Files
 ############################
@@ -10,6 +10,7 @@ from open_webui.models.knowledge import (
     KnowledgeUserResponse,
 )
 from open_webui.models.files import Files, FileModel
+from open_webui.models.jobs import IngestionJobs
 from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
 from open_webui.routers.retrieval import (
     process_file,
@@ -17,6 +18,7 @@ from open_webui.routers.retrieval import (
     process_files_batch,
     BatchProcessFilesForm,
 )
+from open_webui.retrieval.ingestion import INGESTION_QUEUE
 from open_webui.storage.provider import Storage
 
 from open_webui.constants import ERROR_MESSAGES
@@ -24,7 +26,7 @@ from open_webui.utils.auth import get_verified_user
 from open_webui.utils.access_control import has_access, has_permission
 
 
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, ENABLE_INGESTION_QUEUE
 from open_webui.models.models import Models, ModelForm
 
 
@@ -33,6 +35,17 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 router = APIRouter()
 
+
+def check_file_processed(file_id: str):
+    # A file uploaded through the ingestion queue has no vectors until its
+    # job is done, adding it earlier would embed an empty document
+    if ENABLE_INGESTION_QUEUE and IngestionJobs.get_active_job_by_file_id(file_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=ERROR_MESSAGES.FILE_PROCESSING,
+        )
+
+
 ############################
 # getKnowledgeBases
 ############################
@@ -168,6 +181,7 @@ async def create_new_knowledge(
 
 class KnowledgeFilesResponse(KnowledgeResponse):
     files: list[FileModel]
+    job_id: Optional[str] = None
 
 
 @router.get("/{id}", response_model=Optional[KnowledgeFilesResponse])
@@ -280,6 +294,7 @@ def add_file_to_knowledge_by_id(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=ERROR_MESSAGES.NOT_FOUND,
         )
+    check_file_processed(file.id)
     if not file.data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -365,6 +380,7 @@ def update_file_from_knowledge_by_id(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=ERROR_MESSAGES.NOT_FOUND,
         )
+    check_file_processed(file.id)
 
     # Remove content from the vector database
     VECTOR_DB_CLIENT.delete(
@@ -623,8 +639,23 @@ def add_files_to_knowledge_batch(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"File {form.file_id} not found",
             )
+        check_file_processed(file.id)
         files.append(file)
 
+    if ENABLE_INGESTION_QUEUE:
+        # Files are added to the knowledge base by the ingestion workers as
+        # they finish processing
+        job = INGESTION_QUEUE.submit(
+            user.id,
+            "knowledge_batch",
+            {"knowledge_id": id, "file_ids": [file.id for file in files]},
+        )
+        return KnowledgeFilesResponse(
+            **knowledge.model_dump(),
+            files=Files.get_files_by_ids((knowledge.data or {}).get("file_ids", [])),
+            job_id=job.id,
+        )
+
     # Process files
     try:
         result = process_files_batch(
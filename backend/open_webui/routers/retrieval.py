@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import mimetypes
@@ -35,13 +36,20 @@ from open_webui.storage.provider import Storage
 
 
 from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
+from open_webui.retrieval.vector.migration import (
+    MIGRATION_PAGE_SIZE,
+    STAGING_SUFFIX,
+    copy_collection,
+)
 
 # Document loaders
 from open_webui.retrieval.loaders.main import Loader
-from open_webui.retrieval.loaders.youtube import YoutubeLoader
+from open_webui.retrieval.loaders.youtube import KeyLocks, YoutubeLoader
 
 # Web search engines
-from open_webui.retrieval.web.main import SearchResult
+from open_webui.retrieval.web.main import SearchResult, get_search_engine_timeout
+from open_webui.retrieval.web.cache import WEB_SEARCH_CACHE
+from open_webui.retrieval.web.ingest import WEB_SEARCH_INGESTIONS, WebSearchIngestion
 from open_webui.retrieval.web.utils import get_web_loader
 from open_webui.retrieval.web.brave import search_brave
 from open_webui.retrieval.web.kagi import search_kagi
@@ -62,11 +70,13 @@ from open_webui.retrieval.web.exa import search_exa
 
 
 from open_webui.retrieval.utils import (
+    RERANK_SCORE_CACHE,
+    embed_with_cache,
     get_embedding_function,
     get_model_path,
-    query_collection,
+    aquery_collection,
+    aquery_doc,
     query_collection_with_hybrid_search,
-    query_doc,
     query_doc_with_hybrid_search,
 )
 from open_webui.utils.misc import (
@@ -81,13 +91,20 @@ from open_webui.config import (
     RAG_EMBEDDING_MODEL_TRUST_REMOTE_CODE,
     RAG_RERANKING_MODEL_AUTO_UPDATE,
     RAG_RERANKING_MODEL_TRUST_REMOTE_CODE,
+    RAG_INGESTION_BATCH_SIZE,
+    ENABLE_RAG_WEB_SEARCH_INCREMENTAL_INGESTION,
+    RAG_WEB_SEARCH_MIN_CHUNKS,
+    RAG_WEB_SEARCH_MIN_PAGES,
+    RAG_WEB_SEARCH_INGESTION_DEADLINE,
     UPLOAD_DIR,
     DEFAULT_LOCALE,
+    VECTOR_DB_SHARED_COLLECTION,
 )
 from open_webui.env import (
     SRC_LOG_LEVELS,
     DEVICE_TYPE,
     DOCKER,
+    ENABLE_INGESTION_QUEUE,
 )
 from open_webui.constants import ERROR_MESSAGES
 
@@ -152,6 +169,9 @@ def get_rf(
             except:
                 log.error("CrossEncoder error")
                 raise Exception(ERROR_MESSAGES.DEFAULT("CrossEncoder error"))
+
+        # Keys the cached reranking scores of the model
+        rf.model_name = reranking_model
     return rf
 
 
@@ -330,6 +350,8 @@ async def update_reranking_config(
                 request.app.state.config.RAG_RERANKING_MODEL,
                 True,
             )
+            if RERANK_SCORE_CACHE is not None:
+                RERANK_SCORE_CACHE.clear()
         except Exception as e:
             log.error(f"Error loading reranking model: {e}")
             request.app.state.config.ENABLE_RAG_HYBRID_SEARCH = False
@@ -746,6 +768,38 @@ async def update_query_settings(
 ####################################
 
 
+def get_embedding_config(request: Request) -> str:
+    return json.dumps(
+        {
+            "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
+            "model": request.app.state.config.RAG_EMBEDDING_MODEL,
+        }
+    )
+
+
+def get_text_splitter(request: Request):
+    if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
+        return RecursiveCharacterTextSplitter(
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+    elif request.app.state.config.TEXT_SPLITTER == "token":
+        log.info(
+            f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
+        )
+
+        tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
+        return TokenTextSplitter(
+            encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+    else:
+        raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
+
+
 def save_docs_to_vector_db(
     request: Request,
     docs,
@@ -756,25 +810,23 @@ def save_docs_to_vector_db(
     add: bool = False,
     user=None,
 ) -> bool:
-    def _get_docs_info(docs: list[Document]) -> str:
-        docs_info = set()
+    # `docs` may be any iterable of documents (e.g. `Loader.lazy_load`). Pages
+    # are split, embedded and inserted in bounded batches so peak memory does
+    # not grow with the size of the document.
+    docs_info = set()
 
+    def _add_doc_info(doc: Document):
         # Trying to select relevant metadata identifying the document.
-        for doc in docs:
-            metadata = getattr(doc, "metadata", {})
-            doc_name = metadata.get("name", "")
-            if not doc_name:
-                doc_name = metadata.get("title", "")
-            if not doc_name:
-                doc_name = metadata.get("source", "")
-            if doc_name:
-                docs_info.add(doc_name)
+        doc_metadata = getattr(doc, "metadata", {})
+        doc_name = doc_metadata.get("name", "")
+        if not doc_name:
+            doc_name = doc_metadata.get("title", "")
+        if not doc_name:
+            doc_name = doc_metadata.get("source", "")
+        if doc_name:
+            docs_info.add(doc_name)
 
-        return ", ".join(docs_info)
-
-    log.info(
-        f"save_docs_to_vector_db: document {_get_docs_info(docs)} {collection_name}"
-    )
+    log.info(f"save_docs_to_vector_db: collection {collection_name}")
 
     # Check if entries with the same hash (metadata.hash) already exist
     if metadata and "hash" in metadata:
@@ -789,111 +841,172 @@ def save_docs_to_vector_db(
                 log.info(f"Document with hash {metadata['hash']} already exists")
                 raise ValueError(ERROR_MESSAGES.DUPLICATE_CONTENT)
 
-    if split:
-        if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-        elif request.app.state.config.TEXT_SPLITTER == "token":
-            log.info(
-                f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
-            )
-
-            tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
-            text_splitter = TokenTextSplitter(
-                encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-        else:
-            raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
-
-        docs = text_splitter.split_documents(docs)
+    text_splitter = get_text_splitter(request) if split else None
 
-    if len(docs) == 0:
-        raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+    embedding_config = get_embedding_config(request)
 
-    texts = [doc.page_content for doc in docs]
-    metadatas = [
-        {
+    def _get_chunks():
+        for doc in docs:
+            _add_doc_info(doc)
+            if text_splitter:
+                yield from text_splitter.split_documents([doc])
+            else:
+                yield doc
+
+    def _get_batches():
+        batch = []
+        for chunk in _get_chunks():
+            batch.append(chunk)
+            if len(batch) >= RAG_INGESTION_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _get_metadata(doc: Document) -> dict:
+        doc_metadata = {
             **doc.metadata,
             **(metadata if metadata else {}),
-            "embedding_config": json.dumps(
-                {
-                    "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
-                    "model": request.app.state.config.RAG_EMBEDDING_MODEL,
-                }
-            ),
+            "embedding_config": embedding_config,
         }
-        for doc in docs
-    ]
 
-    # ChromaDB does not like datetime formats
-    # for meta-data so convert them to string.
-    for metadata in metadatas:
-        for key, value in metadata.items():
+        # ChromaDB does not like datetime formats
+        # for meta-data so convert them to string.
+        for key, value in doc_metadata.items():
             if (
                 isinstance(value, datetime)
                 or isinstance(value, list)
                 or isinstance(value, dict)
             ):
-                metadata[key] = str(value)
+                doc_metadata[key] = str(value)
+        return doc_metadata
 
-    try:
-        if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
-            log.info(f"collection {collection_name} already exists")
+    if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+        log.info(f"collection {collection_name} already exists")
 
+        if not overwrite and add is False:
+            log.info(
+                f"collection {collection_name} already exists, overwrite is False and add is False"
+            )
+            return True
+    else:
+        overwrite = False
+
+    embedding_function = get_embedding_function(
+        request.app.state.config.RAG_EMBEDDING_ENGINE,
+        request.app.state.config.RAG_EMBEDDING_MODEL,
+        request.app.state.ef,
+        (
+            request.app.state.config.RAG_OPENAI_API_BASE_URL
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else request.app.state.config.RAG_OLLAMA_BASE_URL
+        ),
+        (
+            request.app.state.config.RAG_OPENAI_API_KEY
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else request.app.state.config.RAG_OLLAMA_API_KEY
+        ),
+        request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
+    )
+
+    def _get_replaced_ids() -> Optional[list[str]]:
+        # None when chunks of another embedding model are stored, they can not
+        # share the collection with the new ones
+        ids = []
+        for page in VECTOR_DB_CLIENT.iter_get(collection_name=collection_name):
+            if any(
+                (doc_metadata or {}).get("embedding_config") != embedding_config
+                for doc_metadata in page.metadatas[0]
+            ):
+                return None
+            ids.extend(page.ids[0])
+        return ids
+
+    # Ids inserted by this call, removed again if a later batch fails so a
+    # file is either fully indexed or not at all. The chunks replaced by an
+    # overwrite are only deleted once all batches are in. A collection of
+    # another embedding model is kept until then too: the new chunks go to a
+    # staging collection that replaces it afterwards, like a re-embedding
+    # migration.
+    target_name = collection_name
+    staging_name = f"{collection_name}{STAGING_SUFFIX}"
+    inserted_ids = []
+    replaced_ids = []
+    swapping = False
+    try:
+        for batch in _get_batches():
             if overwrite:
-                VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
-                log.info(f"deleting existing collection {collection_name}")
-            elif add is False:
-                log.info(
-                    f"collection {collection_name} already exists, overwrite is False and add is False"
-                )
-                return True
+                # Deferred until there is content to replace the collection with
+                replaced_ids = _get_replaced_ids()
+                if replaced_ids is None:
+                    replaced_ids = []
+                    target_name = staging_name
+                    # Left over by an interrupted overwrite
+                    if VECTOR_DB_CLIENT.has_collection(collection_name=staging_name):
+                        VECTOR_DB_CLIENT.delete_collection(collection_name=staging_name)
+                overwrite = False
+
+            embeddings = embed_with_cache(
+                embedding_function,
+                embedding_config,
+                [doc.page_content.replace("\n", " ") for doc in batch],
+                user=user,
+            )
 
-        log.info(f"adding to collection {collection_name}")
-        embedding_function = get_embedding_function(
-            request.app.state.config.RAG_EMBEDDING_ENGINE,
-            request.app.state.config.RAG_EMBEDDING_MODEL,
-            request.app.state.ef,
-            (
-                request.app.state.config.RAG_OPENAI_API_BASE_URL
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-                else request.app.state.config.RAG_OLLAMA_BASE_URL
-            ),
-            (
-                request.app.state.config.RAG_OPENAI_API_KEY
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-                else request.app.state.config.RAG_OLLAMA_API_KEY
-            ),
-            request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
-        )
+            items = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "text": doc.page_content,
+                    "vector": embeddings[idx],
+                    "metadata": _get_metadata(doc),
+                }
+                for idx, doc in enumerate(batch)
+            ]
 
-        embeddings = embedding_function(
-            list(map(lambda x: x.replace("\n", " "), texts)), user=user
-        )
+            VECTOR_DB_CLIENT.insert(
+                collection_name=target_name,
+                items=items,
+            )
+            inserted_ids.extend([item["id"] for item in items])
 
-        items = [
-            {
-                "id": str(uuid.uuid4()),
-                "text": text,
-                "vector": embeddings[idx],
-                "metadata": metadatas[idx],
-            }
-            for idx, text in enumerate(texts)
-        ]
+        if len(inserted_ids) == 0:
+            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
 
-        VECTOR_DB_CLIENT.insert(
-            collection_name=collection_name,
-            items=items,
-        )
+        if target_name == staging_name:
+            swapping = True
+            copy_collection(
+                VECTOR_DB_CLIENT,
+                VECTOR_DB_CLIENT,
+                staging_name,
+                collection_name,
+                MIGRATION_PAGE_SIZE,
+            )
+            VECTOR_DB_CLIENT.delete_collection(collection_name=staging_name)
+            log.info(
+                f"replaced collection {collection_name} of another embedding model"
+            )
+        elif replaced_ids:
+            VECTOR_DB_CLIENT.delete(collection_name=collection_name, ids=replaced_ids)
+            log.info(
+                f"deleted {len(replaced_ids)} replaced chunks of collection {collection_name}"
+            )
 
+        log.info(
+            f"added {len(inserted_ids)} chunks of {', '.join(docs_info)} to collection {collection_name}"
+        )
         return True
     except Exception as e:
+        # A failed swap keeps the staging collection, the only complete copy
+        if inserted_ids and not swapping:
+            try:
+                if target_name == staging_name:
+                    VECTOR_DB_CLIENT.delete_collection(collection_name=staging_name)
+                else:
+                    VECTOR_DB_CLIENT.delete(
+                        collection_name=collection_name, ids=inserted_ids
+                    )
+            except Exception as cleanup_error:
+                log.exception(cleanup_error)
         log.exception(e)
         raise e
 
@@ -918,6 +1031,13 @@ def process_file(
         if collection_name is None:
             collection_name = f"file-{file.id}"
 
+        # With a shared collection, knowledge bases reach the chunks of their
+        # files through their file ids instead of keeping copies
+        file_indexed = False
+
+        # Text of the pages of a file extracted while it is being indexed
+        pages = []
+
         if form_data.content:
             # Update the content in the file
             # Usage: /files/{file_id}/data/content/update
@@ -959,6 +1079,7 @@ def process_file(
                     )
                     for idx, id in enumerate(result.ids[0])
                 ]
+                file_indexed = VECTOR_DB_SHARED_COLLECTION
             else:
                 docs = [
                     Document(
@@ -987,23 +1108,27 @@ def process_file(
                     DOCUMENT_INTELLIGENCE_ENDPOINT=request.app.state.config.DOCUMENT_INTELLIGENCE_ENDPOINT,
                     DOCUMENT_INTELLIGENCE_KEY=request.app.state.config.DOCUMENT_INTELLIGENCE_KEY,
                 )
-                docs = loader.load(
-                    file.filename, file.meta.get("content_type"), file_path
-                )
 
-                docs = [
-                    Document(
-                        page_content=doc.page_content,
-                        metadata={
-                            **doc.metadata,
-                            "name": file.filename,
-                            "created_by": file.user_id,
-                            "file_id": file.id,
-                            "source": file.filename,
-                        },
-                    )
-                    for doc in docs
-                ]
+                def _get_docs():
+                    # Pages are indexed as they are extracted, the content of
+                    # the file is only known once all of them went through
+                    for doc in loader.lazy_load(
+                        file.filename, file.meta.get("content_type"), file_path
+                    ):
+                        pages.append(doc.page_content)
+                        yield Document(
+                            page_content=doc.page_content,
+                            metadata={
+                                **doc.metadata,
+                                "name": file.filename,
+                                "created_by": file.user_id,
+                                "file_id": file.id,
+                                "source": file.filename,
+                            },
+                        )
+
+                docs = _get_docs()
+                text_content = None
             else:
                 docs = [
                     Document(
@@ -1017,16 +1142,43 @@ def process_file(
                         },
                     )
                 ]
-            text_content = " ".join([doc.page_content for doc in docs])
+                text_content = docs[0].page_content
 
-        log.debug(f"text_content: {text_content}")
-        Files.update_file_data_by_id(
-            file.id,
-            {"content": text_content},
-        )
+        def _save_content(text_content: str) -> str:
+            log.debug(f"text_content: {text_content}")
+            Files.update_file_data_by_id(
+                file.id,
+                {"content": text_content},
+            )
+
+            hash = calculate_sha256_string(text_content)
+            Files.update_file_hash_by_id(file.id, hash)
+            return hash
+
+        if (
+            text_content is None
+            and request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL
+        ):
+            text_content = " ".join(doc.page_content for doc in docs)
 
-        hash = calculate_sha256_string(text_content)
-        Files.update_file_hash_by_id(file.id, hash)
+        hash = _save_content(text_content) if text_content is not None else None
+
+        if file_indexed:
+            # Other files of the knowledge base with the same content
+            knowledge = Knowledges.get_knowledge_by_id(collection_name)
+            file_ids = (knowledge.data or {}).get("file_ids", []) if knowledge else []
+            if any(
+                other_file.id != file.id and other_file.hash == hash
+                for other_file in Files.get_files_by_ids(file_ids)
+            ):
+                raise ValueError(ERROR_MESSAGES.DUPLICATE_CONTENT)
+
+            return {
+                "status": True,
+                "collection_name": collection_name,
+                "filename": file.filename,
+                "content": text_content,
+            }
 
         if not request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL:
             try:
@@ -1037,12 +1189,19 @@ def process_file(
                     metadata={
                         "file_id": file.id,
                         "name": file.filename,
-                        "hash": hash,
+                        **({"hash": hash} if hash is not None else {}),
                     },
                     add=(True if form_data.collection_name else False),
                     user=user,
                 )
 
+                if text_content is None:
+                    # Pages left unread when the collection was already indexed
+                    for _ in docs:
+                        pass
+                    text_content = " ".join(pages)
+                    _save_content(text_content)
+
                 if result:
                     Files.update_file_metadata_by_id(
                         file.id,
@@ -1120,42 +1279,84 @@ def process_text(
         )
 
 
-@router.post("/process/youtube")
-def process_youtube_video(
-    request: Request, form_data: ProcessUrlForm, user=Depends(get_verified_user)
-):
-    try:
-        collection_name = form_data.collection_name
-        if not collection_name:
-            collection_name = calculate_sha256_string(form_data.url)[:63]
+# Videos are processed in turn per collection, so that concurrent requests
+# for a video embed it once and reuse it
+YOUTUBE_COLLECTION_LOCKS = KeyLocks()
 
-        loader = YoutubeLoader(
-            form_data.url,
-            language=request.app.state.config.YOUTUBE_LOADER_LANGUAGE,
-            proxy_url=request.app.state.config.YOUTUBE_LOADER_PROXY_URL,
-        )
 
+def process_youtube_url(
+    request: Request, url: str, collection_name: Optional[str], user
+) -> dict:
+    loader = YoutubeLoader(
+        url,
+        language=request.app.state.config.YOUTUBE_LOADER_LANGUAGE,
+        proxy_url=request.app.state.config.YOUTUBE_LOADER_PROXY_URL,
+    )
+    if not collection_name:
+        # Shared by every URL of the same video and transcript languages
+        collection_name = calculate_sha256_string(
+            f"youtube-{loader.video_id}-{','.join(loader.language)}"
+        )[:63]
+
+    with YOUTUBE_COLLECTION_LOCKS.hold(collection_name):
         docs = loader.load()
         content = " ".join([doc.page_content for doc in docs])
         log.debug(f"text_content: {content}")
 
-        save_docs_to_vector_db(
-            request, docs, collection_name, overwrite=True, user=user
-        )
+        # An unchanged transcript already embedded with the current model is
+        # not embedded again
+        content_hash = calculate_sha256_string(content)
+        result = None
+        if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+            result = VECTOR_DB_CLIENT.query(
+                collection_name=collection_name,
+                filter={"hash": content_hash},
+                limit=1,
+            )
 
-        return {
-            "status": True,
-            "collection_name": collection_name,
-            "filename": form_data.url,
-            "file": {
-                "data": {
-                    "content": content,
-                },
-                "meta": {
-                    "name": form_data.url,
-                },
+        indexed = result is not None and bool(result.ids[0])
+        embedding_config = get_embedding_config(request)
+        if (
+            indexed
+            and result.metadatas[0][0].get("embedding_config") == embedding_config
+        ):
+            log.info(f"Reusing collection {collection_name} for {url}")
+        else:
+            if indexed:
+                # Embedded with another model, it would be refused as a duplicate
+                VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+            save_docs_to_vector_db(
+                request,
+                docs,
+                collection_name,
+                metadata={"hash": content_hash},
+                overwrite=True,
+                user=user,
+            )
+
+    return {
+        "status": True,
+        "collection_name": collection_name,
+        "filename": url,
+        "file": {
+            "data": {
+                "content": content,
             },
-        }
+            "meta": {
+                "name": url,
+            },
+        },
+    }
+
+
+@router.post("/process/youtube")
+def process_youtube_video(
+    request: Request, form_data: ProcessUrlForm, user=Depends(get_verified_user)
+):
+    try:
+        return process_youtube_url(
+            request, form_data.url, form_data.collection_name, user
+        )
     except Exception as e:
         log.exception(e)
         raise HTTPException(
@@ -1164,6 +1365,38 @@ def process_youtube_video(
         )
 
 
+class ProcessUrlsForm(BaseModel):
+    urls: list[str]
+
+
+@router.post("/process/youtube/batch")
+async def process_youtube_videos(
+    request: Request, form_data: ProcessUrlsForm, user=Depends(get_verified_user)
+):
+    """
+    Process the videos of a message concurrently, each into its own
+    collection. Videos that fail are reported in `errors`.
+    """
+    results = await asyncio.gather(
+        *[
+            run_in_threadpool(process_youtube_url, request, url, None, user)
+            for url in form_data.urls
+        ],
+        return_exceptions=True,
+    )
+
+    response = {"results": [], "errors": []}
+    for url, result in zip(form_data.urls, results):
+        if isinstance(result, Exception):
+            log.exception(result)
+            response["errors"].append(
+                {"url": url, "error": ERROR_MESSAGES.DEFAULT(result)}
+            )
+        else:
+            response["results"].append(result)
+    return response
+
+
 @router.post("/process/web")
 def process_web(
     request: Request, form_data: ProcessUrlForm, user=Depends(get_verified_user)
@@ -1207,7 +1440,7 @@ def process_web(
         )
 
 
-def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
+async def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
     """Search the web using a search engine and return the results as a list of SearchResult objects.
     Will look for a search engine API key in environment variables in the following order:
     - SEARXNG_QUERY_URL
@@ -1227,10 +1460,21 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
         query (str): The query to search for
     """
 
+    if WEB_SEARCH_CACHE is not None:
+        cache_key = (
+            engine,
+            query,
+            request.app.state.config.RAG_WEB_SEARCH_RESULT_COUNT,
+            request.app.state.config.RAG_WEB_SEARCH_DOMAIN_FILTER_LIST,
+        )
+        results = WEB_SEARCH_CACHE.get_results(*cache_key)
+        if results is not None:
+            return results
+
     # TODO: add playwright to search the web
     if engine == "searxng":
         if request.app.state.config.SEARXNG_QUERY_URL:
-            return search_searxng(
+            search = search_searxng(
                 request.app.state.config.SEARXNG_QUERY_URL,
                 query,
                 request.app.state.config.RAG_WEB_SEARCH_RESULT_COUNT,
@@ -1243,7 +1487,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             request.app.state.config.GOOGLE_PSE_API_KEY
             and request.app.state.config.GOOGLE_PSE_ENGINE_ID
         ):
-            return search_google_pse(
+            search = search_google_pse(
                 request.app.state.config.GOOGLE_PSE_API_KEY,
                 request.app.state.config.GOOGLE_PSE_ENGINE_ID,
                 query,
@@ -1256,7 +1500,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             )
     elif engine == "brave":
         if request.app.state.config.BRAVE_SEARCH_API_KEY:
-            return search_brave(
+            search = search_brave(
                 request.app.state.config.BRAVE_SEARCH_API_KEY,
                 query,
                 request.app.state.config.RAG_WEB_SEARCH_RESULT_COUNT,
@@ -1266,7 +1510,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No BRAVE_SEARCH_API_KEY found in environment variables")
     elif engine == "kagi":
         if request.app.state.config.KAGI_SEARCH_API_KEY:
-            return search_kagi(
+            search = search_kagi(
                 request.app.state.config.KAGI_SEARCH_API_KEY,
                 query,
                 request.app.state.config.RAG_WEB_SEARCH_RESULT_COUNT,
@@ -1276,7 +1520,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No KAGI_SEARCH_API_KEY found in environment variables")
     elif engine == "mojeek":
         if request.app.state.config.MOJEEK_SEARCH_API_KEY:
-            return search_mojeek(
+            search = search_mojeek(
                 request.app.state.config.MOJEEK_SEARCH_API_KEY,
                 query,
                 request.app.state.config.RAG_WEB_SEARCH_RESULT_COUNT,
@@ -1286,7 +1530,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No MOJEEK_SEARCH_API_KEY found in environment variables")
     elif engine == "bocha":
         if request.app.state.config.BOCHA_SEARCH_API_KEY:
-            return search_bocha(
+            search = search_bocha(
                 request.app.state.config.BOCHA_SEARCH_API_KEY,
                 query,
                 request.app.state.config.RAG_WEB_SEARCH_RESULT_COUNT,
@@ -1296,7 +1540,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No BOCHA_SEARCH_API_KEY found in environment variables")
     elif engine == "serpstack":
         if request.app.state.config.SERPSTACK_API_KEY:
-            return search_serpstack(
+            search = search_serpstack(
                 request.app.state.config.SERPSTACK_API_KEY,
                 query,
                 request.app.state.config.RAG_WEB_SEARCH_RESULT_COUNT,
@@ -1307,7 +1551,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No SERPSTACK_API_KEY found in environment variables")
     elif engine == "serper":
         if request.app.state.config.SERPER_API_KEY:
-            return search_serper(
+            search = search_serper(
                 request.app.state.config.SERPER_API_KEY,
                 query,
                 request.app.state.config.RAG_WEB_SEARCH_RESULT_COUNT,
@@ -1317,7 +1561,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No SERPER_API_KEY found in environment variables")
     elif engine == "serply":
         if request.app.state.config.SERPLY_API_KEY:
-            return search_serply(
+            search = search_serply(
                 request.app.state.config.SERPLY_API_KEY,
                 query,
                 request.app.state.config.RAG_WEB_SEARCH_RESULT_COUNT,
@@ -1326,14 +1570,14 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
         else:
             raise Exception("No SERPLY_API_KEY found in environment variables")
     elif engine == "duckduckgo":
-        return search_duckduckgo(
+        search = search_duckduckgo(
             query,
             request.app.state.config.RAG_WEB_SEARCH_RESULT_COUNT,
             request.app.state.config.RAG_WEB_SEARCH_DOMAIN_FILTER_LIST,
         )
     elif engine == "tavily":
         if request.app.state.config.TAVILY_API_KEY:
-            return search_tavily(
+            search = search_tavily(
                 request.app.state.config.TAVILY_API_KEY,
                 query,
                 request.app.state.config.RAG_WEB_SEARCH_RESULT_COUNT,
@@ -1343,7 +1587,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No TAVILY_API_KEY found in environment variables")
     elif engine == "searchapi":
         if request.app.state.config.SEARCHAPI_API_KEY:
-            return search_searchapi(
+            search = search_searchapi(
                 request.app.state.config.SEARCHAPI_API_KEY,
                 request.app.state.config.SEARCHAPI_ENGINE,
                 query,
@@ -1354,7 +1598,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No SEARCHAPI_API_KEY found in environment variables")
     elif engine == "serpapi":
         if request.app.state.config.SERPAPI_API_KEY:
-            return search_serpapi(
+            search = search_serpapi(
                 request.app.state.config.SERPAPI_API_KEY,
                 request.app.state.config.SERPAPI_ENGINE,
                 query,
@@ -1364,13 +1608,13 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
         else:
             raise Exception("No SERPAPI_API_KEY found in environment variables")
     elif engine == "jina":
-        return search_jina(
+        search = search_jina(
             request.app.state.config.JINA_API_KEY,
             query,
             request.app.state.config.RAG_WEB_SEARCH_RESULT_COUNT,
         )
     elif engine == "bing":
-        return search_bing(
+        search = search_bing(
             request.app.state.config.BING_SEARCH_V7_SUBSCRIPTION_KEY,
             request.app.state.config.BING_SEARCH_V7_ENDPOINT,
             str(DEFAULT_LOCALE),
@@ -1379,7 +1623,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             request.app.state.config.RAG_WEB_SEARCH_DOMAIN_FILTER_LIST,
         )
     elif engine == "exa":
-        return search_exa(
+        search = search_exa(
             request.app.state.config.EXA_API_KEY,
             query,
             request.app.state.config.RAG_WEB_SEARCH_RESULT_COUNT,
@@ -1388,6 +1632,12 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
     else:
         raise Exception("No search engine API key found in environment variables")
 
+    # A slow engine fails the search instead of holding up the chat
+    results = await asyncio.wait_for(search, get_search_engine_timeout(engine))
+    if WEB_SEARCH_CACHE is not None:
+        WEB_SEARCH_CACHE.set_results(*cache_key, results)
+    return results
+
 
 @router.post("/process/web/search")
 async def process_web_search(
@@ -1397,7 +1647,7 @@ async def process_web_search(
         logging.info(
             f"trying to web search with {request.app.state.config.RAG_WEB_SEARCH_ENGINE, form_data.query}"
         )
-        web_results = search_web(
+        web_results = await search_web(
             request, request.app.state.config.RAG_WEB_SEARCH_ENGINE, form_data.query
         )
     except Exception as e:
@@ -1418,50 +1668,154 @@ async def process_web_search(
             ]
 
         urls = [result.link for result in web_results]
-        loader = get_web_loader(
+        return await process_web_search_urls(request, urls, collection_name, user)
+    except Exception as e:
+        log.exception(e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(e),
+        )
+
+
+async def process_web_search_urls(
+    request: Request, urls: list[str], collection_name: str, user
+) -> dict:
+    # Fetch the result pages and embed them into one collection, unless
+    # embedding is bypassed and the pages are returned as they are
+    bypass = request.app.state.config.BYPASS_WEB_SEARCH_EMBEDDING_AND_RETRIEVAL
+    if WEB_SEARCH_CACHE is not None:
+        # The same pages embedded with the same model are not processed again
+        cache_key = (
+            tuple(urls),
+            bypass,
+            request.app.state.config.RAG_EMBEDDING_ENGINE,
+            request.app.state.config.RAG_EMBEDDING_MODEL,
+        )
+        result = await run_in_threadpool(
+            WEB_SEARCH_CACHE.get_collection, collection_name, cache_key
+        )
+        if result is not None:
+            return result
+
+    loader = get_web_loader(
+        urls,
+        verify_ssl=request.app.state.config.ENABLE_RAG_WEB_LOADER_SSL_VERIFICATION,
+        requests_per_second=request.app.state.config.RAG_WEB_SEARCH_CONCURRENT_REQUESTS,
+        trust_env=request.app.state.config.RAG_WEB_SEARCH_TRUST_ENV,
+    )
+    if ENABLE_RAG_WEB_SEARCH_INCREMENTAL_INGESTION and not bypass:
+        return await process_web_search_urls_incrementally(
+            request,
+            loader,
             urls,
-            verify_ssl=request.app.state.config.ENABLE_RAG_WEB_LOADER_SSL_VERIFICATION,
-            requests_per_second=request.app.state.config.RAG_WEB_SEARCH_CONCURRENT_REQUESTS,
-            trust_env=request.app.state.config.RAG_WEB_SEARCH_TRUST_ENV,
+            collection_name,
+            user,
+            cache_key if WEB_SEARCH_CACHE is not None else None,
         )
-        docs = await loader.aload()
 
-        if request.app.state.config.BYPASS_WEB_SEARCH_EMBEDDING_AND_RETRIEVAL:
-            return {
-                "status": True,
-                "collection_name": None,
-                "filenames": urls,
-                "docs": [
-                    {
-                        "content": doc.page_content,
-                        "metadata": doc.metadata,
-                    }
-                    for doc in docs
-                ],
-                "loaded_count": len(docs),
-            }
-        else:
-            await run_in_threadpool(
-                save_docs_to_vector_db,
+    docs = await loader.aload()
+
+    if bypass:
+        result = {
+            "status": True,
+            "collection_name": None,
+            "filenames": urls,
+            "docs": [
+                {
+                    "content": doc.page_content,
+                    "metadata": doc.metadata,
+                }
+                for doc in docs
+            ],
+            "loaded_count": len(docs),
+        }
+    else:
+        await run_in_threadpool(
+            save_docs_to_vector_db,
+            request,
+            docs,
+            collection_name,
+            overwrite=True,
+            user=user,
+        )
+
+        result = {
+            "status": True,
+            "collection_name": collection_name,
+            "filenames": urls,
+            "loaded_count": len(docs),
+        }
+
+    if WEB_SEARCH_CACHE is not None:
+        WEB_SEARCH_CACHE.set_collection(collection_name, cache_key, result)
+    return result
+
+
+async def process_web_search_urls_incrementally(
+    request: Request,
+    loader,
+    urls: list[str],
+    collection_name: str,
+    user,
+    cache_key: Optional[tuple] = None,
+) -> dict:
+    # Pages are indexed as they are loaded and the chat continues once there
+    # is enough context, late pages are still indexed for follow-up turns.
+    # An identical search still indexing joins it instead of starting over.
+    ingestion = WEB_SEARCH_INGESTIONS.get(collection_name)
+    if ingestion is None:
+        text_splitter = get_text_splitter(request)
+
+        def save(docs: list[Document], overwrite: bool) -> int:
+            chunks = text_splitter.split_documents(docs)
+            if not chunks:
+                return 0
+            save_docs_to_vector_db(
                 request,
-                docs,
+                chunks,
                 collection_name,
-                overwrite=True,
+                overwrite=overwrite,
+                split=False,
+                add=True,
                 user=user,
             )
+            return len(chunks)
 
-            return {
-                "status": True,
-                "collection_name": collection_name,
-                "filenames": urls,
-                "loaded_count": len(docs),
-            }
-    except Exception as e:
-        log.exception(e)
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=ERROR_MESSAGES.DEFAULT(e),
+        def on_done(ingestion: WebSearchIngestion):
+            if cache_key is not None:
+                WEB_SEARCH_CACHE.set_collection(
+                    collection_name,
+                    cache_key,
+                    {
+                        "status": True,
+                        "collection_name": collection_name,
+                        "filenames": urls,
+                        "loaded_count": ingestion.pages,
+                    },
+                )
+
+        documents = (
+            loader.alazy_load_as_completed()
+            if hasattr(loader, "alazy_load_as_completed")
+            else loader.alazy_load()
+        )
+        ingestion = WebSearchIngestion(
+            collection_name,
+            documents,
+            save,
+            min_chunks=RAG_WEB_SEARCH_MIN_CHUNKS,
+            min_pages=RAG_WEB_SEARCH_MIN_PAGES,
+            on_done=on_done,
         )
+        ingestion.start()
+
+    await ingestion.wait(RAG_WEB_SEARCH_INGESTION_DEADLINE)
+    return {
+        "status": True,
+        "collection_name": collection_name,
+        "filenames": urls,
+        "loaded_count": ingestion.pages,
+    }
 
 
 class QueryDocForm(BaseModel):
@@ -1473,14 +1827,15 @@ class QueryDocForm(BaseModel):
 
 
 @router.post("/query/doc")
-def query_doc_handler(
+async def query_doc_handler(
     request: Request,
     form_data: QueryDocForm,
     user=Depends(get_verified_user),
 ):
     try:
         if request.app.state.config.ENABLE_RAG_HYBRID_SEARCH:
-            return query_doc_with_hybrid_search(
+            return await run_in_threadpool(
+                query_doc_with_hybrid_search,
                 collection_name=form_data.collection_name,
                 query=form_data.query,
                 embedding_function=lambda query: request.app.state.EMBEDDING_FUNCTION(
@@ -1493,13 +1848,12 @@ def query_doc_handler(
                     if form_data.r
                     else request.app.state.config.RELEVANCE_THRESHOLD
                 ),
-                user=user,
             )
         else:
-            return query_doc(
+            return await aquery_doc(
                 collection_name=form_data.collection_name,
-                query_embedding=request.app.state.EMBEDDING_FUNCTION(
-                    form_data.query, user=user
+                query_embedding=await run_in_threadpool(
+                    request.app.state.EMBEDDING_FUNCTION, form_data.query, user=user
                 ),
                 k=form_data.k if form_data.k else request.app.state.config.TOP_K,
                 user=user,
@@ -1521,14 +1875,15 @@ class QueryCollectionsForm(BaseModel):
 
 
 @router.post("/query/collection")
-def query_collection_handler(
+async def query_collection_handler(
     request: Request,
     form_data: QueryCollectionsForm,
     user=Depends(get_verified_user),
 ):
     try:
         if request.app.state.config.ENABLE_RAG_HYBRID_SEARCH:
-            return query_collection_with_hybrid_search(
+            return await run_in_threadpool(
+                query_collection_with_hybrid_search,
                 collection_names=form_data.collection_names,
                 queries=[form_data.query],
                 embedding_function=lambda query: request.app.state.EMBEDDING_FUNCTION(
@@ -1543,7 +1898,7 @@ def query_collection_handler(
                 ),
             )
         else:
-            return query_collection(
+            return await aquery_collection(
                 collection_names=form_data.collection_names,
                 queries=[form_data.query],
                 embedding_function=lambda query: request.app.state.EMBEDDING_FUNCTION(
@@ -1591,9 +1946,48 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
         return {"status": False}
 
 
+class VectorMigrationForm(BaseModel):
+    # Backends default to VECTOR_DB, re-embedding uses the current embedding model
+    source: Optional[str] = None
+    target: Optional[str] = None
+    reembed: bool = False
+    collection_names: Optional[list[str]] = None
+    page_size: Optional[int] = None
+    workers: Optional[int] = None
+
+
+@router.post("/migrate")
+def migrate_vector_db(form_data: VectorMigrationForm, user=Depends(get_admin_user)):
+    if not ENABLE_INGESTION_QUEUE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(
+                "Vector DB migrations run as ingestion jobs, "
+                "set ENABLE_INGESTION_QUEUE to use them"
+            ),
+        )
+
+    # Imported here, the ingestion job handlers import this router
+    from open_webui.retrieval.ingestion import INGESTION_QUEUE
+
+    job = INGESTION_QUEUE.submit(
+        user.id, "vector_migration", form_data.model_dump(exclude_none=True)
+    )
+    return {"status": True, "job_id": job.id}
+
+
+@router.get("/web/search/cache")
+def get_web_search_cache_stats(user=Depends(get_admin_user)):
+    if WEB_SEARCH_CACHE is None:
+        return {"enabled": False}
+    return {"enabled": True, **WEB_SEARCH_CACHE.get_stats()}
+
+
 @router.post("/reset/db")
 def reset_vector_db(user=Depends(get_admin_user)):
     VECTOR_DB_CLIENT.reset()
+    if WEB_SEARCH_CACHE is not None:
+        WEB_SEARCH_CACHE.invalidate()
     Knowledges.delete_all_knowledge()
 
 
@@ -0,0 +1,175 @@
+import asyncio
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("playwright.async_api")
+
+from open_webui.retrieval.web import browser
+from open_webui.retrieval.web.browser import BrowserContextPool
+from open_webui.retrieval.web.utils import SafePlaywrightURLLoader
+
+PAGE = """<html><head><title>Page {i}</title></head>
+<body><p>Content of page {i}</p><img src="/image.png"></body></html>"""
+
+
+class RecordingHandler(SimpleHTTPRequestHandler):
+    """Serves the static files, recording the requested paths and how many
+    pages are being served at once."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+        if not self.path.startswith("/page"):
+            return super().do_GET()
+
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            # Long enough for concurrent requests to overlap
+            time.sleep(0.2)
+            super().do_GET()
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def static_server(tmp_path):
+    for i in range(6):
+        (tmp_path / f"page{i}.html").write_text(PAGE.format(i=i))
+    (tmp_path / "image.png").write_bytes(b"\x89PNG\r\n\x1a\n")
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), partial(RecordingHandler, directory=str(tmp_path))
+    )
+    server.lock = threading.Lock()
+    server.requests = []
+    server.active = 0
+    server.max_active = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get_url(server, path: str) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+async def render(pool: BrowserContextPool, url: str) -> str:
+    async with pool.context() as context:
+        page = await context.new_page()
+        try:
+            await page.goto(url)
+            return await page.inner_text("body")
+        finally:
+            await page.close()
+
+
+def test_loader_uses_shared_pool(static_server):
+    urls = [get_url(static_server, f"/page{i}.html") for i in range(3)]
+
+    async def load():
+        try:
+            first = await SafePlaywrightURLLoader(urls, verify_ssl=False).aload()
+            pool = await browser.get_browser_pool()
+            second = await SafePlaywrightURLLoader(urls, verify_ssl=False).aload()
+            # Both loads ran on the same browser
+            assert pool is await browser.get_browser_pool()
+            return first, second
+        finally:
+            await browser.close_browser_pool()
+
+    first, second = asyncio.run(load())
+    for documents in (first, second):
+        assert [document.metadata["source"] for document in documents] == urls
+        for i, document in enumerate(documents):
+            assert f"Content of page {i}" in document.page_content
+
+
+def test_blocks_resources(static_server):
+    async def load():
+        pool = BrowserContextPool(size=1, blocked_resources=["image"])
+        await pool.start()
+        try:
+            return await render(pool, get_url(static_server, "/page0.html"))
+        finally:
+            await pool.stop()
+
+    assert "Content of page 0" in asyncio.run(load())
+    assert "/page0.html" in static_server.requests
+    assert "/image.png" not in static_server.requests
+
+
+def test_limits_concurrency(static_server):
+    urls = [get_url(static_server, f"/page{i}.html") for i in range(6)]
+
+    async def load():
+        pool = BrowserContextPool(size=2)
+        await pool.start()
+        try:
+            return await asyncio.gather(*[render(pool, url) for url in urls])
+        finally:
+            await pool.stop()
+
+    texts = asyncio.run(load())
+    assert all(f"Content of page {i}" in text for i, text in enumerate(texts))
+    assert static_server.max_active == 2
+
+
+def test_recycles_contexts(static_server):
+    url = get_url(static_server, "/page0.html")
+
+    async def load():
+        pool = BrowserContextPool(size=1, pages_per_context=2)
+        await pool.start()
+        try:
+            contexts = []
+            for _ in range(3):
+                await render(pool, url)
+                contexts.append(pool.contexts._queue[0])
+            return contexts
+        finally:
+            await pool.stop()
+
+    contexts = asyncio.run(load())
+    # The context is kept for its first page and replaced after the second
+    assert contexts[0] is not None
+    assert contexts[1] is None
+    assert contexts[2] is not None and contexts[2] is not contexts[0]
+
+
+def test_stop_wakes_waiting_borrowers():
+    async def load():
+        pool = BrowserContextPool(size=1)
+        # Every context is lent
+        pool.contexts = asyncio.Queue()
+        waiters = [asyncio.create_task(render(pool, "")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        await pool.stop()
+        return await asyncio.wait_for(
+            asyncio.gather(*waiters, return_exceptions=True), timeout=1
+        )
+
+    errors = asyncio.run(load())
+    assert all(isinstance(error, RuntimeError) for error in errors)
+
+
+def test_waiting_for_a_context_times_out():
+    async def load():
+        pool = BrowserContextPool(size=1, acquire_timeout=0.05)
+        pool.contexts = asyncio.Queue()
+        await render(pool, "")
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(load())
@@ -0,0 +1,36 @@
+from open_webui.retrieval import context
+
+
+def test_chunks_keep_the_retrieval_order_of_distances():
+    # Chroma scores by distance, merge_and_sort_query_results puts the
+    # nearest first
+    sources = [
+        {"document": ["near", "middle", "far"], "distances": [0.1, 0.4, 0.9]},
+        {"document": ["attached file"]},
+    ]
+
+    chunks = context.get_context_chunks(sources)
+
+    assert [chunk.text for chunk in chunks] == [
+        "attached file",
+        "near",
+        "middle",
+        "far",
+    ]
+    assert [chunk.source_idx for chunk in chunks] == [1, 0, 0, 0]
+
+
+def test_the_budget_keeps_the_nearest_chunks(monkeypatch):
+    monkeypatch.setattr(context, "count_tokens", lambda text, encoding_name: 10)
+    sources = [
+        {
+            "document": ["the nearest chunk", "a far away chunk"],
+            "distances": [0.2, 0.8],
+        }
+    ]
+
+    text, usage = context.assemble_context(sources, max_tokens=10)
+
+    assert "the nearest chunk" in text
+    assert "a far away chunk" not in text
+    assert usage["chunks"] == 1 and usage["truncated"] == 1
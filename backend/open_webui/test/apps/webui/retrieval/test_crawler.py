@@ -0,0 +1,66 @@
+import asyncio
+from contextlib import aclosing
+
+from open_webui.retrieval.web import crawler
+
+
+class FakeResponse:
+    status = 200
+    headers = {}
+
+    def __init__(self, session):
+        self.session = session
+
+    async def __aenter__(self):
+        self.session.active += 1
+        self.session.most_active = max(self.session.most_active, self.session.active)
+        await asyncio.sleep(0.01)
+        return self
+
+    async def __aexit__(self, *args):
+        self.session.active -= 1
+
+    async def text(self, errors=None):
+        return "page"
+
+
+class FakeSession:
+    def __init__(self):
+        self.active = 0
+        self.most_active = 0
+
+    def get(self, url, **kwargs):
+        return FakeResponse(self)
+
+
+def test_host_limits_are_shared_by_all_crawls(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(crawler, "get_crawler_session", lambda trust_env: session)
+    monkeypatch.setattr(crawler, "_host_limiters", {})
+
+    async def crawl(urls):
+        # Each loader builds its own crawler
+        async with aclosing(crawler.Crawler(host_concurrency=2).crawl(urls)) as pages:
+            return [page.text async for _, page in pages]
+
+    async def main():
+        return await asyncio.gather(
+            *[
+                crawl([f"https://example.com/{n}/{i}" for i in range(4)])
+                for n in range(3)
+            ]
+        )
+
+    assert asyncio.run(main()) == [["page"] * 4] * 3
+    assert session.most_active == 2
+
+
+def test_host_limiters_follow_the_settings(monkeypatch):
+    monkeypatch.setattr(crawler, "_host_limiters", {})
+
+    async def main():
+        limiter = crawler.get_host_limiter("https://Example.com/a", 2, None)
+        assert crawler.get_host_limiter("https://example.com/b", 2, None) is limiter
+        assert crawler.get_host_limiter("https://example.com/b", 3, None) is not limiter
+
+    asyncio.run(main())
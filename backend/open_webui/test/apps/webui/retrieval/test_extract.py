@@ -0,0 +1,123 @@
+import pytest
+
+from open_webui.retrieval.web import extract
+
+URL = "https://example.com/page"
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <title>Example page</title>
+  <meta name="description" content="An example page">
+  <script>var tracking = true;</script>
+</head>
+<body class="no-sidebar menu-open">
+  <div id="cookie-consent">We use cookies</div>
+  <nav class="site-nav"><a href="/">Home</a> <a href="/docs">Docs</a></nav>
+  <main>
+    <h1>Heading</h1>
+    <p>Some <b>bold</b> text and a <a href="/">link</a>.</p>
+    <div class="share-buttons">Share this</div>
+    <p>An <span>in</span>line word.</p>
+    <button>Click</button>
+  </main>
+  <footer>Copyright</footer>
+</body>
+</html>"""
+
+
+@pytest.fixture(params=["lxml", "stdlib"])
+def parser(request, monkeypatch):
+    if request.param == "lxml":
+        pytest.importorskip("lxml")
+    else:
+        monkeypatch.setattr(extract, "etree", None)
+    return request.param
+
+
+def extract_text(html: str) -> str:
+    return extract.extract_fast(html, URL)[0]
+
+
+def test_content_handler_events():
+    handler = extract.ContentHandler(URL)
+    handler.start("div", {"class": "menu"})
+    handler.start("div", {})
+    handler.data("menu item")
+    handler.end("div")
+    handler.data("more menu")
+    handler.end("div")
+    handler.start("p", {})
+    handler.data("Text ")
+    handler.start("script", {})
+    handler.data("code")
+    handler.end("script")
+    handler.start("em", {})
+    handler.data("in")
+    handler.end("em")
+    handler.data("line\n  words")
+    handler.end("p")
+    handler.start("p", {"hidden": ""})
+    handler.data("hidden")
+    handler.end("p")
+
+    assert handler.close() == "Text inline words"
+
+
+def test_extracts_the_main_content(parser):
+    assert extract_text(PAGE) == (
+        "Heading\nSome bold text and a link.\nAn inline word."
+    )
+
+
+def test_matches_the_text_and_metadata_of_bs4(parser):
+    pytest.importorskip("bs4")
+    text, metadata = extract.extract_fast(PAGE, URL)
+    bs4_text, bs4_metadata = extract.extract_bs4(PAGE, URL)
+
+    assert (
+        metadata
+        == bs4_metadata
+        == {
+            "source": URL,
+            "title": "Example page",
+            "description": "An example page",
+            "language": "en",
+        }
+    )
+    # The same words, without the boilerplate around the main content
+    assert text.split() == [
+        word for word in " ".join(bs4_text.split()).split() if word in text.split()
+    ]
+    for boilerplate in ("cookies", "Docs", "Share", "Click", "Copyright"):
+        assert boilerplate in bs4_text
+        assert boilerplate not in text
+
+
+def test_missing_metadata(parser):
+    _, metadata = extract.extract_fast("<html><body><p>Text</p></body></html>", URL)
+    assert metadata == {"source": URL, "language": "No language found."}
+
+
+def test_uses_the_main_content_when_it_is_enough_of_the_page(parser):
+    article = "<article><p>" + "word " * 30 + "</p></article>"
+    intro = "<p>" + "intro " * 10 + "</p>"
+    assert "intro" not in extract_text(f"<html><body>{intro}{article}</body></html>")
+
+    intro = "<p>" + "intro " * 200 + "</p>"
+    text = extract_text(f"<html><body>{intro}{article}</body></html>")
+    assert "intro" in text and "word" in text
+
+
+def test_keeps_wrappers_of_the_main_content(parser):
+    html = (
+        '<html><body><div class="site no-sidebar has-sidebar share-enabled">'
+        '<div id="sidebar-layout"><nav>Menu</nav><main><p>Text</p></main>'
+        "</div></div></body></html>"
+    )
+    assert extract_text(html) == "Text"
+
+
+def test_falls_back_to_the_whole_text(parser):
+    html = '<html><body><div class="sidebar"><p>Only text</p></div></body></html>'
+    assert extract_text(html) == "Only text"
@@ -0,0 +1,53 @@
+import operator
+import os
+import time
+from concurrent.futures import TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from open_webui.retrieval.loaders.pool import ExtractionPool
+
+# The tasks run in spawned processes, so they are importable functions
+
+
+@pytest.fixture
+def pool():
+    pool = ExtractionPool(workers=2, timeout=1)
+    yield pool
+    pool.close()
+
+
+def test_runs_tasks(pool):
+    assert pool.submit(operator.add, 1, 2).result() == 3
+    with pytest.raises(ZeroDivisionError):
+        pool.submit(operator.truediv, 1, 0).result()
+
+
+def test_queued_tasks_do_not_time_out(pool):
+    # Six tasks of 0.6s each take 1.8s on two workers, more than the timeout,
+    # but none of them runs for longer than it
+    futures = [pool.submit(time.sleep, 0.6) for _ in range(6)]
+    assert [future.result() for future in futures] == [None] * 6
+
+
+def test_replaces_only_the_stuck_worker(pool):
+    # Starts both workers first, the timeline below is then predictable
+    for future in [pool.submit(time.sleep, 0.2) for _ in range(2)]:
+        future.result()
+
+    stuck = pool.submit(time.sleep, 30)
+    time.sleep(0.5)
+    # Still running when the stuck task times out
+    other = pool.submit(time.sleep, 0.9)
+
+    with pytest.raises(TimeoutError):
+        stuck.result()
+    assert other.result() is None
+    assert pool.submit(operator.add, 1, 2).result() == 3
+
+
+def test_replaces_crashed_workers(pool):
+    with pytest.raises(BrokenProcessPool):
+        pool.submit(os._exit, 1).result()
+    assert pool.submit(operator.add, 1, 2).result() == 3
@@ -0,0 +1,289 @@
+import asyncio
+import importlib.util
+import os
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from open_webui.models.jobs import IngestionJobModel
+from open_webui.retrieval import ingestion
+
+
+class FakeIngestionJobs:
+    """In-memory stand-in for the ingestion_job table."""
+
+    def __init__(self):
+        self.jobs: dict[str, IngestionJobModel] = {}
+
+    def add(self, type: str, status: str = "pending", data: dict = None, age=0):
+        now = int(time.time())
+        job = IngestionJobModel(
+            id=str(uuid.uuid4()),
+            user_id="user",
+            type=type,
+            status=status,
+            data=data or {},
+            created_at=now - age,
+            updated_at=now - age,
+        )
+        self.jobs[job.id] = job
+        return job
+
+    def insert_new_job(self, user_id, form_data):
+        return self.add(form_data.type, data=form_data.data)
+
+    def get_jobs_by_status(self, statuses):
+        return [job for job in self.jobs.values() if job.status in statuses]
+
+    def claim_job_by_id(self, id):
+        job = self.jobs.get(id)
+        if job is None or job.status != "pending":
+            return None
+        job.status = "processing"
+        return job.model_copy()
+
+    def update_job_by_id(self, id, status=None, progress=None, data=None, error=None):
+        job = self.jobs[id]
+        if status is not None:
+            job.status = status
+        if progress is not None:
+            job.progress = progress
+        if data is not None:
+            job.data = {**(job.data or {}), **data}
+        if error is not None:
+            job.error = error
+        return job.model_copy()
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    fake = FakeIngestionJobs()
+    monkeypatch.setattr(ingestion, "IngestionJobs", fake)
+    monkeypatch.setattr(
+        ingestion,
+        "Users",
+        SimpleNamespace(get_user_by_id=lambda id: SimpleNamespace(id=id)),
+    )
+    monkeypatch.setattr(ingestion, "get_job_request", lambda app: None)
+    return fake
+
+
+def set_handlers(monkeypatch, **handlers):
+    monkeypatch.setattr(ingestion, "JOB_HANDLERS", handlers)
+
+
+async def wait_for_jobs(jobs: FakeIngestionJobs, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while any(job.status in ("pending", "processing") for job in jobs.jobs.values()):
+        assert time.monotonic() < deadline, "jobs did not finish"
+        await asyncio.sleep(0.01)
+
+
+def run_queue(jobs: FakeIngestionJobs, submit=lambda queue: None):
+    async def run():
+        queue = ingestion.IngestionQueue(workers=2)
+        await queue.start(app=None)
+        try:
+            submit(queue)
+            await wait_for_jobs(jobs)
+        finally:
+            await queue.stop()
+
+    asyncio.run(run())
+
+
+def test_runs_submitted_jobs(jobs, monkeypatch):
+    calls = []
+
+    def handler(request, job, user, report):
+        report(50, {"step": "half"})
+        calls.append((job.data["file_id"], user.id))
+
+    set_handlers(monkeypatch, file=handler)
+    run_queue(jobs, lambda queue: queue.submit("user", "file", {"file_id": "a"}))
+
+    (job,) = jobs.jobs.values()
+    assert calls == [("a", "user")]
+    assert job.status == "completed"
+    assert job.progress == 100
+    assert job.data["step"] == "half"
+
+
+def test_records_failures(jobs, monkeypatch):
+    def handler(request, job, user, report):
+        raise ValueError("broken file")
+
+    set_handlers(monkeypatch, file=handler)
+
+    def submit(queue):
+        queue.submit("user", "file", {})
+        queue.submit("user", "unknown", {})
+
+    run_queue(jobs, submit)
+
+    errors = sorted(job.error for job in jobs.jobs.values())
+    assert all(job.status == "failed" for job in jobs.jobs.values())
+    assert errors == ["Unknown ingestion job type: unknown", "broken file"]
+
+
+def test_runs_a_job_enqueued_twice_once(jobs, monkeypatch):
+    calls = []
+    set_handlers(monkeypatch, file=lambda request, job, user, report: calls.append(1))
+
+    def submit(queue):
+        job = queue.submit("user", "file", {})
+        queue.enqueue(job.id)
+
+    run_queue(jobs, submit)
+    assert len(calls) == 1
+
+
+def test_resumes_interrupted_jobs(jobs, monkeypatch):
+    # Jobs left pending or processing by a restart are run again on start,
+    # unless another instance is still processing them
+    calls = []
+    set_handlers(
+        monkeypatch,
+        file=lambda request, job, user, report: calls.append(job.data["name"]),
+    )
+    stale = ingestion.INGESTION_QUEUE_STALE_TIMEOUT + 1
+    jobs.add("file", status="pending", data={"name": "pending"})
+    jobs.add("file", status="processing", data={"name": "interrupted"}, age=stale)
+    jobs.add("file", status="processing", data={"name": "running"})
+    jobs.add("file", status="completed", data={"name": "done"})
+    jobs.add("file", status="failed", data={"name": "failed"})
+
+    async def run():
+        queue = ingestion.IngestionQueue(workers=2)
+        await queue.start(app=None)
+        try:
+            deadline = time.monotonic() + 5
+            while len(calls) < 2:
+                assert time.monotonic() < deadline, "jobs did not finish"
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)
+        finally:
+            await queue.stop()
+
+    asyncio.run(run())
+
+    assert sorted(calls) == ["interrupted", "pending"]
+    assert [job.status for job in jobs.jobs.values()] == [
+        "completed",
+        "completed",
+        "processing",
+        "completed",
+        "failed",
+    ]
+
+
+def test_running_jobs_send_heartbeats(jobs, monkeypatch):
+    heartbeats = []
+    update_job_by_id = jobs.update_job_by_id
+
+    def update(id, **kwargs):
+        if not kwargs:
+            heartbeats.append(id)
+        return update_job_by_id(id, **kwargs)
+
+    monkeypatch.setattr(jobs, "update_job_by_id", update)
+    monkeypatch.setattr(ingestion, "INGESTION_QUEUE_STALE_TIMEOUT", 0.04)
+    set_handlers(monkeypatch, file=lambda request, job, user, report: time.sleep(0.1))
+
+    run_queue(jobs, lambda queue: queue.submit("user", "file", {}))
+    assert len(heartbeats) >= 2
+
+
+def test_vector_migration_job(monkeypatch):
+    clients = {"chroma": object(), "pgvector": object()}
+    calls = {}
+
+    def migrate_collections(source, target, collection_names, **kwargs):
+        calls.update(source=source, target=target, names=collection_names, **kwargs)
+        kwargs["report"]({"completed": collection_names[:1]}, {"errors": 0})
+        return {"errors": 0}
+
+    monkeypatch.setattr(ingestion, "get_client", clients.get)
+    monkeypatch.setattr(ingestion, "get_collection_names", lambda: ["a", "b"])
+    monkeypatch.setattr(ingestion, "migrate_collections", migrate_collections)
+
+    config = SimpleNamespace(RAG_EMBEDDING_ENGINE="", RAG_EMBEDDING_MODEL="model")
+    request = SimpleNamespace(
+        app=SimpleNamespace(
+            state=SimpleNamespace(
+                config=config,
+                EMBEDDING_FUNCTION=lambda texts, user=None: [[1.0] for _ in texts],
+            )
+        )
+    )
+    job = SimpleNamespace(
+        data={"source": "chroma", "target": "pgvector", "reembed": True}
+    )
+    reports = []
+
+    ingestion.run_vector_migration_job(
+        request, job, None, lambda progress, data=None: reports.append((progress, data))
+    )
+
+    assert calls["source"] is clients["chroma"]
+    assert calls["target"] is clients["pgvector"]
+    assert calls["names"] == ["a", "b"]
+    assert calls["embedding_function"](["x"]) == [[1.0]]
+    assert '"model": "model"' in calls["embedding_config"]
+    # The collection list is recorded first, then the checkpoints
+    assert reports[0] == (0, {"collection_names": ["a", "b"]})
+    assert reports[1][0] == 50
+    assert reports[1][1]["checkpoint"] == {"completed": ["a"]}
+
+    monkeypatch.setattr(
+        ingestion, "migrate_collections", lambda *args, **kwargs: {"errors": 1}
+    )
+    with pytest.raises(Exception, match="1 collections failed to migrate"):
+        ingestion.run_vector_migration_job(
+            request, job, None, lambda progress, data=None: None
+        )
+
+
+def test_ingestion_job_migration():
+    path = os.path.join(
+        os.path.dirname(ingestion.__file__),
+        "..",
+        "migrations",
+        "versions",
+        "9f0c9cd09105_add_ingestion_job_table.py",
+    )
+    spec = importlib.util.spec_from_file_location("ingestion_job_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    engine = sa.create_engine("sqlite://")
+    with engine.begin() as connection:
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.upgrade()
+
+            inspector = sa.inspect(connection)
+            assert "ingestion_job" in inspector.get_table_names()
+            assert {
+                column["name"] for column in inspector.get_columns("ingestion_job")
+            } == {
+                "id",
+                "user_id",
+                "type",
+                "status",
+                "progress",
+                "data",
+                "error",
+                "created_at",
+                "updated_at",
+            }
+            assert [
+                index["name"] for index in inspector.get_indexes("ingestion_job")
+            ] == ["ingestion_job_status_idx"]
+
+            migration.downgrade()
+            assert "ingestion_job" not in sa.inspect(connection).get_table_names()
@@ -0,0 +1,44 @@
+from langchain_core.documents import Document
+
+from open_webui.retrieval.loaders import main as loaders
+
+
+class PagedLoader:
+    def __init__(self, pages: list[str]):
+        self.pages = pages
+        self.read = 0
+
+    def load(self):
+        raise AssertionError("load() reads the whole file")
+
+    def lazy_load(self):
+        for page in self.pages:
+            self.read += 1
+            yield Document(page_content=page, metadata={"page": self.read - 1})
+
+
+def test_lazy_load_streams_pages(monkeypatch):
+    monkeypatch.setattr(loaders, "CONTENT_EXTRACTION_WORKERS", 0)
+    paged_loader = PagedLoader(["firÃ© page", "second page", "third page"])
+    loader = loaders.Loader()
+    monkeypatch.setattr(loader, "_get_loader", lambda *args: paged_loader)
+
+    docs = loader.lazy_load("file.pdf", "application/pdf", "/tmp/file.pdf")
+
+    first = next(docs)
+    assert paged_loader.read == 1
+    # Mojibake is fixed page by page
+    assert first.page_content == "firé page"
+    assert first.metadata == {"page": 0}
+
+    assert [doc.page_content for doc in docs] == ["second page", "third page"]
+    assert paged_loader.read == 3
+
+
+def test_load_reads_all_pages(monkeypatch):
+    monkeypatch.setattr(loaders, "CONTENT_EXTRACTION_WORKERS", 0)
+    loader = loaders.Loader()
+    monkeypatch.setattr(loader, "_get_loader", lambda *args: PagedLoader(["a", "b"]))
+
+    docs = loader.load("file.txt", "text/plain", "/tmp/file.txt")
+    assert [doc.page_content for doc in docs] == ["a", "b"]
@@ -0,0 +1,153 @@
+import os
+
+import numpy as np
+import pytest
+
+from open_webui.retrieval.vector.dbs.local import LocalVectorClient
+
+PRECISIONS = ["float32", "float16", "int8", "binary"]
+
+
+def make_items(count: int, dimension: int = 32, seed: int = 0, prefix: str = "item"):
+    vectors = np.random.default_rng(seed).normal(size=(count, dimension))
+    return [
+        {
+            "id": f"{prefix}-{idx}",
+            "text": f"text {idx}",
+            "vector": vectors[idx].tolist(),
+            "metadata": {"file_id": f"file-{idx % 3}", "idx": idx},
+        }
+        for idx in range(count)
+    ]
+
+
+def search_ids(client, item, limit=3, filter=None, collection_name="test"):
+    result = client.search(collection_name, [item["vector"]], limit, filter=filter)
+    return result.ids[0]
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_insert_and_search(tmp_path, precision):
+    client = LocalVectorClient(path=str(tmp_path), precision=precision)
+    items = make_items(50)
+    client.insert("test", items)
+
+    assert client.has_collection("test")
+    assert not client.has_collection("other")
+
+    result = client.search("test", [items[7]["vector"]], 5, include_vectors=True)
+    assert result.ids[0][0] == "item-7"
+    assert result.documents[0][0] == "text 7"
+    assert result.metadatas[0][0] == {"file_id": "file-1", "idx": 7}
+    assert result.distances[0][0] == pytest.approx(1.0, abs=0.02)
+    assert result.distances[0] == sorted(result.distances[0], reverse=True)
+    assert len(result.embeddings[0][0]) == 32
+
+    assert client.search("other", [items[0]["vector"]], 5) is None
+
+
+def test_upsert_replaces_items(tmp_path):
+    client = LocalVectorClient(path=str(tmp_path))
+    items = make_items(10)
+    client.insert("test", items)
+
+    # Item 0 moves to the vector of item 5's neighbourhood
+    replaced = {**items[0], "text": "replaced", "vector": items[5]["vector"]}
+    client.upsert("test", [replaced, *make_items(2, seed=1, prefix="new")])
+
+    result = client.get("test")
+    assert len(result.ids[0]) == 12
+    assert dict(zip(result.ids[0], result.documents[0]))["item-0"] == "replaced"
+    assert set(search_ids(client, items[5], limit=2)) == {"item-0", "item-5"}
+
+    with pytest.raises(ValueError):
+        client.upsert("test", make_items(1, dimension=8))
+
+
+def test_delete(tmp_path):
+    client = LocalVectorClient(path=str(tmp_path))
+    items = make_items(12)
+    client.insert("test", items)
+
+    client.delete("test", ids=["item-3"])
+    assert "item-3" not in search_ids(client, items[3], limit=12)
+
+    client.delete("test", filter={"file_id": "file-1"})
+    remaining = client.get("test").ids[0]
+    assert len(remaining) == 7
+    assert all(int(id.split("-")[1]) % 3 != 1 for id in remaining)
+
+    # Deleting without ids or filter keeps everything
+    client.delete("test")
+    assert len(client.get("test").ids[0]) == 7
+
+
+def test_filtered_search(tmp_path):
+    client = LocalVectorClient(path=str(tmp_path))
+    items = make_items(30)
+    client.insert("test", items)
+
+    ids = search_ids(client, items[4], limit=30, filter={"file_id": "file-2"})
+    assert len(ids) == 10
+    assert all(int(id.split("-")[1]) % 3 == 2 for id in ids)
+
+    # A list matches any of its values
+    ids = search_ids(
+        client, items[4], limit=30, filter={"file_id": ["file-0", "file-1"]}
+    )
+    assert len(ids) == 20
+    assert ids[0] == "item-4"
+
+    result = client.query("test", filter={"idx": 4})
+    assert result.ids == [["item-4"]]
+
+
+def test_collections_persist_across_reopen(tmp_path):
+    client = LocalVectorClient(path=str(tmp_path), precision="int8")
+    items = make_items(20)
+    client.insert("test", items)
+    client.delete("test", ids=["item-0"])
+    client.insert("other", make_items(5, seed=1))
+
+    # The precision of an existing collection is kept
+    reopened = LocalVectorClient(path=str(tmp_path), precision="float32")
+    assert reopened.has_collection("test")
+    assert search_ids(reopened, items[9])[0] == "item-9"
+    assert "item-0" not in reopened.get("test").ids[0]
+
+    pages = list(reopened.iter_get("test", page_size=7, include_vectors=True))
+    assert [len(page.ids[0]) for page in pages] == [7, 7, 5]
+    vector = np.asarray(pages[0].embeddings[0][0])
+    expected = np.asarray(items[1]["vector"])
+    assert vector @ expected / np.linalg.norm(expected) == pytest.approx(1.0, abs=0.01)
+
+    reopened.delete_collection("test")
+    assert not LocalVectorClient(path=str(tmp_path)).has_collection("test")
+    assert LocalVectorClient(path=str(tmp_path)).has_collection("other")
+
+
+def test_compaction_keeps_the_remaining_items(tmp_path):
+    client = LocalVectorClient(path=str(tmp_path))
+    items = make_items(2000)
+    client.insert("test", items)
+    vectors_path = f"{client._file_prefix('test')}.vectors"
+    size = os.path.getsize(vectors_path)
+
+    client.delete("test", ids=[item["id"] for item in items[:1500]])
+    assert os.path.getsize(vectors_path) < size
+
+    reopened = LocalVectorClient(path=str(tmp_path))
+    assert len(reopened.get("test").ids[0]) == 500
+    assert search_ids(reopened, items[1700])[0] == "item-1700"
+    assert "item-100" not in search_ids(reopened, items[100])
+
+
+def test_reset(tmp_path):
+    client = LocalVectorClient(path=str(tmp_path), precision="binary")
+    client.insert("test", make_items(5))
+
+    client.reset()
+    assert not client.has_collection("test")
+    assert not [
+        name for name in os.listdir(tmp_path) if name.endswith(("vectors", "rescore"))
+    ]
@@ -0,0 +1,150 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents import Document
+
+from open_webui.retrieval.vector.main import GetResult
+from open_webui.routers import retrieval
+
+EMBEDDING_CONFIG = json.dumps({"engine": "", "model": "model"})
+
+
+class FakeVectorClient:
+    def __init__(self, fail_on_insert: int = 0):
+        self.collections: dict[str, dict] = {}
+        self.inserts = 0
+        self.fail_on_insert = fail_on_insert
+
+    def has_collection(self, collection_name):
+        return collection_name in self.collections
+
+    def delete_collection(self, collection_name):
+        self.collections.pop(collection_name, None)
+
+    def iter_get(self, collection_name, page_size=2, include_vectors=False):
+        items = list(self.collections.get(collection_name, {}).values())
+        for start in range(0, len(items), 2):
+            page = items[start : start + 2]
+            yield GetResult(
+                ids=[[item["id"] for item in page]],
+                documents=[[item["text"] for item in page]],
+                metadatas=[[item["metadata"] for item in page]],
+                embeddings=(
+                    [[item["vector"] for item in page]] if include_vectors else None
+                ),
+            )
+
+    def insert(self, collection_name, items):
+        self.inserts += 1
+        if self.inserts == self.fail_on_insert:
+            raise RuntimeError("insert failed")
+        collection = self.collections.setdefault(collection_name, {})
+        for item in items:
+            collection[item["id"]] = item
+
+    def upsert(self, collection_name, items):
+        collection = self.collections.setdefault(collection_name, {})
+        for item in items:
+            collection[item["id"]] = item
+
+    def delete(self, collection_name, ids=None, filter=None):
+        for id in ids:
+            self.collections[collection_name].pop(id, None)
+
+    def texts(self, collection_name):
+        return sorted(
+            item["text"] for item in self.collections[collection_name].values()
+        )
+
+
+@pytest.fixture
+def request_(monkeypatch):
+    monkeypatch.setattr(retrieval, "RAG_INGESTION_BATCH_SIZE", 1)
+    monkeypatch.setattr(retrieval, "get_embedding_function", lambda *args: None)
+    monkeypatch.setattr(
+        retrieval,
+        "embed_with_cache",
+        lambda function, config, texts, user=None: [[1.0] for _ in texts],
+    )
+    config = SimpleNamespace(
+        RAG_EMBEDDING_ENGINE="",
+        RAG_EMBEDDING_MODEL="model",
+        RAG_OPENAI_API_BASE_URL="",
+        RAG_OPENAI_API_KEY="",
+        RAG_OLLAMA_BASE_URL="",
+        RAG_OLLAMA_API_KEY="",
+        RAG_EMBEDDING_BATCH_SIZE=1,
+    )
+    return SimpleNamespace(
+        app=SimpleNamespace(state=SimpleNamespace(config=config, ef=None))
+    )
+
+
+def use_client(monkeypatch, client, texts=(), embedding_config=EMBEDDING_CONFIG):
+    monkeypatch.setattr(retrieval, "VECTOR_DB_CLIENT", client)
+    client.collections["web"] = {
+        f"old-{idx}": {
+            "id": f"old-{idx}",
+            "text": text,
+            "vector": [0.0],
+            "metadata": {"embedding_config": embedding_config},
+        }
+        for idx, text in enumerate(texts)
+    }
+    return client
+
+
+def save(request, *texts):
+    return retrieval.save_docs_to_vector_db(
+        request,
+        (Document(page_content=text, metadata={}) for text in texts),
+        "web",
+        overwrite=True,
+        split=False,
+    )
+
+
+def test_overwrite_replaces_the_collection(request_, monkeypatch):
+    client = use_client(monkeypatch, FakeVectorClient(), ["a", "b", "c"])
+
+    assert save(request_, "new 1", "new 2")
+    assert client.texts("web") == ["new 1", "new 2"]
+
+
+def test_failed_overwrite_keeps_the_collection(request_, monkeypatch):
+    client = use_client(monkeypatch, FakeVectorClient(fail_on_insert=2), ["a", "b"])
+
+    with pytest.raises(RuntimeError):
+        save(request_, "new 1", "new 2", "new 3")
+    assert client.texts("web") == ["a", "b"]
+
+
+def test_empty_overwrite_keeps_the_collection(request_, monkeypatch):
+    client = use_client(monkeypatch, FakeVectorClient(), ["a"])
+
+    with pytest.raises(ValueError):
+        save(request_)
+    assert client.texts("web") == ["a"]
+
+
+def test_overwrite_drops_chunks_of_another_model(request_, monkeypatch):
+    other_config = json.dumps({"engine": "", "model": "other"})
+    client = use_client(monkeypatch, FakeVectorClient(), ["a"], other_config)
+
+    assert save(request_, "new")
+    assert client.texts("web") == ["new"]
+    assert set(client.collections) == {"web"}
+
+
+def test_failed_overwrite_keeps_the_collection_of_another_model(request_, monkeypatch):
+    # The new chunks are staged until all of them are in
+    other_config = json.dumps({"engine": "", "model": "other"})
+    client = use_client(
+        monkeypatch, FakeVectorClient(fail_on_insert=2), ["a", "b"], other_config
+    )
+
+    with pytest.raises(RuntimeError):
+        save(request_, "new 1", "new 2")
+    assert client.texts("web") == ["a", "b"]
+    assert set(client.collections) == {"web"}
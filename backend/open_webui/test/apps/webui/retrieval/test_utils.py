@@ -0,0 +1,186 @@
+from langchain_core.documents import Document
+
+from open_webui.retrieval import utils
+from open_webui.retrieval.vector.generations import (
+    CollectionGenerations,
+    GenerationTrackingClient,
+)
+from open_webui.retrieval.vector.main import GetResult, SearchResult
+
+
+class Reranker:
+    def __init__(self, model_name=None):
+        if model_name:
+            self.model_name = model_name
+        self.calls = 0
+
+    def predict(self, pairs):
+        self.calls += len(pairs)
+        return [len(text) for _, text in pairs]
+
+
+def rerank(reranker, texts):
+    compressor = utils.RerankCompressor(
+        embedding_function=None,
+        top_n=len(texts),
+        reranking_function=reranker,
+        r_score=0,
+    )
+    documents = [Document(page_content=text, metadata={}) for text in texts]
+    return [doc.page_content for doc in compressor.compress_documents(documents, "q")]
+
+
+def test_rerank_scores_are_cached_per_model(monkeypatch):
+    monkeypatch.setattr(utils, "RERANK_SCORE_CACHE", utils.RerankScoreCache(16))
+
+    first = Reranker("model")
+    assert rerank(first, ["a", "ccc", "bb"]) == ["ccc", "bb", "a"]
+    assert first.calls == 3
+
+    # A reloaded model reuses the scores, another model does not
+    reloaded = Reranker("model")
+    assert rerank(reloaded, ["a", "ccc", "bb"]) == ["ccc", "bb", "a"]
+    assert reloaded.calls == 0
+
+    other = Reranker("other")
+    rerank(other, ["a", "ccc"])
+    assert other.calls == 2
+
+    # Functions without a model name are not cached
+    unnamed = Reranker()
+    rerank(unnamed, ["a"])
+    rerank(unnamed, ["a"])
+    assert unnamed.calls == 2
+
+
+class FakeVectorClient:
+    def __init__(self):
+        self.include_vectors = None
+
+    def lexical_search(self, collection_name, query, limit):
+        return SearchResult(ids=[[]], documents=[[]], metadatas=[[]], distances=[[]])
+
+    def search(self, collection_name, vectors, limit, include_vectors=False):
+        self.include_vectors = include_vectors
+        return SearchResult(
+            ids=[["1"]],
+            documents=[["text"]],
+            metadatas=[[{}]],
+            distances=[[0.1]],
+            embeddings=[[[1.0, 0.0]]] if include_vectors else None,
+        )
+
+
+def test_vectors_are_only_fetched_for_cosine_scoring(monkeypatch):
+    client = FakeVectorClient()
+    monkeypatch.setattr(utils, "VECTOR_DB_CLIENT", client)
+    embedding_function = lambda query: (
+        [[1.0, 0.0] for _ in query] if isinstance(query, list) else [1.0, 0.0]
+    )
+
+    result = utils.query_doc_with_hybrid_search(
+        "collection", "q", embedding_function, 1, Reranker("model"), 0
+    )
+    assert client.include_vectors is False
+    assert result["documents"] == [["text"]]
+
+    result = utils.query_doc_with_hybrid_search(
+        "collection", "q", embedding_function, 1, None, 0
+    )
+    assert client.include_vectors is True
+    assert result["documents"] == [["text"]]
+    assert utils.EMBEDDING_METADATA_KEY not in result["metadatas"][0][0]
+
+
+def doc(text, **metadata):
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_reciprocal_rank_fusion_orders_by_summed_ranks():
+    lexical = [doc("a"), doc("b"), doc("c")]
+    vector = [doc("b", **{utils.EMBEDDING_METADATA_KEY: [1.0]}), doc("d")]
+
+    fused = utils.reciprocal_rank_fusion([lexical, vector], k=60)
+
+    # b is found by both, d ranks higher in its list than c
+    assert [d.page_content for d in fused] == ["b", "a", "d", "c"]
+    # The copy carrying the stored vector is kept
+    assert utils.EMBEDDING_METADATA_KEY in fused[0].metadata
+
+
+class CollectionClient:
+    """Collections of texts, with knowledge bases reading their files too."""
+
+    def __init__(self):
+        self.collections = {"kb": ["kb text"], "file-1": ["first file"]}
+        self.members = {"kb": ["kb", "file-1"]}
+        self.reads = 0
+
+    def get_collection_members(self, collection_name):
+        return list(self.members.get(collection_name, [collection_name]))
+
+    def iter_get(self, collection_name):
+        self.reads += 1
+        texts = [
+            text
+            for member in self.get_collection_members(collection_name)
+            for text in self.collections.get(member, [])
+        ]
+        yield GetResult(ids=[texts], documents=[texts], metadatas=[[{}] * len(texts)])
+
+    def insert(self, collection_name, items):
+        self.collections.setdefault(collection_name, []).extend(
+            item["text"] for item in items
+        )
+
+    def reset(self):
+        pass
+
+
+def test_bm25_indexes_are_rebuilt_after_writes(monkeypatch):
+    generations = CollectionGenerations()
+    client = CollectionClient()
+    monkeypatch.setattr(
+        utils, "VECTOR_DB_CLIENT", GenerationTrackingClient(client, generations)
+    )
+    cache = utils.BM25IndexCache(ttl=300, generations=generations)
+
+    index = cache.get("kb")
+    assert cache.get("kb") is index
+    assert client.reads == 1
+
+    # Writes to the knowledge base, or to one of its files
+    utils.VECTOR_DB_CLIENT.insert("kb", [{"text": "added"}])
+    assert "added" in [d.page_content for d in cache.get("kb").docs]
+    utils.VECTOR_DB_CLIENT.insert("file-1", [{"text": "more"}])
+    assert "more" in [d.page_content for d in cache.get("kb").docs]
+    assert client.reads == 3
+
+    # A file added to the knowledge base without writing to it
+    client.collections["file-2"] = ["second file"]
+    client.members["kb"].append("file-2")
+    assert "second file" in [d.page_content for d in cache.get("kb").docs]
+    assert client.reads == 4
+
+    # Other collections are not affected
+    utils.VECTOR_DB_CLIENT.insert("other", [{"text": "text"}])
+    cache.get("kb")
+    assert client.reads == 4
+
+
+def test_bm25_indexes_see_writes_of_other_workers(monkeypatch):
+    # Workers sharing their generations (in Redis) each have their own cache
+    generations = CollectionGenerations()
+    client = CollectionClient()
+    monkeypatch.setattr(utils, "VECTOR_DB_CLIENT", client)
+    cache = utils.BM25IndexCache(ttl=300, generations=generations)
+    other_worker = GenerationTrackingClient(client, generations)
+
+    cache.get("file-1")
+    other_worker.insert("file-1", [{"text": "more"}])
+    assert "more" in [d.page_content for d in cache.get("file-1").docs]
+
+    cache.get("file-1")
+    other_worker.reset()
+    cache.get("file-1")
+    assert client.reads == 3
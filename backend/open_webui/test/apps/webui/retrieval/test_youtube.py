@@ -0,0 +1,68 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from langchain_core.documents import Document
+
+from open_webui.retrieval.vector.main import GetResult
+from open_webui.routers import retrieval
+
+
+class FakeYoutubeLoader:
+    def __init__(self, url, language, proxy_url):
+        self.video_id = url.rsplit("=", 1)[-1]
+        self.language = [language]
+
+    def load(self):
+        return [Document(page_content=f"transcript of {self.video_id}", metadata={})]
+
+
+class FakeVectorClient:
+    def __init__(self):
+        self.collections: dict[str, dict] = {}
+
+    def has_collection(self, collection_name):
+        return collection_name in self.collections
+
+    def query(self, collection_name, filter, limit=None):
+        metadata = self.collections[collection_name]
+        if metadata["hash"] != filter["hash"]:
+            return GetResult(ids=[[]], documents=[[]], metadatas=[[]])
+        return GetResult(ids=[["id"]], documents=[["text"]], metadatas=[[metadata]])
+
+
+def test_concurrent_requests_embed_a_video_once(monkeypatch):
+    client = FakeVectorClient()
+    saves = []
+    lock = threading.Lock()
+
+    def save_docs_to_vector_db(request, docs, collection_name, metadata, **kwargs):
+        with lock:
+            saves.append(collection_name)
+        time.sleep(0.05)
+        client.collections[collection_name] = {**metadata, "embedding_config": "e"}
+
+    monkeypatch.setattr(retrieval, "YoutubeLoader", FakeYoutubeLoader)
+    monkeypatch.setattr(retrieval, "VECTOR_DB_CLIENT", client)
+    monkeypatch.setattr(retrieval, "save_docs_to_vector_db", save_docs_to_vector_db)
+    monkeypatch.setattr(retrieval, "get_embedding_config", lambda request: "e")
+    config = SimpleNamespace(YOUTUBE_LOADER_LANGUAGE="en", YOUTUBE_LOADER_PROXY_URL="")
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(config=config)))
+
+    urls = ["https://www.youtube.com/watch?v=aaaaaaaaaaa"] * 4 + [
+        "https://www.youtube.com/watch?v=bbbbbbbbbbb"
+    ]
+    with ThreadPoolExecutor(len(urls)) as executor:
+        results = list(
+            executor.map(
+                lambda url: retrieval.process_youtube_url(request, url, None, None),
+                urls,
+            )
+        )
+
+    # Each video is embedded once, the other requests reuse its collection
+    collection_names = {result["collection_name"] for result in results}
+    assert len(collection_names) == 2
+    assert sorted(saves) == sorted(collection_names)
+    assert not retrieval.YOUTUBE_COLLECTION_LOCKS.locks
@@ -0,0 +1,73 @@
+"""
+Benchmark document extraction inline vs. in the extraction process pool.
+
+Usage:
+    python -m open_webui.test.benchmarks.bench_loader <corpus_dir> [--workers N]
+
+Every file in the corpus directory is extracted once with extraction running
+in the calling thread and once through the process pool, and the wall time,
+page count and time to first page are reported for both modes.
+"""
+
+import argparse
+import mimetypes
+import os
+import time
+
+import open_webui.retrieval.loaders.main as loaders
+
+
+def run(corpus_dir: str, workers: int) -> dict:
+    files = sorted(
+        os.path.join(corpus_dir, name)
+        for name in os.listdir(corpus_dir)
+        if os.path.isfile(os.path.join(corpus_dir, name))
+    )
+
+    results = {}
+    for mode, pool_size in [("inline", 0), ("pool", workers)]:
+        loaders.CONTENT_EXTRACTION_WORKERS = pool_size
+        loaders.close_extraction_pools()
+
+        pages = 0
+        first_page = []
+        start = time.perf_counter()
+        for file_path in files:
+            file_start = time.perf_counter()
+            loader = loaders.Loader()
+            for idx, _ in enumerate(
+                loader.lazy_load(
+                    os.path.basename(file_path),
+                    mimetypes.guess_type(file_path)[0],
+                    file_path,
+                )
+            ):
+                if idx == 0:
+                    first_page.append(time.perf_counter() - file_start)
+                pages += 1
+
+        results[mode] = {
+            "files": len(files),
+            "pages": pages,
+            "seconds": time.perf_counter() - start,
+            "avg_first_page_seconds": (
+                sum(first_page) / len(first_page) if first_page else 0.0
+            ),
+        }
+
+    loaders.close_extraction_pools()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("corpus_dir")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    for mode, result in run(args.corpus_dir, args.workers).items():
+        print(
+            f"{mode:>6}: {result['files']} files, {result['pages']} pages in "
+            f"{result['seconds']:.2f}s (first page after "
+            f"{result['avg_first_page_seconds']:.2f}s on average)"
+        )
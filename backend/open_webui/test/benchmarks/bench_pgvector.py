@@ -0,0 +1,117 @@
+"""
+Benchmark pgvector inserts and upserts against the previous ORM based writes.
+
+Usage:
+    PGVECTOR_DB_URL=postgresql://... \\
+    python -m open_webui.test.benchmarks.bench_pgvector [--chunks N] [--dim D]
+
+Random chunks are written to a scratch collection, first with the former
+per-object ORM path (bulk_save_objects for inserts, one SELECT per item for
+upserts), then with the COPY / INSERT ... ON CONFLICT path of PgvectorClient.
+The scratch collection is deleted afterwards.
+"""
+
+import argparse
+import time
+import uuid
+
+import numpy as np
+
+from open_webui.retrieval.vector.dbs.pgvector import DocumentChunk, PgvectorClient
+
+COLLECTION_NAME = "bench-pgvector"
+
+
+def get_items(count: int, dim: int) -> list[dict]:
+    vectors = np.random.default_rng(0).normal(size=(count, dim)).astype(np.float32)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "text": f"chunk {idx}",
+            "vector": vectors[idx].tolist(),
+            "metadata": {"file_id": str(idx % 100), "start_index": idx},
+        }
+        for idx in range(count)
+    ]
+
+
+def legacy_insert(client: PgvectorClient, items: list[dict]):
+    session = client.Session()
+    session.bulk_save_objects(
+        [
+            DocumentChunk(
+                id=item["id"],
+                vector=client.adjust_vector_length(list(item["vector"])),
+                collection_name=COLLECTION_NAME,
+                text=item["text"],
+                vmetadata=item["metadata"],
+            )
+            for item in items
+        ]
+    )
+    session.commit()
+    session.close()
+
+
+def legacy_upsert(client: PgvectorClient, items: list[dict]):
+    session = client.Session()
+    for item in items:
+        vector = client.adjust_vector_length(list(item["vector"]))
+        existing = (
+            session.query(DocumentChunk).filter(DocumentChunk.id == item["id"]).first()
+        )
+        if existing:
+            existing.vector = vector
+            existing.text = item["text"]
+            existing.vmetadata = item["metadata"]
+            existing.collection_name = COLLECTION_NAME
+        else:
+            session.add(
+                DocumentChunk(
+                    id=item["id"],
+                    vector=vector,
+                    collection_name=COLLECTION_NAME,
+                    text=item["text"],
+                    vmetadata=item["metadata"],
+                )
+            )
+    session.commit()
+    session.close()
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def run(chunks: int, dim: int) -> dict:
+    client = PgvectorClient()
+    items = get_items(chunks, dim)
+
+    results = {}
+    try:
+        client.delete_collection(COLLECTION_NAME)
+        results["legacy insert"] = timed(legacy_insert, client, items)
+        results["legacy upsert"] = timed(legacy_upsert, client, items)
+
+        client.delete_collection(COLLECTION_NAME)
+        results["insert"] = timed(client.insert, COLLECTION_NAME, items)
+        results["upsert"] = timed(client.upsert, COLLECTION_NAME, items)
+    finally:
+        client.delete_collection(COLLECTION_NAME)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    for name, seconds in run(args.chunks, args.dim).items():
+        print(
+            f"{name:>13}: {args.chunks} chunks in {seconds:.1f}s "
+            f"({args.chunks / seconds:.0f}/s)"
+        )
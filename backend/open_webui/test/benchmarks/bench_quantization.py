@@ -0,0 +1,101 @@
+"""
+Benchmark recall against memory for the vector storage precisions.
+
+Usage:
+    python -m open_webui.test.benchmarks.bench_quantization [--chunks N]
+        [--dim D] [--queries Q] [--k K] [--vectors embeddings.npy]
+
+The local vector DB is filled once per precision (float32, float16, int8 and
+binary) with the same vectors, and the recall@k of its searches against exact
+float32 results, the bytes scanned and stored per vector and the search
+latency are reported. Random vectors are used unless a .npy file of real
+embeddings is given, which matters for binary quantization: its recall on
+random vectors is much lower than on embeddings.
+"""
+
+import argparse
+import tempfile
+import time
+from typing import Optional
+
+import numpy as np
+
+from open_webui.retrieval.vector.dbs.local import (
+    DTYPES,
+    LocalVectorClient,
+    get_layout,
+)
+from open_webui.test.benchmarks.bench_vector_db import (
+    BATCH_SIZE,
+    get_exact_ids,
+    get_items,
+    get_vectors,
+)
+
+
+def load_vectors(path: Optional[str], chunks: int, dim: int, num_queries: int) -> tuple:
+    if path is None:
+        return get_vectors(chunks, dim, seed=0), get_vectors(num_queries, dim, seed=1)
+
+    # Queries are held out from the stored embeddings
+    vectors = np.load(path).astype(np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    return vectors[num_queries : num_queries + chunks], vectors[:num_queries]
+
+
+def bench_precision(data, queries, k, precision, exact) -> dict:
+    with tempfile.TemporaryDirectory() as path:
+        client = LocalVectorClient(path=path, precision=precision)
+        for offset in range(0, len(data), BATCH_SIZE):
+            client.insert("bench", get_items(data, offset, offset + BATCH_SIZE))
+
+        latencies = []
+        recalls = []
+        for query, expected in zip(queries, exact):
+            start = time.perf_counter()
+            result = client.search("bench", [query.tolist()], k)
+            latencies.append(time.perf_counter() - start)
+            recalls.append(len(set(result.ids[0]) & expected) / k)
+
+    # Binary collections also store float16 copies, only read for re-scoring
+    sizes = {
+        suffix: width * np.dtype(dtype).itemsize
+        for suffix, (dtype, width) in get_layout(precision, data.shape[1]).items()
+    }
+    return {
+        "bytes_scanned": sizes["vectors"],
+        "bytes_stored": sum(sizes.values()),
+        "latencies": latencies,
+        "recall": float(np.mean(recalls)),
+    }
+
+
+def run(chunks: int, dim: int, num_queries: int, k: int, path: Optional[str]) -> dict:
+    data, queries = load_vectors(path, chunks, dim, num_queries)
+    exact = get_exact_ids(data, queries, k)
+    return {
+        precision: bench_precision(data, queries, k, precision, exact)
+        for precision in DTYPES
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--vectors", default=None)
+    args = parser.parse_args()
+
+    for precision, result in run(
+        args.chunks, args.dim, args.queries, args.k, args.vectors
+    ).items():
+        latencies = np.asarray(result["latencies"]) * 1000
+        print(
+            f"{precision:>7}: {result['bytes_scanned']} bytes/vector scanned, "
+            f"{result['bytes_stored']} stored, "
+            f"recall@{args.k} {result['recall']:.3f}, search "
+            f"p50 {np.percentile(latencies, 50):.1f}ms "
+            f"p95 {np.percentile(latencies, 95):.1f}ms"
+        )
@@ -0,0 +1,155 @@
+"""
+Benchmark the embedded local vector DB against Chroma.
+
+Usage:
+    python -m open_webui.test.benchmarks.bench_vector_db [--chunks N] [--dim D]
+        [--queries Q] [--k K] [--precision float32|float16|int8|binary]
+
+Both stores are filled with the same random unit vectors in a temporary
+directory, then queried with the same vectors. Insert throughput, search
+latency and the recall of each store against exact (brute force) results
+are reported.
+"""
+
+import argparse
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+from chromadb import Settings
+from chromadb.utils.batch_utils import create_batches
+
+from open_webui.retrieval.vector.dbs.local import LocalVectorClient
+
+BATCH_SIZE = 10000
+
+
+def get_vectors(count: int, dim: int, seed: int) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def get_exact_ids(data: np.ndarray, queries: np.ndarray, k: int) -> list[set]:
+    exact = []
+    for query in queries:
+        scores = data @ query
+        exact.append({str(idx) for idx in np.argpartition(-scores, k)[:k]})
+    return exact
+
+
+def get_items(data: np.ndarray, start: int, end: int) -> list[dict]:
+    return [
+        {
+            "id": str(idx),
+            "text": f"chunk {idx}",
+            "vector": data[idx].tolist(),
+            "metadata": {"file_id": str(idx % 100)},
+        }
+        for idx in range(start, end)
+    ]
+
+
+def bench_local(data, queries, k, precision, path) -> dict:
+    client = LocalVectorClient(path=path, precision=precision)
+
+    start = time.perf_counter()
+    for offset in range(0, len(data), BATCH_SIZE):
+        client.insert("bench", get_items(data, offset, offset + BATCH_SIZE))
+    insert_seconds = time.perf_counter() - start
+
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        result = client.search("bench", [query.tolist()], k)
+        latencies.append(time.perf_counter() - start)
+        results.append(set(result.ids[0]))
+
+    return {
+        "insert_seconds": insert_seconds,
+        "latencies": latencies,
+        "results": results,
+    }
+
+
+def bench_chroma(data, queries, k, path) -> dict:
+    client = chromadb.PersistentClient(
+        path=path,
+        settings=Settings(allow_reset=True, anonymized_telemetry=False),
+    )
+    collection = client.get_or_create_collection(
+        name="bench", metadata={"hnsw:space": "cosine"}
+    )
+
+    start = time.perf_counter()
+    for offset in range(0, len(data), BATCH_SIZE):
+        items = get_items(data, offset, offset + BATCH_SIZE)
+        for batch in create_batches(
+            api=client,
+            ids=[item["id"] for item in items],
+            embeddings=[item["vector"] for item in items],
+            documents=[item["text"] for item in items],
+            metadatas=[item["metadata"] for item in items],
+        ):
+            collection.add(*batch)
+    insert_seconds = time.perf_counter() - start
+
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        result = collection.query(
+            query_embeddings=[query.tolist()],
+            n_results=k,
+            include=["metadatas", "documents", "distances"],
+        )
+        latencies.append(time.perf_counter() - start)
+        results.append(set(result["ids"][0]))
+
+    return {
+        "insert_seconds": insert_seconds,
+        "latencies": latencies,
+        "results": results,
+    }
+
+
+def run(chunks: int, dim: int, num_queries: int, k: int, precision: str) -> dict:
+    data = get_vectors(chunks, dim, seed=0)
+    queries = get_vectors(num_queries, dim, seed=1)
+    exact = get_exact_ids(data, queries, k)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as path:
+        results["local"] = bench_local(data, queries, k, precision, path)
+    with tempfile.TemporaryDirectory() as path:
+        results["chroma"] = bench_chroma(data, queries, k, path)
+
+    for result in results.values():
+        result["recall"] = float(
+            np.mean([len(r & e) / k for r, e in zip(result.pop("results"), exact)])
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--precision", default="float32")
+    args = parser.parse_args()
+
+    for name, result in run(
+        args.chunks, args.dim, args.queries, args.k, args.precision
+    ).items():
+        latencies = np.asarray(result["latencies"]) * 1000
+        print(
+            f"{name:>6}: inserted {args.chunks} chunks in "
+            f"{result['insert_seconds']:.1f}s "
+            f"({args.chunks / result['insert_seconds']:.0f}/s), search "
+            f"p50 {np.percentile(latencies, 50):.1f}ms "
+            f"p95 {np.percentile(latencies, 95):.1f}ms, "
+            f"recall@{args.k} {result['recall']:.3f}"
+        )
@@ -37,7 +37,7 @@ from open_webui.routers.tasks import (
     generate_image_prompt,
     generate_chat_tags,
 )
-from open_webui.routers.retrieval import process_web_search, SearchForm
+from open_webui.routers.retrieval import process_web_search_urls, search_web
 from open_webui.routers.images import image_generations, GenerateImageForm
 from open_webui.routers.pipelines import (
     process_pipeline_inlet_filter,
@@ -52,6 +52,7 @@ from open_webui.models.functions import Functions
 from open_webui.models.models import Models
 
 from open_webui.retrieval.utils import get_sources_from_files
+from open_webui.retrieval.context import assemble_context, get_context_token_budget
 
 
 from open_webui.utils.chat import generate_chat_completion
@@ -68,6 +69,7 @@ from open_webui.utils.misc import (
     get_last_user_message,
     get_last_assistant_message,
     prepend_to_first_user_message_content,
+    calculate_sha256_string,
 )
 from open_webui.utils.tools import get_tools
 from open_webui.utils.plugin import load_function_module_by_id
@@ -83,6 +85,7 @@ from open_webui.config import (
     CACHE_DIR,
     DEFAULT_TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE,
     DEFAULT_CODE_INTERPRETER_PROMPT,
+    RAG_WEB_SEARCH_CONCURRENT_QUERIES,
 )
 from open_webui.env import (
     SRC_LOG_LEVELS,
@@ -321,76 +324,98 @@ async def chat_web_search_handler(
         )
         return form_data
 
-    all_results = []
+    # Queries are searched concurrently, their result URLs deduplicated and
+    # the pages fetched and embedded once for all of them. 0 runs them in turn.
+    semaphore = asyncio.Semaphore(max(1, RAG_WEB_SEARCH_CONCURRENT_QUERIES))
+    urls = []
 
-    for searchQuery in queries:
-        await event_emitter(
-            {
-                "type": "status",
-                "data": {
-                    "action": "web_search",
-                    "description": 'Searching "{{searchQuery}}"',
-                    "query": searchQuery,
-                    "done": False,
-                },
-            }
-        )
-
-        try:
-            results = await process_web_search(
-                request,
-                SearchForm(
-                    **{
+    async def search(searchQuery: str):
+        async with semaphore:
+            await event_emitter(
+                {
+                    "type": "status",
+                    "data": {
+                        "action": "web_search",
+                        "description": 'Searching "{{searchQuery}}"',
                         "query": searchQuery,
-                    }
-                ),
-                user=user,
+                        "done": False,
+                    },
+                }
             )
 
-            if results:
-                all_results.append(results)
-                files = form_data.get("files", [])
+            try:
+                web_results = await search_web(
+                    request,
+                    request.app.state.config.RAG_WEB_SEARCH_ENGINE,
+                    searchQuery,
+                )
+            except Exception as e:
+                log.exception(e)
+                await event_emitter(
+                    {
+                        "type": "status",
+                        "data": {
+                            "action": "web_search",
+                            "description": 'Error searching "{{searchQuery}}"',
+                            "query": searchQuery,
+                            "done": True,
+                            "error": True,
+                        },
+                    }
+                )
+                return
 
-                if results.get("collection_name"):
-                    files.append(
-                        {
-                            "collection_name": results["collection_name"],
-                            "name": searchQuery,
-                            "type": "web_search",
-                            "urls": results["filenames"],
-                        }
-                    )
-                elif results.get("docs"):
-                    files.append(
-                        {
-                            "docs": results.get("docs", []),
-                            "name": searchQuery,
-                            "type": "web_search",
-                            "urls": results["filenames"],
-                        }
-                    )
+            for result in web_results:
+                if result.link not in urls:
+                    urls.append(result.link)
 
-                form_data["files"] = files
-        except Exception as e:
-            log.exception(e)
             await event_emitter(
                 {
                     "type": "status",
                     "data": {
                         "action": "web_search",
-                        "description": 'Error searching "{{searchQuery}}"',
-                        "query": searchQuery,
-                        "done": True,
-                        "error": True,
+                        "description": "Searched {{count}} sites",
+                        "urls": list(urls),
+                        "done": False,
                     },
                 }
             )
 
-    if all_results:
-        urls = []
-        for results in all_results:
-            if "filenames" in results:
-                urls.extend(results["filenames"])
+    await asyncio.gather(*[search(searchQuery) for searchQuery in queries])
+
+    results = None
+    if urls:
+        try:
+            results = await process_web_search_urls(
+                request,
+                urls,
+                f"web-search-{calculate_sha256_string(json.dumps(queries))}"[:63],
+                user,
+            )
+        except Exception as e:
+            log.exception(e)
+
+    if results:
+        files = form_data.get("files", [])
+        if results.get("collection_name"):
+            files.append(
+                {
+                    "collection_name": results["collection_name"],
+                    "name": ", ".join(queries),
+                    "type": "web_search",
+                    "urls": results["filenames"],
+                }
+            )
+        elif results.get("docs"):
+            files.append(
+                {
+                    "docs": results.get("docs", []),
+                    "name": ", ".join(queries),
+                    "type": "web_search",
+                    "urls": results["filenames"],
+                }
+            )
+        form_data["files"] = files
 
         await event_emitter(
             {
@@ -398,7 +423,7 @@ async def chat_web_search_handler(
                 "data": {
                     "action": "web_search",
                     "description": "Searched {{count}} sites",
-                    "urls": urls,
+                    "urls": results["filenames"],
                     "done": True,
                 },
             }
@@ -797,13 +822,15 @@ async def process_chat_payload(request, form_data, metadata, user, model):
 
     # If context is not empty, insert it into the messages
     if len(sources) > 0:
-        context_string = ""
-        for source_idx, source in enumerate(sources):
-            if "document" in source:
-                for doc_idx, doc_context in enumerate(source["document"]):
-                    context_string += f"<source><source_id>{source_idx}</source_id><source_context>{doc_context}</source_context></source>\n"
+        # Near-identical chunks are added once, best first, within the token
+        # budget of the model
+        context_string, context_usage = assemble_context(
+            sources,
+            max_tokens=get_context_token_budget(form_data, model),
+            encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
+        )
+        events.append({"context_usage": context_usage})
 
-        context_string = context_string.strip()
         prompt = get_last_user_message(form_data["messages"])
 
         if prompt is None:
@@ -27,9 +27,54 @@ export const uploadFile = async (token: string, file: File) => {
 		throw error;
 	}
 
+	if (res?.job_id) {
+		// Processed by the ingestion queue, the file is ready once its job is done
+		const job = await waitForIngestionJob(token, res.job_id);
+		const file = (await getFileById(token, res.id).catch(() => null)) ?? res;
+		return job.status === 'failed' ? { ...file, error: job.error } : file;
+	}
+
+	return res;
+};
+
+export const getIngestionJobById = async (token: string, id: string) => {
+	let error = null;
+
+	const res = await fetch(`${WEBUI_API_BASE_URL}/files/jobs/${id}`, {
+		method: 'GET',
+		headers: {
+			Accept: 'application/json',
+			'Content-Type': 'application/json',
+			authorization: `Bearer ${token}`
+		}
+	})
+		.then(async (res) => {
+			if (!res.ok) throw await res.json();
+			return res.json();
+		})
+		.catch((err) => {
+			error = err.detail;
+			console.log(err);
+			return null;
+		});
+
+	if (error) {
+		throw error;
+	}
+
 	return res;
 };
 
+export const waitForIngestionJob = async (token: string, id: string, interval = 1000) => {
+	while (true) {
+		const job = await getIngestionJobById(token, id);
+		if (job.status === 'completed' || job.status === 'failed') {
+			return job;
+		}
+		await new Promise((resolve) => setTimeout(resolve, interval));
+	}
+};
+
 export const uploadDir = async (token: string) => {
 	let error = null;
 